@@ -0,0 +1,84 @@
+"""
+Per-request allocation of closure callbacks vs. spider-method dispatch.
+
+Run from the scraper directory:
+
+    python benchmarks/bench_callbacks.py [num_requests]
+
+Builds ``num_requests`` requests the old way (a fresh closure per request) and
+the current way (``BaseCrawlStrategy.make_request``, dispatched through
+``GenericSpider.parse``), reports traced bytes per request for each, and checks
+that only the latter can be serialised for a JOBDIR disk queue.
+"""
+from __future__ import annotations
+import pickle
+import sys
+import tracemalloc
+import types
+from typing import Any, Callable
+
+from scrapy import Spider
+from scrapy.http import Request, Response
+from toy_catalogue.engine.crawl.base import BaseCrawlStrategy
+
+URL = "https://www.example.com/products/item-{}"
+
+
+class _BenchSpider(Spider):
+    name = "bench"
+
+    def parse(self, response: Response, **kwargs: Any) -> Any:
+        return []
+
+
+def _closure_requests(n: int) -> list[Request]:
+    def make_callback() -> Callable[[Response], list[Any]]:
+        def _callback(response: Response) -> list[Any]:
+            return []
+
+        return _callback
+
+    return [
+        Request(URL.format(i), callback=make_callback(), meta={"callback": "product"})
+        for i in range(n)
+    ]
+
+
+def _dispatch_requests(n: int) -> list[Request]:
+    strategy = BaseCrawlStrategy(
+        {}, session=types.SimpleNamespace(session_dir=None)  # type: ignore[arg-type]
+    )
+    return [strategy.make_request(URL.format(i), "product") for i in range(n)]
+
+
+def _measure(build: Callable[[int], list[Request]], n: int) -> float:
+    tracemalloc.start()
+    requests = build(n)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(requests) == n
+    return current / n
+
+
+def _serialisable(request: Request, spider: Spider) -> bool:
+    try:
+        pickle.dumps(request.to_dict(spider=spider), protocol=4)
+    except (ValueError, pickle.PicklingError, AttributeError):
+        return False
+    return True
+
+
+def main(n: int = 100_000) -> None:
+    spider = _BenchSpider()
+    closure = _measure(_closure_requests, n)
+    dispatch = _measure(_dispatch_requests, n)
+    print(f"requests:            {n}")
+    print(f"closure callbacks:   {closure:8.1f} B/request")
+    print(f"spider dispatch:     {dispatch:8.1f} B/request")
+    print(f"saved:               {closure - dispatch:8.1f} B/request")
+    print(f"closure pickles:     {_serialisable(_closure_requests(1)[0], spider)}")
+    print(f"dispatch pickles:    {_serialisable(_dispatch_requests(1)[0], spider)}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
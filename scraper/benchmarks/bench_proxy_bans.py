@@ -0,0 +1,174 @@
+"""
+Proxy rotation under a ban storm, against the local proxy_pool stand-in.
+
+Run from the scraper directory:
+
+    python benchmarks/bench_proxy_bans.py [--storm-at 4] [--storm-fraction 0.5]
+
+Crawls ``pages`` pages of the stand-in target through JhaoProxyMiddleware
+and its forward proxies, then ``storm-at`` seconds in has ``storm-fraction``
+of the proxies answer 429 to everything. Cooldowns are cut to ``cooldown``
+seconds so a burned proxy strikes out and is banned within the crawl, as it
+would over a longer one with the shipped 30 s. Reports:
+
+- pages/sec over the whole crawl and before the storm
+- ban overhead: the reactor time spent in ``_ban_proxy`` and the ban calls
+  that reached the pool API
+- time to recover: from the storm until pages/sec is back to 90% of the
+  pre-storm rate for two seconds running
+"""
+from __future__ import annotations
+import argparse
+import json
+import time
+from typing import Any, Iterator, Optional
+
+from scrapy import Request, Spider, signals
+from scrapy.crawler import CrawlerProcess
+from scrapy.http import Response
+from scrapy.utils.reactor import install_reactor
+from toy_catalogue.middlewares import JhaoProxyMiddleware
+
+RECOVERED = 0.9
+
+
+class _TimedProxyMiddleware(JhaoProxyMiddleware):
+    instance: Optional[_TimedProxyMiddleware] = None
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.bans = 0
+        self.ban_seconds = 0.0
+        _TimedProxyMiddleware.instance = self
+
+    def _ban_proxy(self, proxy_url: str) -> None:
+        start = time.perf_counter()
+        super()._ban_proxy(proxy_url)
+        self.ban_seconds += time.perf_counter() - start
+        self.bans += 1
+
+
+class _BenchSpider(Spider):
+    name = "proxy_bench"
+
+    def __init__(self, target: str, pages: int, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.target = target
+        self.pages = pages
+        self.done: list[float] = []
+        # Sent without a proxy; the middleware waits for one instead, so 0
+        self.direct = 0
+
+    async def start(self) -> Any:
+        for i in range(self.pages):
+            yield Request(f"{self.target}/page/{i}", dont_filter=True)
+
+    def parse(self, response: Response, **kwargs: Any) -> Iterator[Any]:
+        if response.status == 200:
+            self.done.append(time.monotonic())
+            if "proxy" not in response.meta:
+                self.direct += 1
+        return iter(())
+
+
+def _rates(done: list[float], start: float) -> list[int]:
+    """Pages finished in each whole second since ``start``."""
+    seconds = [0] * (int(max(done, default=start) - start) + 1)
+    for t in done:
+        seconds[int(t - start)] += 1
+    return seconds
+
+
+def _recovery(rates: list[int], storm_at: int) -> tuple[float, Optional[int]]:
+    before = rates[1:storm_at]  # the first second is warm-up
+    baseline = sum(before) / len(before) if before else 0.0
+    for second in range(storm_at, len(rates) - 1):
+        if min(rates[second], rates[second + 1]) >= RECOVERED * baseline:
+            return baseline, second - storm_at
+    return baseline, None
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=4000)
+    parser.add_argument("--proxies", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--p429", type=float, default=0.0)
+    parser.add_argument("--storm-at", type=int, default=4)
+    parser.add_argument("--storm-fraction", type=float, default=0.5)
+    parser.add_argument("--storm-duration", type=float, default=30.0)
+    parser.add_argument("--cooldown", type=float, default=0.5)
+    parser.add_argument("--sticky", action="store_true")
+    args = parser.parse_args(argv)
+
+    # The stand-in listens on the crawl's reactor, so it has to exist first;
+    # twisted.web.proxy would otherwise install the default one on import
+    install_reactor("twisted.internet.asyncioreactor.AsyncioSelectorReactor")
+    process = CrawlerProcess(
+        {
+            "LOG_LEVEL": "WARNING",
+            "TELNETCONSOLE_ENABLED": False,
+            "CONCURRENT_REQUESTS": args.concurrency,
+            "CONCURRENT_REQUESTS_PER_DOMAIN": args.concurrency,
+            "RETRY_HTTP_CODES": [500, 502, 503, 504, 522, 524, 408, 403],
+            "DOWNLOADER_MIDDLEWARES": {
+                _TimedProxyMiddleware: 100,
+                "scrapy.downloadermiddlewares.httpproxy.HttpProxyMiddleware": 110,
+            },
+            "JHAO_PROXY_COOLDOWN": args.cooldown,
+            "JHAO_PROXY_STICKY": args.sticky,
+        }
+    )
+    from twisted.internet import reactor
+    from proxy_standin import ProxyStandIn
+
+    standin = ProxyStandIn(args.proxies, p429=args.p429, reactor=reactor)
+    standin.start()
+
+    crawler = process.create_crawler(_BenchSpider)
+    crawler.settings.set("JHAO_PROXY_API_URL", standin.api_url)
+    started: list[float] = []
+
+    def opened(spider: Spider) -> None:
+        started.append(time.monotonic())
+        reactor.callLater(  # type: ignore[attr-defined]
+            args.storm_at,
+            standin.storm,
+            args.storm_fraction,
+            args.storm_duration,
+        )
+
+    crawler.signals.connect(opened, signals.spider_opened)
+    process.crawl(crawler, target=standin.target_url, pages=args.pages)
+    process.start()
+
+    spider: _BenchSpider = crawler.spider  # type: ignore[assignment]
+    mw = _TimedProxyMiddleware.instance
+    assert mw is not None and started
+    elapsed = max(spider.done, default=started[0]) - started[0]
+    rates = _rates(spider.done, started[0])
+    baseline, recovered = _recovery(rates, args.storm_at)
+    stats = crawler.stats.get_stats() if crawler.stats else {}
+
+    print(f"pages:               {len(spider.done)} / {args.pages}")
+    print(f"elapsed:             {elapsed:8.2f} s")
+    print(f"pages/sec:           {len(spider.done) / elapsed:8.1f}")
+    print(f"pre-storm pages/sec: {baseline:8.1f}")
+    print(f"fetched directly:    {spider.direct}")
+    print(f"bans:                {mw.bans}")
+    print(f"ban overhead:        {mw.ban_seconds * 1e6 / max(mw.bans, 1):8.1f} us/ban")
+    print(f"ban calls to API:    {standin.stats.ban_calls}")
+    print(f"proxy refills:       {stats.get('proxy/refill_count', 0)}")
+    print(f"cooldowns:           {stats.get('proxy/cooldowns', 0)}")
+    if args.storm_at >= len(rates):
+        print("time to recover:     crawl finished before the storm")
+    elif recovered is None:
+        print("time to recover:     did not recover")
+    else:
+        print(f"time to recover:     {recovered} s")
+    print(f"pages/sec by second: {rates}")
+    print(f"stand-in:            {json.dumps(standin.summary())}")
+
+
+if __name__ == "__main__":
+    main()
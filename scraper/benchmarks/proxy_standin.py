@@ -0,0 +1,224 @@
+"""
+Local stand-in for a jhao proxy_pool deployment.
+
+Serves, on the running reactor:
+
+- the pool API: ``/all`` lists the forward proxies still in the pool (as
+  ``ip:port`` strings, honouring ``limit``), ``/ban?proxy=ip:port`` drops one
+- ``num_proxies`` forward proxies, each with its own latency; a proxy
+  answers 429 itself with probability ``p429``, as a site that has flagged
+  its address would, and always while caught in a ban storm
+- a target site whose pages take ``target_latency`` seconds
+
+Run it on its own to point a real crawl at it (JHAO_PROXY_API_URL):
+
+    python benchmarks/proxy_standin.py [--port 5010] [--proxies 20] [--p429 0.02]
+
+``bench_proxy_bans.py`` starts one in-process instead.
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from twisted.web import http, proxy
+from twisted.web.resource import Resource
+from twisted.web.server import NOT_DONE_YET, Request, Site
+
+
+@dataclass
+class ProxyNode:
+    latency: float
+    p429: float
+    port: int = 0
+    burned_until: float = 0.0
+    requests: int = 0
+    rejected: int = 0
+
+    @property
+    def address(self) -> str:
+        return f"127.0.0.1:{self.port}"
+
+    def rejects(self) -> bool:
+        if time.monotonic() < self.burned_until:
+            return True
+        return random.random() < self.p429
+
+
+@dataclass
+class StandInStats:
+    all_calls: int = 0
+    ban_calls: int = 0
+    target_hits: int = 0
+    banned: list[str] = field(default_factory=list)
+
+
+class _ForwardRequest(proxy.ProxyRequest):
+    def process(self) -> None:
+        node: ProxyNode = self.channel.factory.node  # type: ignore[attr-defined]
+        node.requests += 1
+        if node.rejects():
+            node.rejected += 1
+            self.setResponseCode(429)
+            self.finish()
+            return
+        self.reactor.callLater(node.latency, self._forward)
+
+    def _forward(self) -> None:
+        if not self.finished and not self._disconnected:
+            super().process()
+
+
+class _ForwardProxy(proxy.Proxy):
+    requestFactory = _ForwardRequest
+
+
+class _ProxyFactory(http.HTTPFactory):
+    protocol = _ForwardProxy  # type: ignore[assignment]
+
+    def __init__(self, node: ProxyNode) -> None:
+        super().__init__()
+        self.node = node
+
+
+class _Target(Resource):
+    isLeaf = True
+
+    def __init__(self, standin: ProxyStandIn) -> None:
+        super().__init__()
+        self.standin = standin
+
+    def render_GET(self, request: Request) -> Any:
+        self.standin.stats.target_hits += 1
+
+        def respond() -> None:
+            if not request._disconnected:
+                request.setHeader(b"content-type", b"text/html")
+                request.write(b"<html><body><h1>ok</h1></body></html>")
+                request.finish()
+
+        self.standin.reactor.callLater(self.standin.target_latency, respond)
+        return NOT_DONE_YET
+
+
+class _PoolAPI(Resource):
+    isLeaf = True
+
+    def __init__(self, standin: ProxyStandIn) -> None:
+        super().__init__()
+        self.standin = standin
+
+    def render_GET(self, request: Request) -> bytes:
+        stats = self.standin.stats
+        raw: dict[bytes, list[bytes]] = request.args or {}
+        args = {k.decode(): v[0].decode() for k, v in raw.items()}
+        if request.postpath == [b"all"]:
+            stats.all_calls += 1
+            pool = [n.address for n in self.standin.pool]
+            limit = int(args.get("limit", len(pool)))
+            request.setHeader(b"content-type", b"application/json")
+            return json.dumps(random.sample(pool, min(limit, len(pool)))).encode()
+        if request.postpath == [b"ban"] and "proxy" in args:
+            stats.ban_calls += 1
+            stats.banned.append(args["proxy"])
+            self.standin.pool = [
+                n for n in self.standin.pool if n.address != args["proxy"]
+            ]
+            return b"{}"
+        request.setResponseCode(404)
+        return b"{}"
+
+
+class ProxyStandIn:
+    def __init__(
+        self,
+        num_proxies: int = 20,
+        latency: tuple[float, float] = (0.005, 0.05),
+        p429: float = 0.0,
+        target_latency: float = 0.01,
+        reactor: Any = None,
+    ) -> None:
+        if reactor is None:
+            from twisted.internet import reactor
+        self.reactor: Any = reactor
+        self.nodes = [
+            ProxyNode(latency=random.uniform(*latency), p429=p429)
+            for _ in range(num_proxies)
+        ]
+        # Nodes still listed by /all
+        self.pool = list(self.nodes)
+        self.target_latency = target_latency
+        self.stats = StandInStats()
+        self.api_url = ""
+        self.target_url = ""
+        self._ports: list[Any] = []
+
+    def start(self, api_port: int = 0) -> None:
+        for node in self.nodes:
+            node.port = self._listen(_ProxyFactory(node))
+        target = self._listen(Site(_Target(self)))
+        api = self._listen(Site(_PoolAPI(self)), api_port)
+        self.target_url = f"http://127.0.0.1:{target}"
+        self.api_url = f"http://127.0.0.1:{api}"
+
+    def _listen(self, factory: Any, port: int = 0) -> int:
+        listening = self.reactor.listenTCP(port, factory, interface="127.0.0.1")
+        self._ports.append(listening)
+        return int(listening.getHost().port)
+
+    def storm(self, fraction: float, duration: float) -> list[ProxyNode]:
+        """Have ``fraction`` of the proxies answer 429 to everything for a while."""
+        burned = random.sample(self.nodes, round(len(self.nodes) * fraction))
+        until = time.monotonic() + duration
+        for node in burned:
+            node.burned_until = until
+        return burned
+
+    def stop(self) -> None:
+        for listening in self._ports:
+            listening.stopListening()
+        self._ports.clear()
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "proxies_left": len(self.pool),
+            "all_calls": self.stats.all_calls,
+            "ban_calls": self.stats.ban_calls,
+            "target_hits": self.stats.target_hits,
+            "proxied": sum(n.requests for n in self.nodes),
+            "rejected_429": sum(n.rejected for n in self.nodes),
+        }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=5010, help="pool API port")
+    parser.add_argument("--proxies", type=int, default=20)
+    parser.add_argument("--min-latency", type=float, default=0.005)
+    parser.add_argument("--max-latency", type=float, default=0.05)
+    parser.add_argument("--p429", type=float, default=0.0)
+    parser.add_argument("--target-latency", type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    from twisted.internet import reactor
+
+    standin = ProxyStandIn(
+        args.proxies,
+        (args.min_latency, args.max_latency),
+        args.p429,
+        args.target_latency,
+        reactor,
+    )
+    standin.start(args.port)
+    print(f"pool API: {standin.api_url}   target: {standin.target_url}")
+    standin.reactor.addSystemEventTrigger(
+        "before", "shutdown", lambda: print(json.dumps(standin.summary(), indent=2))
+    )
+    standin.reactor.run()
+
+
+if __name__ == "__main__":
+    main()
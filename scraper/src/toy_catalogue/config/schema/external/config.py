@@ -1,3 +1,4 @@
+from pathlib import Path, PurePosixPath
 from pydantic import BaseModel, HttpUrl
 from typing import Literal
 
@@ -6,15 +7,27 @@ class FileConfig(BaseModel):
     type: Literal["file"]
     path: str
 
+    @property
+    def name(self) -> str:
+        return Path(self.path).stem
+
 
 class PackageConfig(BaseModel):
     type: Literal["package"]
     resource: str
 
+    @property
+    def name(self) -> str:
+        return PurePosixPath(self.resource).stem
+
 
 class UrlConfig(BaseModel):
     type: Literal["url"]
     url: HttpUrl
 
+    @property
+    def name(self) -> str:
+        return PurePosixPath(self.url.path or "").stem or str(self.url.host)
+
 
 ConfigSpec = FileConfig | PackageConfig | UrlConfig
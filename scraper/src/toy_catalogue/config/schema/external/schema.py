@@ -40,6 +40,7 @@ class SiteConfig(BaseModel):
     start_urls: dict[str, str]
     traversal: GraphSchema
     processors: ProcessorSchema
+    strategy: dict[str, Any] = {}
 
 
 class ProcessorSchema(RootModel[dict[str, list[dict[str, str]]]]):
@@ -49,4 +50,4 @@ class ProcessorSchema(RootModel[dict[str, list[dict[str, str]]]]):
 
 class StrategyConfig(BaseModel):
     name: str
-    # params: dict
+    params: dict[str, Any] = {}
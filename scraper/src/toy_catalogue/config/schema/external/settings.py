@@ -1,5 +1,5 @@
 from typing import Optional
-from pydantic import BaseModel, Field, RootModel
+from pydantic import BaseModel, ConfigDict, Field, RootModel
 
 
 class RegistryConfig(RootModel[dict[str, int]]):
@@ -7,6 +7,9 @@ class RegistryConfig(RootModel[dict[str, int]]):
 
 
 class CustomConfig(BaseModel):
+    # Upper-case extras are plain Scrapy settings (e.g. SCHEDULER_DISK_QUEUE)
+    model_config = ConfigDict(extra="allow")
+
     images_store: Optional[str] = None
     log_level: Optional[str] = None
 
@@ -20,6 +23,8 @@ class ScrapySettings(BaseModel):
 
 
 class FullConfig(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
     scrapy: Optional[ScrapySettings] = None
     pipelines: Optional[RegistryConfig] = None
     middlewares_downloader: Optional[RegistryConfig] = None
@@ -57,8 +57,16 @@ def build_settings(
         if reg:
             scrapy_settings.set(scrapy_key, reg.root)
 
+    # Upper-case keys at top level or under [custom] are passed through as-is
+    for section in (config, config.custom):
+        for k, v in ((section and section.model_extra) or {}).items():
+            if k.isupper():
+                scrapy_settings.set(k, v)
+
     if config.custom:
-        for k, v in config.custom.model_dump(exclude_none=True).items():
+        for k, v in config.custom.model_dump(
+            exclude_none=True, exclude=set(config.custom.model_extra or {})
+        ).items():
             scrapy_settings.set(f"CUSTOM_{k.upper()}", v)
 
     return scrapy_settings
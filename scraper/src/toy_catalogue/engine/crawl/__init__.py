@@ -1,10 +1,26 @@
-from .base import BaseCrawlStrategy
+from .base import BaseCrawlStrategy, StrategyParams
 from .strategies.fresh import FreshCrawlStrategy
+from .strategies.best_first import BestFirstCrawlStrategy
+from .strategies.incremental import IncrementalCrawlStrategy
 from ..graph import TraversalGraph
 from toy_catalogue.config.schema.external.schema import StrategyConfig
 from toy_catalogue.session.session_manager import SessionContext
 
-STRATEGY_REGISTRY: dict[str, type[BaseCrawlStrategy]] = {"fresh": FreshCrawlStrategy}
+__all__ = [
+    "BaseCrawlStrategy",
+    "StrategyParams",
+    "StrategyConfig",
+    "STRATEGY_REGISTRY",
+    "build_strategy",
+    "get_strategy",
+    "register_strategy",
+]
+
+STRATEGY_REGISTRY: dict[str, type[BaseCrawlStrategy]] = {
+    "fresh": FreshCrawlStrategy,
+    "best_first": BestFirstCrawlStrategy,
+    "incremental": IncrementalCrawlStrategy,
+}
 
 
 def register_strategy(name: str, strategy: type[BaseCrawlStrategy]) -> None:
@@ -23,4 +39,5 @@ def build_strategy(
     strategy_cls = STRATEGY_REGISTRY.get(strategy_config.name)
     if not strategy_cls:
         raise ValueError(f"Unknown strategy: {strategy_config.name}")
-    return strategy_cls(traversal_graph, session=session)
+    params = strategy_cls.params_model.model_validate(strategy_config.params)
+    return strategy_cls(traversal_graph, session=session, params=params)
@@ -1,43 +1,112 @@
 from __future__ import annotations
 from scrapy.http import Request, Response
-from typing import Callable, TYPE_CHECKING
-from toy_catalogue.utils.url import canonicalise_url
+from collections.abc import Sized
+from typing import Any, TYPE_CHECKING
+from pydantic import BaseModel
 import logging
-from ..graph import TraversalGraph
-from toy_catalogue.processing.items import from_response
+from time import perf_counter
+from ..graph import TraversalGraph, significant_query_params
+from .seen import BaseSeenSet, SeenSetSchema, build_seen_set
+from toy_catalogue.engine.extractors import Record
+from toy_catalogue.processing.items import RecordItem, from_response
+from toy_catalogue.session.item_index import ItemIndex
+from toy_catalogue.session.metrics import LATENCY_BUCKETS_MS
 
 if TYPE_CHECKING:
+    from scrapy.crawler import Crawler
     from toy_catalogue.processing.items._base import BaseItem
     from toy_catalogue.processing.pipelines.post_processors import BasePostProcessor
     from toy_catalogue.session.session_manager import SessionContext
 
 
+class StrategyParams(BaseModel):
+    seen: SeenSetSchema = SeenSetSchema()
+
+
 class BaseCrawlStrategy:
+    params_model: type[StrategyParams] = StrategyParams
+
     graph: TraversalGraph
-    seen: set[str]
+    seen: BaseSeenSet
     session: SessionContext
+    params: StrategyParams
 
     def __init__(
-        self, traversal_graph: TraversalGraph, session: SessionContext
+        self,
+        traversal_graph: TraversalGraph,
+        session: SessionContext,
+        params: StrategyParams | None = None,
     ) -> None:
         self.graph = traversal_graph
-        self.seen = set()
         self.session = session
+        self.params = params or self.params_model()
+        self.seen = build_seen_set(self.params.seen, session)
+        self.seen.query_params = significant_query_params(traversal_graph)
+        self.processors: list[BasePostProcessor] = []
+        self.crawler: Crawler | None = None
+        self._index: ItemIndex | None = None
+
+    @property
+    def index(self) -> ItemIndex:
+        """The item index in the session's output directory, opened on first use."""
+        if self._index is None:
+            self._index = ItemIndex(
+                self.session.item_index_path,
+                session_id=self.session.session_id,
+                query_params=self.seen.query_params,
+            )
+        return self._index
 
     def add_meta_processors(self, processors: list[BasePostProcessor]):
         self.processors = processors
 
-    def make_callback(self) -> Callable[[Response], list[Request | BaseItem]]:
-        def _callback(response: Response) -> list[Request | BaseItem]:
-            outputs: list[Request | BaseItem] = []
-            for output in self.process_node(response):
-                if isinstance(output, Request):
-                    for p in self.processors:
-                        output = p.insert_meta(output, response)
-                outputs.append(output)
-            return outputs
+    def bind_crawler(self, crawler: Crawler) -> None:
+        self.crawler = crawler
+
+    def frontier_size(self) -> int:
+        """Requests waiting in the scheduler plus those being downloaded."""
+        engine = self.crawler.engine if self.crawler else None
+        if engine is None:
+            return 0
+        scheduler = engine.scheduler
+        queued = len(scheduler) if isinstance(scheduler, Sized) else 0
+        return queued + len(engine.downloader.active)
+
+    def node_priority(self, node: str) -> int:
+        return 0
+
+    def make_request(self, url: str, node: str, **kwargs: Any) -> Request:
+        # No callback: Scrapy falls back to the spider's ``parse`` method, which
+        # dispatches on meta["callback"]. Keeping the request free of closures
+        # lets the scheduler pickle it into JOBDIR disk queues.
+        meta = {**kwargs.pop("meta", {}), "callback": node}
+        kwargs.setdefault("priority", self.node_priority(node))
+        return Request(url, meta=meta, **kwargs)
+
+    def checkpoint_state(self) -> dict[str, Any]:
+        """What a resumed crawl needs besides the pending requests."""
+        return {"seen": self.seen.checkpoint()}
 
-        return _callback
+    def restore_state(self, state: dict[str, Any]) -> None:
+        self.seen.restore(state["seen"])
+
+    def on_idle(self) -> list[Request]:
+        """Requests to schedule when the crawler runs dry; empty lets it close."""
+        return []
+
+    def handle_response(self, response: Response) -> list[Request | BaseItem]:
+        outputs: list[Request | BaseItem] = []
+        results = self.process_node(response)
+        start = perf_counter()
+        for output in results:
+            if isinstance(output, Request):
+                for p in self.processors:
+                    output = p.insert_meta(output, response)
+            outputs.append(output)
+        if self.processors:
+            node = response.meta.get("callback", "")
+            self.session.metrics.timing("stage_ms", start, stage="meta", node=node)
+        return outputs
 
     def process_node(self, response: Response) -> list[Request | BaseItem]:
         logger = logging.getLogger(__name__)
@@ -47,55 +116,78 @@ class BaseCrawlStrategy:
             return []
         logger.debug(f"{response.url} crawled originating from {current_state}")
 
+        metrics = self.session.metrics
+        metrics.counter("responses", node=current_state).inc()
+        latency = response.meta.get("download_latency")
+        if latency is not None:
+            metrics.histogram(
+                "stage_ms", LATENCY_BUCKETS_MS, stage="download", node=current_state
+            ).observe(latency * 1000)
+
+        start = perf_counter()
         try:
             item = from_response(response, current_state)
-            self.session.record_success(
-                source="response_to_item_parse",
-                msg=f"Item created successfully {type(item)}",
-            )
         except Exception as e:
+            metrics.counter("item_errors", node=current_state).inc()
             self.session.record_error(
                 source="response_to_item_parse",
                 msg=f"Item creation failed for: {response.url}",
                 error=e,
             )
             item = None
+        else:
+            self.index.record(response.url, current_state)
+            metrics.counter("items_created", node=current_state).inc()
+            metrics.timing("stage_ms", start, stage="item", node=current_state)
 
         all_outputs: list[Request | BaseItem] = [item] if item else []
-        node_edges = self.graph.get(current_state, {})
-        if node_edges:
-            for next_node, extractors in node_edges.items():
-                for extractor in extractors:
-                    raw_urls = extractor.extract(response)
-                    filtered_urls = self.filter_links(
-                        current_state, next_node, raw_urls
+        plan = self.graph.get(current_state)
+        if plan:
+            outputs = plan.run(response, metrics)
+            links_start = perf_counter()
+            for next_node, raw_urls in outputs:
+                records = {r.url: r for r in raw_urls if isinstance(r, Record)}
+                if records:
+                    all_outputs += self.emit_records(
+                        response, current_state, next_node, records
                     )
-                    for url in filtered_urls:
-                        all_outputs.append(
-                            Request(
-                                url,
-                                callback=self.make_callback(),
-                                meta={"callback": next_node},
-                            )
-                        )
-        self.session.record_event(
-            event_type="links_extracted",
-            source="strategy",
-            details={
-                "count": len(all_outputs)
-                - int(not isinstance(all_outputs[0], Request)),
-                "url": response.url,
-            },
-        )
+                    raw_urls = [u for u in raw_urls if not isinstance(u, Record)]
+                filtered_urls = self.filter_links(current_state, next_node, raw_urls)
+                for url in filtered_urls:
+                    all_outputs.append(self.make_request(url, next_node))
+            metrics.timing("stage_ms", links_start, stage="links", node=current_state)
+        links = sum(isinstance(o, Request) for o in all_outputs)
+        metrics.counter("links_extracted", node=current_state).inc(links)
+        metrics.histogram("links_per_response", node=current_state).observe(links)
+        metrics.timing("stage_ms", start, stage="parse", node=current_state)
         return all_outputs
 
+    def emit_records(
+        self,
+        response: Response,
+        from_node: str,
+        to_node: str,
+        records: dict[str, Record],
+    ) -> list[BaseItem]:
+        """Turn records extracted from ``response`` straight into items.
+
+        Records go through the same link filter as URLs, so they are
+        deduplicated and recrawl rules apply to them too.
+        """
+        items: list[BaseItem] = []
+        for url in self.filter_links(from_node, to_node, list(records)):
+            record = records[url]
+            items.append(RecordItem.from_record(response, to_node, url, record.data))
+            self.index.record(url, to_node)
+        return items
+
     def filter_links(self, from_node: str, to_node: str, urls: list[str]) -> list[str]:
         return self._filter_duplicates(urls)
 
     def _filter_duplicates(self, urls: list[str]) -> list[str]:
-        result: list[str] = []
-        for url in urls:
-            if canonicalise_url(url) not in self.seen:
-                self.seen.add(canonicalise_url(url))
-                result.append(url)
-        return result
+        return [url for url in urls if self.seen.add(url)]
+
+    def close(self) -> None:
+        self.seen.close()
+        if self._index is not None:
+            self._index.close()
@@ -0,0 +1,46 @@
+from __future__ import annotations
+from pydantic import BaseModel, Field
+from typing import Any, TYPE_CHECKING
+
+from ._base import BaseSeenSet, SeenSetParam, url_fingerprint
+from .memory import MemorySeenSet, MemorySeenParams
+from .bloom import BloomSeenSet, BloomSeenParams
+from .sqlite import SqliteSeenSet, SqliteSeenParams
+
+if TYPE_CHECKING:
+    from toy_catalogue.session.session_manager import SessionContext
+
+__all__ = [
+    "BaseSeenSet",
+    "SeenSetParam",
+    "SeenSetSchema",
+    "SEEN_SET_REGISTRY",
+    "build_seen_set",
+    "register_seen_set",
+    "url_fingerprint",
+]
+
+SEEN_SET_REGISTRY: dict[str, tuple[type[SeenSetParam], type[BaseSeenSet]]] = {
+    "memory": (MemorySeenParams, MemorySeenSet),
+    "bloom": (BloomSeenParams, BloomSeenSet),
+    "sqlite": (SqliteSeenParams, SqliteSeenSet),
+}
+
+
+class SeenSetSchema(BaseModel):
+    class_: str = Field(default="memory", alias="class")
+    params: dict[str, Any] = {}
+
+
+def register_seen_set(
+    name: str, cls_params: type[SeenSetParam], cls: type[BaseSeenSet]
+) -> None:
+    SEEN_SET_REGISTRY[name] = (cls_params, cls)
+
+
+def build_seen_set(config: SeenSetSchema, session: SessionContext) -> BaseSeenSet:
+    registered = SEEN_SET_REGISTRY.get(config.class_)
+    if not registered:
+        raise ValueError(f"Unknown seen set: {config.class_}")
+    param_cls, seen_cls = registered
+    return seen_cls(param_cls.model_validate(config.params), session)
@@ -0,0 +1,60 @@
+from __future__ import annotations
+from abc import ABC, abstractmethod
+from pydantic import BaseModel
+from typing import TYPE_CHECKING, Any
+from toy_catalogue.utils.url import SIGNIFICANT_QUERY_PARAMS, url_fingerprint
+
+if TYPE_CHECKING:
+    from toy_catalogue.session.session_manager import SessionContext
+
+
+class SeenSetParam(BaseModel):
+    ...
+
+
+class BaseSeenSet(ABC):
+    """Set of already scheduled URLs, keyed by their 64-bit fingerprint."""
+
+    # Set by the strategy from its traversal graph
+    query_params: frozenset[str] = SIGNIFICANT_QUERY_PARAMS
+
+    @abstractmethod
+    def __init__(self, params: SeenSetParam, session: SessionContext):
+        ...
+
+    @abstractmethod
+    def add_fingerprint(self, fp: int) -> bool:
+        """Add ``fp`` and return True if it was not already present."""
+        ...
+
+    @abstractmethod
+    def has_fingerprint(self, fp: int) -> bool:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    def add(self, url: str) -> bool:
+        return self.add_fingerprint(url_fingerprint(url, self.query_params))
+
+    def __contains__(self, url: object) -> bool:
+        return isinstance(url, str) and self.has_fingerprint(
+            url_fingerprint(url, self.query_params)
+        )
+
+    def flush(self) -> None:
+        """Persist pending state, if the backend has any."""
+
+    @abstractmethod
+    def checkpoint(self) -> Any:
+        """Picklable snapshot of the set, for ``restore`` after a crash."""
+        ...
+
+    @abstractmethod
+    def restore(self, state: Any) -> None:
+        """Return to the state ``checkpoint`` captured, dropping later additions."""
+        ...
+
+    def close(self) -> None:
+        self.flush()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+from pydantic import Field
+from typing import TYPE_CHECKING, Optional
+from ._base import BaseSeenSet, SeenSetParam
+import math
+import mmap
+import struct
+
+if TYPE_CHECKING:
+    from toy_catalogue.session.session_manager import SessionContext
+
+_HEADER = struct.Struct("<8sQQQ")  # magic, bit count, hash count, item count
+_MAGIC = b"TCBLOOM1"
+_MASK64 = (1 << 64) - 1
+
+
+class BloomSeenParams(SeenSetParam):
+    capacity: int = Field(default=1_000_000, gt=0)
+    error_rate: float = Field(default=0.001, gt=0, lt=1)
+    # File name inside the session's output directory; in memory if unset
+    filename: Optional[str] = None
+
+
+class BloomSeenSet(BaseSeenSet):
+    """
+    Fixed-size Bloom filter over URL fingerprints.
+
+    Memory is set up front from ``capacity`` and ``error_rate`` and never grows.
+    False positives mean a small fraction of new URLs are treated as seen.
+    With ``filename`` the bit array is an mmap of a file in the session's
+    output directory, so reopening the session restores it without a rebuild.
+    """
+
+    num_bits: int
+    num_hashes: int
+    count: int
+
+    def __init__(self, params: BloomSeenParams, session: SessionContext) -> None:
+        self.num_bits = max(
+            8,
+            math.ceil(
+                -params.capacity * math.log(params.error_rate) / (math.log(2) ** 2)
+            ),
+        )
+        self.num_hashes = max(1, round(self.num_bits / params.capacity * math.log(2)))
+        self.count = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._file = None
+        num_bytes = (self.num_bits + 7) // 8
+
+        if params.filename is None:
+            self._bits: bytearray | memoryview = bytearray(num_bytes)
+            return
+
+        path = session.output_dir / params.filename
+        size = _HEADER.size + num_bytes
+        exists = path.exists()
+        self._file = open(path, "r+b" if exists else "w+b")
+        if not exists:
+            self._file.truncate(size)
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        magic, num_bits, num_hashes, count = _HEADER.unpack_from(self._mmap, 0)
+        if exists:
+            if magic != _MAGIC or (num_bits, num_hashes) != (
+                self.num_bits,
+                self.num_hashes,
+            ):
+                raise ValueError(
+                    f"Bloom filter at {path} was created with different parameters"
+                )
+            self.count = count
+        self._write_header()
+        self._bits = memoryview(self._mmap)[_HEADER.size :]
+
+    def _positions(self, fp: int) -> list[int]:
+        h1 = fp & _MASK64
+        # Derive a second, odd hash by mixing the first (Kirsch-Mitzenmacher)
+        h2 = ((h1 * 0x9E3779B97F4A7C15) & _MASK64) | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add_fingerprint(self, fp: int) -> bool:
+        added = False
+        bits = self._bits
+        for pos in self._positions(fp):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def has_fingerprint(self, fp: int) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(fp))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _write_header(self) -> None:
+        if self._mmap is not None:
+            _HEADER.pack_into(
+                self._mmap, 0, _MAGIC, self.num_bits, self.num_hashes, self.count
+            )
+
+    def checkpoint(self) -> tuple[int, bytes]:
+        return self.count, bytes(self._bits)
+
+    def restore(self, state: tuple[int, bytes]) -> None:
+        count, bits = state
+        if len(bits) != len(self._bits):
+            raise ValueError("Bloom filter checkpoint has different parameters")
+        self._bits[:] = bits
+        self.count = count
+        self._write_header()
+
+    def flush(self) -> None:
+        if self._mmap is not None:
+            self._write_header()
+            self._mmap.flush()
+
+    def close(self) -> None:
+        if self._mmap is None:
+            return
+        self.flush()
+        if isinstance(self._bits, memoryview):
+            self._bits.release()
+        self._bits = bytearray()
+        self._mmap.close()
+        self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
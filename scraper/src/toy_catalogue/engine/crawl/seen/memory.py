@@ -0,0 +1,40 @@
+from __future__ import annotations
+from array import array
+from typing import TYPE_CHECKING
+from ._base import BaseSeenSet, SeenSetParam
+
+if TYPE_CHECKING:
+    from toy_catalogue.session.session_manager import SessionContext
+
+
+class MemorySeenParams(SeenSetParam):
+    ...
+
+
+class MemorySeenSet(BaseSeenSet):
+    """Exact in-process set of fingerprints, lost when the process exits."""
+
+    fingerprints: set[int]
+
+    def __init__(self, params: MemorySeenParams, session: SessionContext) -> None:
+        self.fingerprints = set()
+
+    def add_fingerprint(self, fp: int) -> bool:
+        if fp in self.fingerprints:
+            return False
+        self.fingerprints.add(fp)
+        return True
+
+    def has_fingerprint(self, fp: int) -> bool:
+        return fp in self.fingerprints
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    def checkpoint(self) -> bytes:
+        return array("q", self.fingerprints).tobytes()
+
+    def restore(self, state: bytes) -> None:
+        fingerprints = array("q")
+        fingerprints.frombytes(state)
+        self.fingerprints = set(fingerprints)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+from pydantic import Field
+from typing import TYPE_CHECKING
+from ._base import BaseSeenSet, SeenSetParam
+import os
+import sqlite3
+from pathlib import Path
+
+if TYPE_CHECKING:
+    from toy_catalogue.session.session_manager import SessionContext
+
+
+class SqliteSeenParams(SeenSetParam):
+    filename: str = "seen.sqlite"
+    commit_every: int = Field(default=1000, gt=0)
+
+
+class SqliteSeenSet(BaseSeenSet):
+    """
+    Exact, persistent fingerprint set stored in the session's output directory.
+
+    Only SQLite's page cache is held in memory, and reopening the same session
+    resumes deduplication without reloading anything.
+    """
+
+    def __init__(self, params: SqliteSeenParams, session: SessionContext) -> None:
+        self.path = session.output_dir / params.filename
+        self.commit_every = params.commit_every
+        self._pending = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen (fp INTEGER PRIMARY KEY) WITHOUT ROWID"
+        )
+        self._conn.commit()
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()
+
+    def add_fingerprint(self, fp: int) -> bool:
+        cursor = self._conn.execute("INSERT OR IGNORE INTO seen (fp) VALUES (?)", (fp,))
+        if cursor.rowcount != 1:
+            return False
+        self._count += 1
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+        return True
+
+    def has_fingerprint(self, fp: int) -> bool:
+        row = self._conn.execute("SELECT 1 FROM seen WHERE fp = ?", (fp,)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def checkpoint_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".checkpoint")
+
+    def checkpoint(self) -> str:
+        # Too big to pickle whole: back the table up next to it, atomically
+        self.flush()
+        tmp = self.path.with_name(self.path.name + ".checkpoint.tmp")
+        tmp.unlink(missing_ok=True)
+        backup = sqlite3.connect(tmp)
+        try:
+            self._conn.backup(backup)
+        finally:
+            backup.close()
+        os.replace(tmp, self.checkpoint_path)
+        return self.checkpoint_path.name
+
+    def restore(self, state: str) -> None:
+        self._conn.rollback()
+        source = sqlite3.connect(self.path.with_name(state))
+        try:
+            source.backup(self._conn)
+        finally:
+            source.close()
+        self._pending = 0
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()
+
+    def flush(self) -> None:
+        if self._pending:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
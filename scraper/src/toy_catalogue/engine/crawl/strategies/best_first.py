@@ -0,0 +1,106 @@
+from __future__ import annotations
+from scrapy.http import Request, Response
+from scrapy.utils.request import request_from_dict
+from typing import Any, Optional, TYPE_CHECKING
+from pydantic import Field
+import heapq
+import itertools
+from ..base import BaseCrawlStrategy, StrategyParams
+
+if TYPE_CHECKING:
+    from toy_catalogue.processing.items._base import BaseItem
+
+
+class BestFirstParams(StrategyParams):
+    # Node name -> rank; higher ranks are crawled first (e.g. image > product)
+    priorities: dict[str, int] = {}
+    # Scrapy priority gap between adjacent ranks, large enough to outweigh
+    # DEPTH_PRIORITY adjustments
+    priority_step: int = Field(default=1000, gt=0)
+    # Cap on scheduled + in-flight requests before lower ranks are held back
+    frontier_limit: Optional[int] = Field(default=None, gt=0)
+    # Cap on held-back requests; past it the worse half goes to the scheduler
+    # below every rank, so the held-back set never outgrows memory
+    deferred_limit: int = Field(default=10_000, gt=1)
+
+
+class BestFirstCrawlStrategy(BaseCrawlStrategy):
+    """
+    Crawls higher-ranked nodes first so product subtrees finish before more
+    collection pages are expanded.
+
+    Once the frontier reaches ``frontier_limit``, requests for anything but
+    the top-ranked nodes are parked in a small local heap and released, best
+    rank first, as the frontier drains. A heap that outgrows
+    ``deferred_limit`` spills its worse half to the scheduler at a priority
+    below every rank.
+    """
+
+    params: BestFirstParams
+    params_model = BestFirstParams
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.top_rank = max(self.params.priorities.values(), default=0)
+        self._deferred: list[tuple[int, int, Request]] = []
+        self._order = itertools.count()
+
+    def node_priority(self, node: str) -> int:
+        return self.params.priorities.get(node, 0) * self.params.priority_step
+
+    def handle_response(self, response: Response) -> list[Request | BaseItem]:
+        outputs = super().handle_response(response)
+        limit = self.params.frontier_limit
+        if limit is None:
+            return outputs
+
+        frontier = self.frontier_size()
+        kept: list[Request | BaseItem] = []
+        for output in outputs:
+            if isinstance(output, Request) and self._rank(output) < self.top_rank:
+                heapq.heappush(
+                    self._deferred, (-output.priority, next(self._order), output)
+                )
+            else:
+                kept.append(output)
+                frontier += isinstance(output, Request)
+        if len(self._deferred) > self.params.deferred_limit:
+            kept += self._spill()
+        return kept + self._release(limit - frontier)
+
+    def checkpoint_state(self) -> dict[str, Any]:
+        # Requests carry no callbacks, so they serialise without the spider
+        deferred = [request.to_dict() for _, _, request in sorted(self._deferred)]
+        return {**super().checkpoint_state(), "deferred": deferred}
+
+    def restore_state(self, state: dict[str, Any]) -> None:
+        super().restore_state(state)
+        self._deferred = []
+        for data in state.get("deferred", []):
+            request = request_from_dict(data)
+            heapq.heappush(
+                self._deferred, (-request.priority, next(self._order), request)
+            )
+
+    def on_idle(self) -> list[Request]:
+        return self._release(self.params.frontier_limit or len(self._deferred))
+
+    def _rank(self, request: Request) -> int:
+        return self.params.priorities.get(request.meta.get("callback", ""), 0)
+
+    def _spill(self) -> list[Request]:
+        # Halving keeps the sort's cost spread over the pushes that refill it
+        self._deferred.sort()
+        keep = self.params.deferred_limit // 2
+        spilled, self._deferred = self._deferred[keep:], self._deferred[:keep]
+        lowered = self.params.priority_step * (self.top_rank + 1)
+        return [
+            request.replace(priority=request.priority - lowered)
+            for _, _, request in spilled
+        ]
+
+    def _release(self, room: int) -> list[Request]:
+        released: list[Request] = []
+        while self._deferred and len(released) < room:
+            released.append(heapq.heappop(self._deferred)[2])
+        return released
@@ -0,0 +1,93 @@
+from __future__ import annotations
+from typing import Any, Literal, Optional
+import logging
+import time
+
+from scrapy.http import Request
+from .best_first import BestFirstCrawlStrategy, BestFirstParams
+from toy_catalogue.session.session_manager import SessionManager
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalParams(BestFirstParams):
+    # Node name -> seconds an item captured by a previous session stays fresh.
+    # Nodes without a TTL (e.g. collections) are always revisited.
+    ttl: dict[str, float] = {}
+    # What to do with fresh URLs: drop them, or fetch them after everything else
+    fresh: Literal["skip", "deprioritize"] = "skip"
+    # Rank given to fresh URLs when deprioritizing
+    fresh_rank: int = -1
+
+
+class IncrementalCrawlStrategy(BestFirstCrawlStrategy):
+    """
+    Recrawl that only fetches URLs the parent session has not captured, or
+    captured longer ago than their node's TTL.
+
+    The parent's item index is copied into this session's index at startup,
+    so skipped items stay indexed and the next run can chain from this one.
+    """
+
+    params: IncrementalParams
+    params_model = IncrementalParams
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.skipped = 0
+        self.parent_session_id: Optional[str] = self.session.meta.parent_session_id
+        if self.parent_session_id is None:
+            logger.warning("Incremental crawl without a parent session; crawling all")
+            return
+        parent_index = (
+            SessionManager.get_session_dir(self.parent_session_id)
+            / self.session.item_index_path.name
+        )
+        if not parent_index.exists():
+            logger.warning(f"No item index for parent {self.parent_session_id}")
+            return
+        inherited = self.index.inherit(parent_index)
+        logger.info(f"Inherited {inherited} items from {self.parent_session_id}")
+
+    def is_fresh(self, url: str, node: str) -> bool:
+        ttl = self.params.ttl.get(node)
+        if ttl is None:
+            return False
+        entry = self.index.get(url)
+        return (
+            entry is not None
+            and entry.session_id != self.session.session_id
+            and time.time() - entry.fetched_at < ttl
+        )
+
+    def filter_links(self, from_node: str, to_node: str, urls: list[str]) -> list[str]:
+        urls = super().filter_links(from_node, to_node, urls)
+        if to_node not in self.params.ttl or self.params.fresh == "deprioritize":
+            return urls
+        result: list[str] = []
+        for url in urls:
+            if self.is_fresh(url, to_node):
+                self.skipped += 1
+            else:
+                result.append(url)
+        return result
+
+    def make_request(self, url: str, node: str, **kwargs: Any) -> Request:
+        # Decided here rather than in filter_links, which also passes records
+        # that never become requests
+        if self.params.fresh == "deprioritize" and self.is_fresh(url, node):
+            kwargs.setdefault(
+                "priority", self.params.fresh_rank * self.params.priority_step
+            )
+        return super().make_request(url, node, **kwargs)
+
+    def checkpoint_state(self) -> dict[str, Any]:
+        return {**super().checkpoint_state(), "skipped": self.skipped}
+
+    def restore_state(self, state: dict[str, Any]) -> None:
+        super().restore_state(state)
+        self.skipped = state.get("skipped", 0)
+
+    def close(self) -> None:
+        logger.info(f"Incremental crawl skipped {self.skipped} fresh URLs")
+        super().close()
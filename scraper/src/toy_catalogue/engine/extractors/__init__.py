@@ -5,15 +5,32 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from toy_catalogue.config.schema.external.schema import ExtractorSchema
 
-from ._base import BaseExtractor, ExtractorParam
+from ._base import BaseExtractor, ExtractorParam, QueryCache, Record
 from .css import CssParams, CssGetExtractor, CssGetAllExtractor
 from .link_extractor import LinkExtractor, LEParams
+from .sitemap import SitemapExtractor, SitemapParams
+from .shopify import ShopifyProductsExtractor, ShopifyParams
+from .pagination import PaginationExtractor, PaginationParams
+
+__all__ = [
+    "BaseExtractor",
+    "ExtractorParam",
+    "QueryCache",
+    "Record",
+    "EXTRACTOR_REGISTRY",
+    "build_extractor",
+    "get_extractor",
+    "register_extractor",
+]
 
 
 EXTRACTOR_REGISTRY: dict[str, tuple[type[ExtractorParam], type[BaseExtractor]]] = {
     "css_get": (CssParams, CssGetExtractor),
     "css_getall": (CssParams, CssGetAllExtractor),
     "link_extractor": (LEParams, LinkExtractor),
+    "sitemap": (SitemapParams, SitemapExtractor),
+    "shopify_products": (ShopifyParams, ShopifyProductsExtractor),
+    "pagination": (PaginationParams, PaginationExtractor),
 }
 
 
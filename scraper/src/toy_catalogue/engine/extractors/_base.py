@@ -1,18 +1,78 @@
+from __future__ import annotations
 from abc import ABC, abstractmethod
-from scrapy.http import Response
-from typing import Any
+from scrapy.http import Response, TextResponse
+from scrapy.utils.response import get_base_url
+from parsel import SelectorList
+from typing import Any, Callable, NamedTuple, Optional, TypeVar, cast
 from pydantic import BaseModel
 
+T = TypeVar("T")
+
 
 class ExtractorParam(BaseModel):
     ...
 
 
+class Record(NamedTuple):
+    """Structured data an extractor pulls out directly, instead of a URL to fetch."""
+
+    url: str
+    data: dict[str, Any]
+
+
+class QueryCache:
+    """
+    Per-response memo shared by every extractor of a node.
+
+    The document is parsed once (``response.selector``) and each distinct
+    XPath query is evaluated once, however many extractors ask for it.
+    Non-HTML extractors can share their own parse results through ``memo``.
+    """
+
+    response: Response
+
+    def __init__(self, response: Response) -> None:
+        self.response = response
+        self._results: dict[str, SelectorList[Any]] = {}
+        self._memo: dict[str, Any] = {}
+        self._base_url: Optional[str] = None
+
+    @property
+    def base_url(self) -> str:
+        if self._base_url is None:
+            self._base_url = get_base_url(cast(TextResponse, self.response))
+        return self._base_url
+
+    def xpath(self, query: str) -> SelectorList[Any]:
+        if query not in self._results:
+            selector = cast(TextResponse, self.response).selector
+            self._results[query] = selector.xpath(query)
+        return self._results[query]
+
+    def memo(self, key: str, compute: Callable[[], T]) -> T:
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return cast(T, self._memo[key])
+
+
 class BaseExtractor(ABC):
+    # Query parameters whose values tell apart the URLs this extractor emits
+    query_params: frozenset[str] = frozenset()
+
     @abstractmethod
     def __init__(self, params: ExtractorParam):
         ...
 
     @abstractmethod
-    def extract(self, response: Response) -> list[Any]:
+    def extract(
+        self, response: Response, cache: Optional[QueryCache] = None
+    ) -> list[Any]:
         ...
+
+    @staticmethod
+    def _query_cache(response: Response, cache: Optional[QueryCache]) -> QueryCache:
+        if not isinstance(response, TextResponse):
+            raise TypeError(f"Response {response} is not Type TextResponse")
+        if cache is None or cache.response is not response:
+            cache = QueryCache(response)
+        return cache
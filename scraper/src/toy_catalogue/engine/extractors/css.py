@@ -1,49 +1,96 @@
-from scrapy.http import Response, TextResponse
-from ._base import BaseExtractor, ExtractorParam
+from scrapy.http import Response
+from parsel import Selector, SelectorList
+from parsel.csstranslator import HTMLTranslator
+from urllib.parse import urljoin
+from ._base import BaseExtractor, ExtractorParam, QueryCache
 from itertools import product
+from typing import Any, Optional
+
+_translator = HTMLTranslator()
 
 
 class CssParams(ExtractorParam):
     selectors: list[str]
     attrs: list[str]
+    # Query each selector once and read every attr from its matches, instead of
+    # running one ``selector::attr(attr)`` query per pair
+    batched: bool = True
 
 
-class CssGetExtractor(BaseExtractor):
+class _CssExtractor(BaseExtractor):
     css_selector: list[str]
     attrs: list[str]
+    batched: bool
+    queries: list[str]
 
     def __init__(self, params: CssParams) -> None:
         self.css_selector = params.selectors
         self.attrs = params.attrs
+        self.batched = params.batched
+        # Translated once here instead of on every response
+        if self.batched:
+            self.queries = [_translator.css_to_xpath(s) for s in self.css_selector]
+        else:
+            self.queries = [
+                _translator.css_to_xpath(f"{selector}::attr({attr})")
+                for selector, attr in product(self.css_selector, self.attrs)
+            ]
 
-    def extract(self, response: Response) -> list[str]:
-        if not isinstance(response, TextResponse):
-            raise TypeError(f"Response {response} is not Type TextResponse")
-        results: list[str] = []
-        for selector, attr in product(self.css_selector, self.attrs):
-            val = response.css(f"{selector}::attr({attr})").get()
-            if val:
-                results.append(response.urljoin(val))
-        return results
+    @staticmethod
+    def _attr(element: Selector, attr: str) -> Optional[str]:
+        get = getattr(element.root, "get", None)
+        return get(attr) if get is not None else None
 
+    def _first_with_attr(self, elements: SelectorList[Any], attr: str) -> Optional[str]:
+        for element in elements:
+            value = self._attr(element, attr)
+            if value is not None:
+                return value
+        return None
 
-class CssGetAllExtractor(BaseExtractor):
-    css_selector: list[str]
-    attrs: list[str]
 
-    def __init__(self, params: CssParams) -> None:
-        self.css_selector = params.selectors
-        self.attr = params.attrs
+class CssGetExtractor(_CssExtractor):
+    def extract(
+        self, response: Response, cache: Optional[QueryCache] = None
+    ) -> list[str]:
+        cache = self._query_cache(response, cache)
+        base_url = cache.base_url
+        results: list[str] = []
+        if not self.batched:
+            for query in self.queries:
+                val = cache.xpath(query).get()
+                if val:
+                    results.append(urljoin(base_url, val))
+            return results
 
-    def extract(self, response: Response) -> list[str]:
-        if not isinstance(response, TextResponse):
-            raise TypeError(f"Response {response} is not Type TextResponse")
+        for query in self.queries:
+            elements = cache.xpath(query)
+            for attr in self.attrs:
+                val = self._first_with_attr(elements, attr)
+                if val:
+                    results.append(urljoin(base_url, val))
+        return results
 
+
+class CssGetAllExtractor(_CssExtractor):
+    def extract(
+        self, response: Response, cache: Optional[QueryCache] = None
+    ) -> list[str]:
+        cache = self._query_cache(response, cache)
+        base_url = cache.base_url
         results: list[str] = []
-        for selector, attr in product(self.css_selector, self.attr):
-            css_query = f"{selector}::attr({attr})"
-            extracted = response.css(
-                css_query
-            ).getall()  # getall to get all matches per query
-            results.extend(response.urljoin(link) for link in extracted)
+        if not self.batched:
+            for query in self.queries:
+                extracted = cache.xpath(query).getall()  # all matches per query
+                results.extend(urljoin(base_url, link) for link in extracted)
+            return results
+
+        # Batched results are in document order per selector, with each
+        # element's attrs in config order
+        for query in self.queries:
+            for element in cache.xpath(query):
+                for attr in self.attrs:
+                    val = self._attr(element, attr)
+                    if val is not None:
+                        results.append(urljoin(base_url, val))
         return results
@@ -1,7 +1,7 @@
 from scrapy.http import Response, TextResponse
-from ._base import BaseExtractor, ExtractorParam
+from ._base import BaseExtractor, ExtractorParam, QueryCache
 from scrapy.linkextractors import LinkExtractor as ScrapyLE
-from typing import Callable, Optional, Any
+from typing import Callable, Optional, Any, cast
 
 
 class LEParams(ExtractorParam):
@@ -28,7 +28,11 @@ class LinkExtractor(BaseExtractor):
         kwargs = {k: v for k, v in params.model_dump(exclude_none=True).items()}
         self.le = ScrapyLE(**kwargs)
 
-    def extract(self, response: Response) -> list[str]:
-        if not isinstance(response, TextResponse):
-            raise TypeError(f"Response {response} is not Type TextResponse")
+    def extract(
+        self, response: Response, cache: Optional[QueryCache] = None
+    ) -> list[str]:
+        # restrict_css is translated to XPath by ScrapyLE at construction, and
+        # the parsed document is shared through response.selector
+        cache = self._query_cache(response, cache)
+        response = cast(TextResponse, cache.response)
         return [link.url for link in self.le.extract_links(response)]
@@ -0,0 +1,88 @@
+from __future__ import annotations
+from typing import Optional
+
+from parsel.csstranslator import HTMLTranslator
+from pydantic import Field
+from scrapy.http import Response
+from w3lib.url import add_or_replace_parameter, url_query_parameter
+from ._base import BaseExtractor, ExtractorParam, QueryCache
+
+_translator = HTMLTranslator()
+
+
+class PaginationParams(ExtractorParam):
+    # Query parameter carrying the page number, counted from 1
+    param: str = "page"
+    # Pagination widget elements; the page count is the largest page number
+    # found in their hrefs or text
+    last_page_css: list[str] = []
+    # Elements listing the page's contents; a page without any is empty.
+    # Needed to probe when the page count cannot be read.
+    item_css: list[str] = []
+    max_pages: int = Field(default=1000, gt=0)
+
+
+class PaginationExtractor(BaseExtractor):
+    """
+    Fans a paginated listing out into all of its pages at once.
+
+    The first page reads the page count from the pagination widget and emits
+    every other page. When the count cannot be read, pages are probed by
+    doubling: each non-empty page ``p`` that is a power of two emits pages
+    ``p+1 .. 2p``, so the listing is covered in log2(N) rounds of parallel
+    requests and at most ``N`` empty pages past the end are fetched.
+    """
+
+    def __init__(self, params: PaginationParams) -> None:
+        self.param = params.param
+        self.query_params = frozenset({params.param})
+        self.max_pages = params.max_pages
+        self.last_page_queries = [
+            _translator.css_to_xpath(s) for s in params.last_page_css
+        ]
+        self.item_queries = [_translator.css_to_xpath(s) for s in params.item_css]
+
+    def extract(
+        self, response: Response, cache: Optional[QueryCache] = None
+    ) -> list[str]:
+        cache = self._query_cache(response, cache)
+        page = self.page_number(response.url)
+        if page is None:
+            return []
+
+        last = self.last_page(cache)
+        if page == 1 and last is not None:
+            return self.page_urls(response.url, 2, last)
+        # Probing: only powers of two extend the search, never past a known end
+        if not self.item_queries or page & (page - 1) or self.is_empty(cache):
+            return []
+        end = 2 * page if last is None else min(2 * page, last)
+        return self.page_urls(response.url, page + 1, end)
+
+    def page_number(self, url: str) -> Optional[int]:
+        value = url_query_parameter(url, self.param)
+        if value is None:
+            return 1
+        return int(value) if value.isdigit() else None
+
+    def page_urls(self, url: str, first: int, last: int) -> list[str]:
+        last = min(last, self.max_pages)
+        return [
+            add_or_replace_parameter(url, self.param, str(n))
+            for n in range(first, last + 1)
+        ]
+
+    def last_page(self, cache: QueryCache) -> Optional[int]:
+        pages: list[int] = []
+        for query in self.last_page_queries:
+            for element in cache.xpath(query):
+                value = url_query_parameter(element.attrib.get("href", ""), self.param)
+                if value and value.isdigit():
+                    pages.append(int(value))
+                text = "".join(element.xpath(".//text()").getall()).strip()
+                if text.isdigit():
+                    pages.append(int(text))
+        return max(pages) if pages else None
+
+    def is_empty(self, cache: QueryCache) -> bool:
+        return not any(cache.xpath(query) for query in self.item_queries)
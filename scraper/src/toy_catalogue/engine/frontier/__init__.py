@@ -0,0 +1,3 @@
+from .shared import SharedFrontierScheduler, use_shared_frontier
+
+__all__ = ["SharedFrontierScheduler", "use_shared_frontier"]
@@ -0,0 +1,161 @@
+from __future__ import annotations
+import logging
+import os
+import pickle
+import socket
+import struct
+import time
+from typing import TYPE_CHECKING, Optional, cast
+
+from scrapy import Spider
+from scrapy.core.scheduler import BaseScheduler
+from scrapy.http import Request
+from scrapy.settings import Settings
+from scrapy.utils.request import request_from_dict
+
+if TYPE_CHECKING:
+    from redis import Redis
+    from scrapy.crawler import Crawler
+    from scrapy.statscollectors import StatsCollector
+    from scrapy.utils.request import RequestFingerprinterProtocol
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEY = "toy_catalogue:frontier"
+
+
+def use_shared_frontier(settings: Settings, redis_url: str, session_id: str) -> None:
+    """Point ``settings`` at the shared frontier of ``session_id``."""
+    settings.set("SCHEDULER", f"{__name__}.SharedFrontierScheduler")
+    settings.set("FRONTIER_REDIS_URL", redis_url)
+    settings.set("FRONTIER_KEY", f"{DEFAULT_KEY}:{session_id}")
+
+
+class SharedFrontierScheduler(BaseScheduler):
+    """
+    Scheduler whose queue and duplicate filter live in Redis, so several
+    worker processes can crawl one session together.
+
+    Keys, all prefixed with ``key``:
+
+    - ``:queue`` sorted set of pickled request dicts, scored by ``-priority``;
+      members start with their enqueue time so equal priorities pop FIFO
+    - ``:fingerprints`` set of request fingerprints ever enqueued
+    - ``:busy`` hash of worker id to the time it last took a request
+
+    Scrapy only asks a scheduler for pending requests once its own engine is
+    idle, so a worker is busy from the request it takes until that question.
+    The crawl is finished once the queue is empty and no worker is busy for
+    ``idle_grace`` seconds. A busy worker refreshes its entry as it takes
+    requests, at most every tenth of ``worker_timeout``; one that hasn't for
+    ``worker_timeout`` is taken to have died.
+    """
+
+    def __init__(
+        self,
+        server: Redis,
+        key: str,
+        fingerprinter: RequestFingerprinterProtocol,
+        stats: Optional[StatsCollector] = None,
+        idle_grace: float = 5.0,
+        worker_timeout: float = 600.0,
+        worker_id: Optional[str] = None,
+    ) -> None:
+        self.server = server
+        self.key = key
+        self.queue_key = f"{key}:queue"
+        self.fingerprints_key = f"{key}:fingerprints"
+        self.busy_key = f"{key}:busy"
+        self.fingerprinter = fingerprinter
+        self.stats = stats
+        self.idle_grace = idle_grace
+        self.worker_timeout = worker_timeout
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.spider: Optional[Spider] = None
+        self._busy = False
+        # When this worker's :busy entry was last written
+        self._beat = 0.0
+        self._drained_since: Optional[float] = None
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> SharedFrontierScheduler:
+        try:
+            from redis import Redis
+        except ImportError as e:
+            raise ImportError(
+                "SharedFrontierScheduler needs the 'redis' package "
+                "(pip install toy_catalogue[frontier])"
+            ) from e
+
+        settings = crawler.settings
+        assert crawler.request_fingerprinter is not None
+        return cls(
+            Redis.from_url(settings.get("FRONTIER_REDIS_URL")),
+            settings.get("FRONTIER_KEY", DEFAULT_KEY),
+            crawler.request_fingerprinter,
+            stats=crawler.stats,
+            idle_grace=settings.getfloat("FRONTIER_IDLE_GRACE", 5.0),
+            worker_timeout=settings.getfloat("FRONTIER_WORKER_TIMEOUT", 600.0),
+        )
+
+    def open(self, spider: Spider) -> None:
+        self.spider = spider
+        logger.info(
+            f"Shared frontier {self.key} opened by {self.worker_id} "
+            f"({len(self)} requests queued)"
+        )
+
+    def close(self, reason: str) -> None:
+        self.server.hdel(self.busy_key, self.worker_id)
+
+    def __len__(self) -> int:
+        return int(self.server.zcard(self.queue_key))
+
+    def enqueue_request(self, request: Request) -> bool:
+        if not request.dont_filter:
+            fingerprint = self.fingerprinter.fingerprint(request)
+            if not self.server.sadd(self.fingerprints_key, fingerprint):
+                self._inc_stats("dupefilter/filtered")
+                return False
+        payload = pickle.dumps(request.to_dict(spider=self.spider), protocol=4)
+        member = struct.pack(">d", time.time()) + payload
+        self.server.zadd(self.queue_key, {member: -request.priority})
+        self._inc_stats("scheduler/enqueued/redis")
+        return True
+
+    def next_request(self) -> Optional[Request]:
+        popped = cast(list[tuple[bytes, float]], self.server.zpopmin(self.queue_key, 1))
+        if not popped:
+            return None
+        member, _ = popped[0]
+        now = time.time()
+        if not self._busy or now - self._beat > self.worker_timeout / 10:
+            self.server.hset(self.busy_key, self.worker_id, now)
+            self._busy = True
+            self._beat = now
+        self._inc_stats("scheduler/dequeued/redis")
+        return request_from_dict(pickle.loads(member[8:]), spider=self.spider)
+
+    def has_pending_requests(self) -> bool:
+        # Only reached when this worker's engine has nothing in progress
+        if self._busy:
+            self.server.hdel(self.busy_key, self.worker_id)
+            self._busy = False
+        if len(self) or self.busy_workers():
+            self._drained_since = None
+            return True
+        now = time.monotonic()
+        if self._drained_since is None:
+            self._drained_since = now
+        return now - self._drained_since < self.idle_grace
+
+    def busy_workers(self) -> list[str]:
+        cutoff = time.time() - self.worker_timeout
+        busy = cast(dict[bytes, bytes], self.server.hgetall(self.busy_key))
+        return [
+            worker.decode() for worker, since in busy.items() if float(since) > cutoff
+        ]
+
+    def _inc_stats(self, key: str) -> None:
+        if self.stats is not None:
+            self.stats.inc_value(key)
@@ -1,18 +1,92 @@
-from ..extractors import build_extractor
+from __future__ import annotations
+from scrapy.http import Response
+from time import perf_counter
+from ..extractors import build_extractor, QueryCache
 from ..extractors._base import BaseExtractor
 from toy_catalogue.config.schema.external.schema import GraphSchema
-from typing import TypeAlias
+from toy_catalogue.utils.url import SIGNIFICANT_QUERY_PARAMS
+from typing import TYPE_CHECKING, Any, Optional, TypeAlias
 
-TraversalGraph: TypeAlias = dict[str, dict[str, list[BaseExtractor]]]
+if TYPE_CHECKING:
+    from toy_catalogue.session.metrics import MetricsRegistry
+
+
+class NodePlan:
+    """
+    Compiled extraction plan for one traversal node.
+
+    Identical extractor configs are built once and shared by every edge that
+    uses them, and all extractors run against a single QueryCache, so a
+    response is parsed once and each distinct query is evaluated once.
+    """
+
+    name: str
+    extractors: list[BaseExtractor]
+    extractor_names: list[str]
+    edges: list[tuple[str, int]]
+
+    def __init__(self, name: str = "") -> None:
+        self.name = name
+        self.extractors = []
+        self.extractor_names = []
+        self.edges = []
+
+    def next_nodes(self) -> list[str]:
+        return list(dict.fromkeys(next_node for next_node, _ in self.edges))
+
+    def run(
+        self, response: Response, metrics: Optional[MetricsRegistry] = None
+    ) -> list[tuple[str, list[Any]]]:
+        if not self.edges:
+            return []
+        cache = QueryCache(response)
+        if metrics is None:
+            results = [e.extract(response, cache) for e in self.extractors]
+        else:
+            results = []
+            for name, extractor in zip(self.extractor_names, self.extractors):
+                start = perf_counter()
+                result = extractor.extract(response, cache)
+                metrics.timing("extract_ms", start, node=self.name, extractor=name)
+                metrics.counter("extracted", node=self.name, extractor=name).inc(
+                    len(result)
+                )
+                results.append(result)
+        return [(next_node, results[index]) for next_node, index in self.edges]
+
+    def __bool__(self) -> bool:
+        return bool(self.edges)
+
+
+TraversalGraph: TypeAlias = dict[str, NodePlan]
 
 
 def build_traversal_graph(graph_config: GraphSchema) -> TraversalGraph:
     graph: TraversalGraph = {}
     for name, details in graph_config.root.items():
-        graph[name] = {}
+        plan = graph[name] = NodePlan(name)
+        shared: dict[tuple[str, str], int] = {}
+        edges: dict[str, list[int]] = {}
         for detail in details:
             for callback in detail.callbacks:
                 for extractor in detail.extractors:
-                    new_ext = [build_extractor(extractor)]
-                    graph[name][callback] = graph[name].get(callback, []) + new_ext
+                    key = (extractor.class_, repr(extractor.params))
+                    if key not in shared:
+                        shared[key] = len(plan.extractors)
+                        plan.extractors.append(build_extractor(extractor))
+                        plan.extractor_names.append(extractor.class_)
+                    edges.setdefault(callback, []).append(shared[key])
+        # Grouped by target node in first-seen order, as edges were before
+        plan.edges = [
+            (callback, index)
+            for callback, indices in edges.items()
+            for index in indices
+        ]
     return graph
+
+
+def significant_query_params(graph: TraversalGraph) -> frozenset[str]:
+    """Query parameters kept when fingerprinting the URLs ``graph`` emits."""
+    return SIGNIFICANT_QUERY_PARAMS.union(
+        *(e.query_params for plan in graph.values() for e in plan.extractors)
+    )
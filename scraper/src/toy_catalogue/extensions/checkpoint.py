@@ -0,0 +1,170 @@
+from __future__ import annotations
+import logging
+from itertools import chain
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Optional
+
+from scrapy import Spider, signals
+from scrapy.crawler import Crawler
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Request
+from scrapy.utils.request import request_from_dict
+from twisted.internet import task
+
+from toy_catalogue.session.checkpoint import (
+    RESUMED_STATS,
+    Checkpoint,
+    PendingRequests,
+    checkpoint_path,
+    load_checkpoint,
+    pending_path,
+    write_checkpoint,
+)
+
+if TYPE_CHECKING:
+    from toy_catalogue.spiders.generic_spider import GenericSpider
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointExtension:
+    """
+    Writes ``checkpoint.pickle`` to the session's job directory every
+    ``CHECKPOINT_INTERVAL`` seconds and on close: the requests downloaded
+    but not yet parsed, the strategy's seen set and held-back requests, the
+    metrics and the item and response counts. With ``CHECKPOINT_RESUME``
+    (``run-spiders crawl --resume <session_id>``) the last checkpoint is
+    restored instead of starting from the start URLs. Off under a shared
+    frontier, whose queue lives in Redis and outlives any one worker.
+
+    A request is pending from ``request_scheduled`` until it leaves the
+    downloader; pending requests go to ``pending.sqlite`` beside the
+    checkpoint as they are scheduled, committed with each checkpoint.
+    """
+
+    def __init__(self, crawler: Crawler, interval: float, resume: bool) -> None:
+        self.crawler = crawler
+        self.interval = interval
+        self.resume = resume
+        self.spider: Optional[GenericSpider] = None
+        self.pending: Optional[PendingRequests] = None
+        self.task: Optional[task.LoopingCall] = None
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> CheckpointExtension:
+        settings = crawler.settings
+        interval = settings.getfloat("CHECKPOINT_INTERVAL", 0)
+        if interval <= 0 or settings.get("FRONTIER_REDIS_URL"):
+            raise NotConfigured
+        ext = cls(crawler, interval, settings.getbool("CHECKPOINT_RESUME"))
+        connect = crawler.signals.connect
+        connect(ext.spider_opened, signal=signals.spider_opened)
+        connect(ext.spider_closed, signal=signals.spider_closed)
+        connect(ext.request_scheduled, signal=signals.request_scheduled)
+        connect(ext.request_done, signal=signals.request_left_downloader)
+        connect(ext.request_done, signal=signals.request_dropped)
+        return ext
+
+    def spider_opened(self, spider: Spider) -> None:
+        if not hasattr(spider, "strategy"):
+            return
+        self.spider = spider  # type: ignore[assignment]
+        job_dir = spider.session_context.job_dir  # type: ignore[attr-defined]
+        self.pending = PendingRequests(pending_path(job_dir))
+        if self.resume:
+            self.restore()
+        self.task = task.LoopingCall(self.write)
+        self.task.start(self.interval, now=False)
+
+    def spider_closed(self, spider: Spider) -> None:
+        if self.task is not None and self.task.running:
+            self.task.stop()
+        if self.spider is not None:
+            self.write()
+        if self.pending is not None:
+            self.pending.close()
+            self.pending = None
+
+    def _fingerprint(self, request: Request) -> bytes:
+        return self.crawler.request_fingerprinter.fingerprint(request)
+
+    def request_scheduled(self, request: Request, spider: Spider) -> None:
+        if self.pending is not None:
+            self.pending.add(self._fingerprint(request), request.to_dict(spider=spider))
+
+    def request_done(self, request: Request, spider: Spider) -> None:
+        if self.pending is not None:
+            self.pending.remove(self._fingerprint(request))
+
+    def held_requests(self) -> list[Request]:
+        """Requests downloaded but not parsed yet; the engine and scraper hold them."""
+        engine = self.crawler.engine
+        if engine is None:
+            return []
+        held: list[Request] = []
+        slot = getattr(engine, "_slot", None)
+        if slot is not None:
+            held += slot.inprogress
+        if engine.scraper.slot is not None:
+            held += engine.scraper.slot.active
+        unique = {self._fingerprint(request): request for request in held}
+        return list(unique.values())
+
+    def write(self) -> None:
+        spider, pending = self.spider, self.pending
+        if spider is None or pending is None:
+            return
+        start = perf_counter()
+        stats = self.crawler.stats.get_stats() if self.crawler.stats else {}
+        checkpoint = Checkpoint(
+            created_at=datetime.now(timezone.utc),
+            requests=[r.to_dict(spider=spider) for r in self.held_requests()],
+            strategy=spider.strategy.checkpoint_state(),
+            spider=dict(spider.check_point_data),
+            stats={key: stats[key] for key in RESUMED_STATS if key in stats},
+            metrics=spider.session_context.metrics,
+        )
+        session = spider.session_context
+        try:
+            pending.commit()
+            size = write_checkpoint(checkpoint_path(session.job_dir), checkpoint)
+        except Exception:
+            logger.exception("Failed to write checkpoint")
+            return
+        session.metrics.timing("checkpoint_ms", start)
+        logger.info(
+            f"Checkpointed {len(pending) + len(checkpoint.requests)} pending "
+            f"requests ({size} bytes)"
+        )
+
+    def restore(self) -> None:
+        spider, pending = self.spider, self.pending
+        assert spider is not None and pending is not None
+        assert self.crawler.engine is not None
+        session = spider.session_context
+        checkpoint = load_checkpoint(checkpoint_path(session.job_dir))
+        if checkpoint is None:
+            logger.warning(f"No checkpoint for {session.session_id}; starting over")
+            return
+        spider.strategy.restore_state(checkpoint.strategy)
+        spider.check_point_data.update(checkpoint.spider)
+        session.metrics.update(checkpoint.metrics)
+        if self.crawler.stats is not None:
+            for key, value in checkpoint.stats.items():
+                self.crawler.stats.inc_value(key, value)
+        spider.resumed = True
+        requests = 0
+        # Rescheduling adds each one back under the same fingerprint
+        for data in chain(checkpoint.requests, pending.committed()):
+            self.crawler.engine.crawl(request_from_dict(data, spider=spider))
+            requests += 1
+        details: dict[str, Any] = {
+            "checkpoint_at": checkpoint.created_at.isoformat(),
+            "requests": requests,
+        }
+        session.record_event("checkpoint_restored", "checkpoint", details)
+        logger.info(
+            f"Resumed from checkpoint of {details['checkpoint_at']} "
+            f"with {details['requests']} pending requests"
+        )
@@ -0,0 +1,271 @@
+from __future__ import annotations
+import logging
+import time
+from typing import TYPE_CHECKING, Optional
+
+from scrapy import Request, Spider, signals
+from scrapy.core.downloader import Slot
+from scrapy.crawler import Crawler
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Response
+from twisted.internet import task
+
+from toy_catalogue.session.session_manager import SessionManager
+
+if TYPE_CHECKING:
+    from toy_catalogue.session.session_manager import SessionContext
+
+logger = logging.getLogger(__name__)
+
+# Statuses that mean the site wants us to slow down, backed off at once
+BACKOFF_CODES = frozenset({429, 503})
+
+
+class _SlotWindow:
+    __slots__ = ("limit", "responses", "errors", "latency", "baseline", "cut_at")
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.responses = 0
+        self.errors = 0
+        self.latency = 0.0
+        # EWMA of window mean latency while the slot was healthy
+        self.baseline: Optional[float] = None
+        self.cut_at = float("-inf")
+
+    def reset(self) -> None:
+        self.responses = self.errors = 0
+        self.latency = 0.0
+
+
+class AimdController:
+    """
+    Additive-increase, multiplicative-decrease concurrency limit per slot.
+
+    Every window a slot that used its whole limit, stayed under
+    ``error_rate`` server errors and within ``latency_tolerance`` times its
+    usual latency gets one more concurrent request. A 429 or 503 cuts the
+    limit by ``backoff`` at once, as do errors or latency above those bounds
+    at the end of a window; after a cut, further cuts wait ``interval``
+    seconds, so a burst of in-flight failures counts once.
+    """
+
+    def __init__(
+        self,
+        start: int = 1,
+        minimum: int = 1,
+        maximum: int = 16,
+        backoff: float = 0.5,
+        latency_tolerance: float = 1.5,
+        error_rate: float = 0.05,
+        interval: float = 5.0,
+        learned: Optional[dict[str, int]] = None,
+    ) -> None:
+        self.start = start
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.error_rate = error_rate
+        self.interval = interval
+        self.learned = learned or {}
+        self.slots: dict[str, _SlotWindow] = {}
+
+    def _slot(self, key: str) -> _SlotWindow:
+        window = self.slots.get(key)
+        if window is None:
+            start = min(
+                max(self.learned.get(key, self.start), self.minimum), self.maximum
+            )
+            window = self.slots[key] = _SlotWindow(start)
+        return window
+
+    def limit(self, key: str) -> int:
+        return self._slot(key).limit
+
+    def limits(self) -> dict[str, int]:
+        return {key: window.limit for key, window in self.slots.items()}
+
+    def observe(
+        self, key: str, status: int, latency: Optional[float], now: float
+    ) -> bool:
+        """Count a response; True when it cut the limit."""
+        window = self._slot(key)
+        window.responses += 1
+        if latency is not None:
+            window.latency += latency
+        if status >= 500 or status in BACKOFF_CODES:
+            window.errors += 1
+        return status in BACKOFF_CODES and self._cut(window, now)
+
+    def tick(self, key: str, busy: bool, now: float) -> int:
+        """Close ``key``'s window: +1 for a limit that held, -1 for a cut, else 0."""
+        window = self._slot(key)
+        if not window.responses:
+            return 0
+        mean = window.latency / window.responses
+        congested = window.errors > self.error_rate * window.responses or (
+            window.baseline is not None
+            and mean > window.baseline * self.latency_tolerance
+        )
+        change = 0
+        if congested:
+            change = -1 if self._cut(window, now) else 0
+        else:
+            window.baseline = (
+                mean if window.baseline is None else 0.8 * window.baseline + 0.2 * mean
+            )
+            if busy and window.limit < self.maximum:
+                window.limit += 1
+                change = 1
+        window.reset()
+        return change
+
+    def _cut(self, window: _SlotWindow, now: float) -> bool:
+        if now - window.cut_at < self.interval or window.limit <= self.minimum:
+            return False
+        window.limit = max(self.minimum, int(window.limit * self.backoff))
+        window.cut_at = now
+        return True
+
+
+class AdaptiveConcurrencyExtension:
+    """
+    Sets each download slot's concurrency with an ``AimdController`` instead
+    of a fixed ``CONCURRENT_REQUESTS_PER_DOMAIN``. The global
+    ``CONCURRENT_REQUESTS`` cap is raised to the sum of the slots' limits so
+    it doesn't override them. The limit alone sets the pace: governed slots
+    run without a download delay and AutoThrottle is told not to adjust
+    one, or a slot would never fill its limit and the limit would climb
+    unchecked. Limits are saved in the session meta on close and a site's
+    next crawl starts from them. Download errors without a response are not
+    seen; the retry middleware covers those.
+    """
+
+    def __init__(
+        self, crawler: Crawler, controller: AimdController, interval: float
+    ) -> None:
+        self.crawler = crawler
+        self.controller = controller
+        self.interval = interval
+        self.total = crawler.settings.getint("CONCURRENT_REQUESTS")
+        self.session: Optional[SessionContext] = None
+        self.task: Optional[task.LoopingCall] = None
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> AdaptiveConcurrencyExtension:
+        settings = crawler.settings
+        if not settings.getbool("ADAPTIVE_CONCURRENCY_ENABLED"):
+            raise NotConfigured
+        interval = settings.getfloat("ADAPTIVE_CONCURRENCY_INTERVAL", 5.0)
+        controller = AimdController(
+            start=settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN", 1),
+            minimum=settings.getint("ADAPTIVE_CONCURRENCY_MIN", 1),
+            maximum=settings.getint("ADAPTIVE_CONCURRENCY_MAX", 16),
+            backoff=settings.getfloat("ADAPTIVE_CONCURRENCY_BACKOFF", 0.5),
+            latency_tolerance=settings.getfloat(
+                "ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE", 1.5
+            ),
+            error_rate=settings.getfloat("ADAPTIVE_CONCURRENCY_ERROR_RATE", 0.05),
+            interval=interval,
+        )
+        ext = cls(crawler, controller, interval)
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(
+            ext.request_reached_downloader, signal=signals.request_reached_downloader
+        )
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        return ext
+
+    def spider_opened(self, spider: Spider) -> None:
+        self.session = getattr(spider, "session_context", None)
+        if self.session is not None:
+            learned = SessionManager.previous_concurrency_limits(self.session.meta.site)
+            if learned:
+                self.controller.learned = learned
+                logger.info(f"Starting from learned concurrency limits {learned}")
+        self.task = task.LoopingCall(self.tick)
+        self.task.start(self.interval, now=False)
+
+    def spider_closed(self, spider: Spider) -> None:
+        if self.task is not None and self.task.running:
+            self.task.stop()
+        limits = self.controller.limits()
+        if self.session is None or not limits:
+            return
+        self.session.record_event("concurrency_limits", "adaptive_concurrency", limits)
+        try:
+            SessionManager.record_concurrency_limits(self.session.session_id, limits)
+        except OSError:
+            logger.exception("Failed to save concurrency limits")
+
+    def _downloader_slot(
+        self, request: Request
+    ) -> tuple[Optional[str], Optional[Slot]]:
+        key = request.meta.get("download_slot")
+        engine = self.crawler.engine
+        if key is None or engine is None:
+            return None, None
+        return key, engine.downloader.slots.get(key)
+
+    def request_reached_downloader(self, request: Request, spider: Spider) -> None:
+        key, slot = self._downloader_slot(request)
+        request.meta["autothrottle_dont_adjust_delay"] = True
+        if key is not None and slot is not None:
+            # New slots, and those garbage-collected while idle, come back at
+            # the default concurrency and delay
+            self._apply(key, slot)
+
+    def response_received(
+        self, response: Response, request: Request, spider: Spider
+    ) -> None:
+        key, slot = self._downloader_slot(request)
+        if key is None:
+            return
+        latency = request.meta.get("download_latency")
+        if self.controller.observe(key, response.status, latency, time.monotonic()):
+            logger.info(
+                f"HTTP {response.status} from {key}: concurrency cut to "
+                f"{self.controller.limit(key)}"
+            )
+            self._count("concurrency_decreases", key)
+            if slot is not None:
+                self._apply(key, slot)
+
+    def tick(self) -> None:
+        engine = self.crawler.engine
+        if engine is None:
+            return
+        now = time.monotonic()
+        for key, slot in list(engine.downloader.slots.items()):
+            # Queued requests alone may just be waiting out a delay
+            busy = len(slot.transferring) >= slot.concurrency
+            change = self.controller.tick(key, busy, now)
+            if change > 0:
+                self._count("concurrency_increases", key)
+            elif change < 0:
+                logger.info(
+                    f"{key} congested: concurrency cut to {self.controller.limit(key)}"
+                )
+                self._count("concurrency_decreases", key)
+            self._apply(key, slot)
+
+    def _apply(self, key: str, slot: Slot) -> None:
+        slot.delay = 0.0
+        limit = self.controller.limit(key)
+        if slot.concurrency != limit:
+            slot.concurrency = limit
+            self._raise_total()
+            if self.session is not None:
+                self.session.metrics.gauge("slot_concurrency", slot=key).set(limit)
+
+    def _raise_total(self) -> None:
+        if self.crawler.engine is not None:
+            self.crawler.engine.downloader.total_concurrency = max(
+                self.total, sum(self.controller.limits().values())
+            )
+
+    def _count(self, name: str, key: str) -> None:
+        if self.session is not None:
+            self.session.metrics.counter(name, slot=key).inc()
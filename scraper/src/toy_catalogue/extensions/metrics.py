@@ -0,0 +1,83 @@
+from __future__ import annotations
+import json
+import logging
+from typing import TYPE_CHECKING, Optional
+
+from scrapy import Spider, signals
+from scrapy.crawler import Crawler
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+if TYPE_CHECKING:
+    from toy_catalogue.session.session_manager import SessionContext
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsSnapshotExtension:
+    """
+    Writes the session's metrics to ``metrics.json`` in the session directory
+    every ``METRICS_SNAPSHOT_INTERVAL`` seconds and once more on close, with
+    Scrapy's own stats alongside. On close it also writes ``summary.json``:
+    totals plus count/mean/p50/p95/p99 of every histogram, such as the
+    per-stage ``stage_ms`` and per-extractor ``extract_ms`` timings.
+    """
+
+    def __init__(self, crawler: Crawler, interval: float) -> None:
+        self.crawler = crawler
+        self.interval = interval
+        self.session: Optional[SessionContext] = None
+        self.task: Optional[task.LoopingCall] = None
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> MetricsSnapshotExtension:
+        interval = crawler.settings.getfloat("METRICS_SNAPSHOT_INTERVAL", 30.0)
+        if interval <= 0:
+            raise NotConfigured
+        ext = cls(crawler, interval)
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider: Spider) -> None:
+        self.session = getattr(spider, "session_context", None)
+        if self.session is None:
+            return
+        self.task = task.LoopingCall(self.write)
+        self.task.start(self.interval, now=False)
+
+    def spider_closed(self, spider: Spider, reason: str) -> None:
+        if self.task is not None and self.task.running:
+            self.task.stop()
+        self.write()
+        self.write_summary(reason)
+
+    def write(self) -> None:
+        if self.session is None:
+            return
+        stats = self.crawler.stats.get_stats() if self.crawler.stats else {}
+        try:
+            self.session.metrics.write_snapshot(
+                self.session.metrics_path, {"scrapy_stats": stats}
+            )
+        except OSError:
+            logger.exception("Failed to write metrics snapshot")
+
+    def write_summary(self, reason: str) -> None:
+        if self.session is None:
+            return
+        stats = self.crawler.stats.get_stats() if self.crawler.stats else {}
+        summary = {
+            "session_id": self.session.session_id,
+            "site": self.session.meta.site,
+            "finish_reason": reason,
+            "items": stats.get("item_scraped_count", 0),
+            "responses": stats.get("response_received_count", 0),
+            "metrics": self.session.metrics.summary(),
+        }
+        try:
+            self.session.summary_path.write_text(
+                json.dumps(summary, indent=2, default=str), encoding="utf-8"
+            )
+        except OSError:
+            logger.exception("Failed to write session summary")
@@ -0,0 +1,48 @@
+from __future__ import annotations
+import logging
+
+from scrapy import Spider, signals
+from scrapy.crawler import Crawler
+from scrapy.exceptions import NotConfigured
+
+from toy_catalogue.session.profiler import SamplingProfiler
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilerExtension:
+    """
+    Samples the crawl's stacks while ``PROFILE_ENABLED`` (``run-spiders
+    --profile``) and writes them next to ``events.jsonl`` on close:
+    ``profile.folded`` for flamegraph.pl / inferno and
+    ``profile.speedscope.json`` for https://www.speedscope.app.
+    """
+
+    def __init__(self, profiler: SamplingProfiler) -> None:
+        self.profiler = profiler
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> ProfilerExtension:
+        if not crawler.settings.getbool("PROFILE_ENABLED"):
+            raise NotConfigured
+        if not SamplingProfiler.available():
+            logger.warning("Profiling needs SIGPROF, which this platform lacks")
+            raise NotConfigured
+        ext = cls(SamplingProfiler(crawler.settings.getfloat("PROFILE_INTERVAL", 0.01)))
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider: Spider) -> None:
+        self.profiler.start()
+
+    def spider_closed(self, spider: Spider) -> None:
+        self.profiler.stop()
+        session = getattr(spider, "session_context", None)
+        if session is None:
+            return
+        paths = self.profiler.write(session.output_dir)
+        logger.info(
+            f"Wrote {self.profiler.samples} profile samples to "
+            f"{', '.join(str(p) for p in paths)}"
+        )
@@ -0,0 +1,236 @@
+from __future__ import annotations
+import logging
+import re
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Iterator, Mapping, Optional
+
+from scrapy import Spider, signals
+from scrapy.crawler import Crawler
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.reactor import listen_tcp
+from twisted.web import resource, server
+
+from toy_catalogue.session.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+if TYPE_CHECKING:
+    from twisted.internet.tcp import Port
+    from twisted.web.server import Request
+
+    from toy_catalogue.session.session_manager import SessionContext
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "toy_catalogue"
+CONTENT_TYPE = b"text/plain; version=0.0.4; charset=utf-8"
+# Registry counters and crawler stats that count as errors in errors_per_second
+ERROR_COUNTERS = ("item_errors", "process_errors")
+ERROR_STATS = ("downloader/exception_count", "spider_exceptions/count")
+
+
+def metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", f"{PREFIX}_{name}")
+
+
+def _labels(labels: Mapping[str, Any]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for k, v in sorted(labels.items())
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus(
+    registry: MetricsRegistry,
+    gauges: Mapping[str, float] = {},
+    stats: Mapping[str, Any] = {},
+) -> str:
+    """
+    Prometheus text exposition of ``registry`` plus live ``gauges`` and the
+    numeric crawler ``stats`` (as ``scrapy_stat{stat="..."}``).
+    """
+    families: dict[str, tuple[str, list[str]]] = {}
+
+    def add(name: str, kind: str, line: str) -> None:
+        families.setdefault(name, (kind, []))[1].append(line)
+
+    for name, labels, metric in sorted(
+        registry.items(), key=lambda entry: (entry[0], entry[1])
+    ):
+        base = metric_name(name)
+        if isinstance(metric, Counter):
+            total = f"{base}_total"
+            add(total, "counter", f"{total}{_labels(dict(labels))} {metric.value}")
+        elif isinstance(metric, Gauge):
+            add(base, "gauge", f"{base}{_labels(dict(labels))} {_value(metric.value)}")
+        elif isinstance(metric, Histogram):
+            for line in _histogram_lines(base, dict(labels), metric):
+                add(base, "histogram", line)
+    for name, value in gauges.items():
+        add(metric_name(name), "gauge", f"{metric_name(name)} {_value(value)}")
+    stat = metric_name("scrapy_stat")
+    for key, value in sorted(stats.items()):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            add(stat, "gauge", f"{stat}{_labels({'stat': key})} {_value(value)}")
+
+    out: list[str] = []
+    for name, (kind, lines) in sorted(families.items()):
+        out.append(f"# TYPE {name} {kind}")
+        out.extend(lines)
+    return "\n".join(out) + "\n"
+
+
+def _histogram_lines(
+    name: str, labels: dict[str, str], histogram: Histogram
+) -> Iterator[str]:
+    cumulative = 0
+    bounds = [*map(_value, histogram.bounds), "+Inf"]
+    for bound, count in zip(bounds, histogram.counts):
+        cumulative += count
+        yield f"{name}_bucket{_labels({**labels, 'le': bound})} {cumulative}"
+    yield f"{name}_sum{_labels(labels)} {_value(histogram.sum)}"
+    yield f"{name}_count{_labels(labels)} {histogram.count}"
+
+
+class MetricsResource(resource.Resource):
+    isLeaf = True
+
+    def __init__(self, extension: PrometheusExtension) -> None:
+        super().__init__()
+        self.extension = extension
+
+    def render_GET(self, request: Request) -> bytes:
+        request.setHeader(b"Content-Type", CONTENT_TYPE)
+        return self.extension.render().encode()
+
+
+class PrometheusExtension:
+    """
+    Serves the session's metrics in Prometheus text format on
+    ``http://METRICS_HTTP_HOST:<port>/metrics``, on the first free port of the
+    ``METRICS_HTTP_PORT`` range so concurrent crawls each get their own.
+    Besides the registry it reports frontier depth, in-flight requests,
+    pipeline backlog and proxy pool size live from the engine, plus
+    ``pages_per_second{node}`` and ``errors_per_second`` averaged over the
+    ``METRICS_HTTP_RATE_WINDOW`` seconds before each scrape, or since the
+    last scrape if that was longer ago. The rates exist only in the scrape;
+    the session's registry, and so its snapshots, never hold them.
+    """
+
+    def __init__(
+        self, crawler: Crawler, host: str, portrange: list[int], window: float
+    ) -> None:
+        self.crawler = crawler
+        self.host = host
+        self.portrange = portrange
+        self.window = window
+        self.session: Optional[SessionContext] = None
+        self.port: Optional[Port] = None
+        # (monotonic time, counter totals) taken at scrapes within the window
+        self._samples: deque[tuple[float, dict[tuple[str, ...], float]]] = deque()
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> PrometheusExtension:
+        settings = crawler.settings
+        if not settings.getbool("METRICS_HTTP_ENABLED"):
+            raise NotConfigured
+        ext = cls(
+            crawler,
+            settings.get("METRICS_HTTP_HOST", "127.0.0.1"),
+            [int(p) for p in settings.getlist("METRICS_HTTP_PORT", [9410, 9460])],
+            settings.getfloat("METRICS_HTTP_RATE_WINDOW", 10.0),
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider: Spider) -> None:
+        self.session = getattr(spider, "session_context", None)
+        if self.session is None:
+            return
+        root = resource.Resource()
+        root.putChild(b"metrics", MetricsResource(self))  # type: ignore[arg-type]
+        site = server.Site(root)
+        self.port = listen_tcp(self.portrange, self.host, site)  # type: ignore[arg-type]
+        address = self.port.getHost()
+        url = f"http://{address.host}:{address.port}/metrics"
+        logger.info(f"Metrics endpoint listening on {url}")
+        self.session.record_event("metrics_endpoint", "prometheus", {"url": url})
+        # Every counter starts at zero with the crawl
+        self._samples.append((time.monotonic(), {}))
+
+    def spider_closed(self, spider: Spider) -> None:
+        if self.port is not None:
+            self.port.stopListening()
+            self.port = None
+
+    def stats(self) -> dict[str, Any]:
+        return self.crawler.stats.get_stats() if self.crawler.stats else {}
+
+    def _totals(self) -> dict[tuple[str, ...], float]:
+        assert self.session is not None
+        stats = self.stats()
+        totals: dict[tuple[str, ...], float] = {
+            ("errors",): sum(stats.get(key, 0) for key in ERROR_STATS)
+        }
+        for name, labels, metric in self.session.metrics.items():
+            if not isinstance(metric, Counter):
+                continue
+            if name == "responses":
+                key = ("responses", dict(labels).get("node", ""))
+                totals[key] = totals.get(key, 0) + metric.value
+            elif name in ERROR_COUNTERS:
+                totals[("errors",)] += metric.value
+        return totals
+
+    def add_rates(self, registry: MetricsRegistry, now: float) -> None:
+        """Set the per-second rate gauges on ``registry``, as of a scrape at ``now``."""
+        totals = self._totals()
+        # The baseline is the newest sample at least a window old, if any
+        while len(self._samples) > 1 and now - self._samples[1][0] >= self.window:
+            self._samples.popleft()
+        then, previous = self._samples[0] if self._samples else (now, {})
+        self._samples.append((now, totals))
+        elapsed = now - then
+        for key, value in totals.items():
+            rate = (value - previous.get(key, 0)) / elapsed if elapsed > 0 else 0.0
+            if key[0] == "responses":
+                registry.gauge("pages_per_second", node=key[1]).set(rate)
+            else:
+                registry.gauge("errors_per_second").set(rate)
+
+    def live_gauges(self) -> dict[str, float]:
+        engine = self.crawler.engine
+        gauges: dict[str, float] = {}
+        if engine is None:
+            return gauges
+        try:
+            gauges["frontier_depth"] = len(engine.scheduler)  # type: ignore[arg-type]
+        except TypeError:
+            pass
+        gauges["inflight_requests"] = len(engine.downloader.active)
+        if engine.scraper.slot is not None:
+            gauges["pipeline_backlog"] = engine.scraper.slot.itemproc_size
+        pools = [
+            mw.pool_size
+            for mw in engine.downloader.middleware.middlewares
+            if hasattr(mw, "pool_size")
+        ]
+        if pools:
+            gauges["proxy_pool_size"] = sum(pools)
+        return gauges
+
+    def render(self) -> str:
+        if self.session is None:
+            return ""
+        # Shares the session's metrics, so the rates stay out of its registry
+        metrics = MetricsRegistry()
+        metrics.update(self.session.metrics)
+        self.add_rates(metrics, time.monotonic())
+        return render_prometheus(metrics, self.live_gauges(), self.stats())
@@ -0,0 +1,106 @@
+from __future__ import annotations
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Optional
+
+from scrapy import Spider, signals
+from scrapy.crawler import Crawler
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Request, Response
+from twisted.internet import task
+
+from toy_catalogue.session.tracing import Phase, Tracer
+
+if TYPE_CHECKING:
+    from scrapy.utils.request import RequestFingerprinterProtocol
+
+logger = logging.getLogger(__name__)
+
+
+class TracingExtension:
+    """
+    Opt-in (``TRACE_ENABLED``) per-request tracing. Marks each request as it
+    is scheduled, starts and finishes downloading and has its items scraped;
+    the spider and proxy middleware add the parse and proxy marks. Timelines
+    are keyed by request fingerprint, one per attempt. Reactor
+    stalls longer than ``TRACE_STALL_THRESHOLD`` seconds are recorded too.
+    The trace is written to ``trace.json`` in the session directory on close.
+    """
+
+    def __init__(
+        self,
+        tracer: Tracer,
+        fingerprinter: RequestFingerprinterProtocol,
+        stall_interval: float,
+        stall_threshold: float,
+    ) -> None:
+        self.tracer = tracer
+        self.fingerprinter = fingerprinter
+        self.stall_interval = stall_interval
+        self.stall_threshold_ns = int(stall_threshold * 1e9)
+        self.stall_task: Optional[task.LoopingCall] = None
+        self._last_tick = 0
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> TracingExtension:
+        settings = crawler.settings
+        if not settings.getbool("TRACE_ENABLED"):
+            raise NotConfigured
+        ext = cls(
+            Tracer(max_bytes=settings.getint("TRACE_MAX_BYTES", 64 * 1024 * 1024)),
+            crawler.request_fingerprinter,  # type: ignore[arg-type]
+            stall_interval=settings.getfloat("TRACE_STALL_INTERVAL", 0.05),
+            stall_threshold=settings.getfloat("TRACE_STALL_THRESHOLD", 0.1),
+        )
+        connect = crawler.signals.connect
+        connect(ext.spider_opened, signal=signals.spider_opened)
+        connect(ext.spider_closed, signal=signals.spider_closed)
+        connect(ext.request_scheduled, signal=signals.request_scheduled)
+        connect(ext.request_reached, signal=signals.request_reached_downloader)
+        connect(ext.response_received, signal=signals.response_received)
+        connect(ext.item_scraped, signal=signals.item_scraped)
+        return ext
+
+    def spider_opened(self, spider: Spider) -> None:
+        Tracer.current = self.tracer
+        self._last_tick = time.monotonic_ns()
+        self.stall_task = task.LoopingCall(self.check_reactor)
+        self.stall_task.start(self.stall_interval, now=False)
+
+    def spider_closed(self, spider: Spider) -> None:
+        if self.stall_task is not None and self.stall_task.running:
+            self.stall_task.stop()
+        if Tracer.current is self.tracer:
+            Tracer.current = None
+        session = getattr(spider, "session_context", None)
+        if session is None:
+            return
+        path = session.output_dir / "trace.json"
+        self.tracer.export(path)
+        logger.info(
+            f"Wrote {len(self.tracer)} trace marks to {path} "
+            f"({self.tracer.dropped} dropped)"
+        )
+
+    def check_reactor(self) -> None:
+        now = time.monotonic_ns()
+        lag = now - self._last_tick - int(self.stall_interval * 1e9)
+        self._last_tick = now
+        if lag > self.stall_threshold_ns:
+            self.tracer.stall(lag)
+
+    def request_scheduled(self, request: Request, spider: Spider) -> None:
+        self.tracer.schedule(request, self.fingerprinter.fingerprint(request))
+
+    def request_reached(self, request: Request, spider: Spider) -> None:
+        self.tracer.mark(request, Phase.DOWNLOAD_START)
+
+    def response_received(
+        self, response: Response, request: Request, spider: Spider
+    ) -> None:
+        self.tracer.mark(request, Phase.DOWNLOADED)
+
+    def item_scraped(self, item: Any, response: Response, spider: Spider) -> None:
+        # On the page the item came from; a record's own URL was never requested
+        if response.request is not None:
+            self.tracer.mark(response.request, Phase.SAVED)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+import json
+import logging
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from scrapy import Spider, signals
+from scrapy.crawler import Crawler
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.defer import deferred_from_coro
+from scrapy.utils.engine import format_engine_status
+
+logger = logging.getLogger(__name__)
+
+# Crawler stats that count as progress
+PROGRESS_STATS = ("response_received_count", "item_scraped_count")
+
+
+class StallDetector:
+    """
+    Reports a stall once fewer than ``min_progress`` responses and items have
+    arrived in ``timeout`` seconds; re-arms as soon as progress resumes.
+    """
+
+    def __init__(self, timeout: float, min_progress: int = 1) -> None:
+        self.timeout = timeout
+        self.min_progress = min_progress
+        self.window_start: Optional[float] = None
+        self.window_count = 0
+        self.stalled = False
+
+    def update(self, count: int, now: float) -> bool:
+        """Feed the progress count; True only on the check that detects a stall."""
+        if self.window_start is None or count - self.window_count >= self.min_progress:
+            self.window_start, self.window_count = now, count
+            self.stalled = False
+            return False
+        if self.stalled or now - self.window_start < self.timeout:
+            return False
+        self.stalled = True
+        return True
+
+
+class WatchdogExtension:
+    """
+    Watches responses and items from a separate thread, so it still fires when
+    something blocks the reactor. After ``WATCHDOG_TIMEOUT`` seconds with less
+    than ``WATCHDOG_MIN_PROGRESS`` of them it writes ``stall-<n>.txt`` to the
+    session directory: every thread's stack, the engine's scheduler, downloader
+    and scraper state, and the proxy middleware's pool. With ``WATCHDOG_STOP``
+    it then closes the spider as ``stalled``, which keeps the ``JOBDIR``
+    frontier for a later resume.
+    """
+
+    def __init__(
+        self,
+        crawler: Crawler,
+        detector: StallDetector,
+        interval: float,
+        stop: bool,
+    ) -> None:
+        self.crawler = crawler
+        self.detector = detector
+        self.interval = interval
+        self.stop = stop
+        self.spider: Optional[Spider] = None
+        self.stalls = 0
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> WatchdogExtension:
+        settings = crawler.settings
+        timeout = settings.getfloat("WATCHDOG_TIMEOUT", 0)
+        if timeout <= 0:
+            raise NotConfigured
+        ext = cls(
+            crawler,
+            StallDetector(timeout, settings.getint("WATCHDOG_MIN_PROGRESS", 1)),
+            interval=settings.getfloat("WATCHDOG_INTERVAL", min(10.0, timeout / 2)),
+            stop=settings.getbool("WATCHDOG_STOP"),
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider: Spider) -> None:
+        self.spider = spider
+        self._thread = threading.Thread(
+            target=self._run, name="crawl-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def spider_closed(self, spider: Spider) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+
+    def progress(self) -> int:
+        stats = self.crawler.stats.get_stats() if self.crawler.stats else {}
+        return sum(int(stats.get(key, 0)) for key in PROGRESS_STATS)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            if self.detector.update(self.progress(), time.monotonic()):
+                self.on_stall()
+
+    def on_stall(self) -> None:
+        self.stalls += 1
+        stalled_for = time.monotonic() - (self.detector.window_start or 0)
+        logger.warning(f"No crawl progress for {stalled_for:.0f}s")
+        session = getattr(self.spider, "session_context", None)
+        if session is not None:
+            path = session.output_dir / f"stall-{self.stalls}.txt"
+            try:
+                self.write_report(path, stalled_for)
+                logger.warning(f"Wrote stall report to {path}")
+            except Exception:
+                logger.exception("Failed to write stall report")
+            session.record_event(
+                "stall_detected",
+                "watchdog",
+                {"seconds": round(stalled_for), "report": path.name},
+            )
+        if self.stop:
+            from twisted.internet import reactor
+
+            reactor.callFromThread(self._close)  # type: ignore[attr-defined]
+
+    def _close(self) -> None:
+        if self.crawler.engine is not None:
+            deferred_from_coro(self.crawler.engine.close_spider_async(reason="stalled"))
+
+    def report(self, stalled_for: float) -> str:
+        """Thread stacks, engine status and proxy pool state, as text."""
+        now = datetime.now(timezone.utc).isoformat()
+        parts = [f"Stall report {now}: no progress for {stalled_for:.0f}s\n"]
+        parts.append(f"Progress ({' + '.join(PROGRESS_STATS)}): {self.progress()}\n")
+        engine = self.crawler.engine
+        if engine is not None:
+            # Read from this thread without locking: good enough to diagnose
+            parts.append(format_engine_status(engine))
+            for mw in engine.downloader.middleware.middlewares:
+                if hasattr(mw, "pool_state"):
+                    state = json.dumps(mw.pool_state(), indent=2, default=str)
+                    parts.append(f"{type(mw).__name__} pool\n{state}\n")
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            parts.append(f"\nThread {names.get(ident, ident)}:\n")
+            parts.append("".join(traceback.format_stack(frame)))
+        return "\n".join(parts)
+
+    def write_report(self, path: Path, stalled_for: float) -> None:
+        path.write_text(self.report(stalled_for), encoding="utf-8")
@@ -3,19 +3,213 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 import os
+import json
 import time
 import random
 import logging
-import requests
 
-from typing import Any, Dict, Optional, List, Union, Generator
-from urllib.parse import urlparse
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Dict,
+    Iterable,
+    Optional,
+    List,
+    Protocol,
+    Union,
+    Generator,
+)
+from urllib.parse import urlencode, urlparse
 
 from scrapy import signals
 from scrapy.http import Request, Response
 from scrapy.downloadermiddlewares.offsite import OffsiteMiddleware
 from scrapy.crawler import Crawler
 from scrapy.spiders import Spider
+from scrapy.statscollectors import StatsCollector
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet.defer import (
+    Deferred,
+    DeferredList,
+    DeferredSemaphore,
+    maybeDeferred,
+    succeed,
+)
+from twisted.internet.base import DelayedCall
+from twisted.internet.task import deferLater
+from twisted.python.failure import Failure
+from twisted.web.client import Agent, HTTPConnectionPool, readBody
+
+from toy_catalogue.session.tracing import Phase, mark as trace
+
+
+class ProxyClient(Protocol):
+    """What JhaoProxyMiddleware needs from the proxy pool API."""
+
+    def fetch_batch(self, limit: int = 50) -> Union[List[str], "Deferred[List[str]]"]:
+        ...
+
+    def ban(self, ip_port: str) -> None:
+        ...
+
+
+class _ProxyHealth:
+    __slots__ = ("successes", "failures", "latency", "strikes", "cooldown_until")
+
+    def __init__(self) -> None:
+        self.successes = 0
+        self.failures = 0
+        # EWMA of download latency in seconds; None until first measured
+        self.latency: Optional[float] = None
+        # Failures in a row; each one doubles the cooldown
+        self.strikes = 0
+        self.cooldown_until = 0.0
+
+    @property
+    def success_rate(self) -> float:
+        # Optimistic: an untried proxy counts as reliable until it fails
+        return (self.successes + 1) / (self.successes + self.failures + 1)
+
+
+class ProxyScoreboard:
+    """
+    Health of every known proxy, for choosing which one a request goes out on.
+
+    Each request goes out on the cheaper of two proxies drawn at random, cost
+    being the expected seconds per successful response: EWMA latency, plus
+    ``failure_penalty`` seconds (the timeout and retry) per expected failure.
+    The cheapest proxy gets twice its even share of traffic and no more, so
+    no single address draws every request, while the dearest gets none;
+    untried proxies cost nothing and are tried first. A failing proxy sits out
+    a cooldown that doubles with each failure in a row, and is dropped once
+    it reaches ``max_strikes``. With ``sticky`` set, each domain keeps the
+    proxy it last got until that proxy fails, so connections and cookies are
+    reused; a single-site crawl then goes out through one proxy at a time,
+    so it is off by default.
+    """
+
+    def __init__(
+        self,
+        alpha: float = 0.3,
+        failure_penalty: float = 10.0,
+        cooldown: float = 30.0,
+        max_cooldown: float = 600.0,
+        max_strikes: int = 4,
+        sticky: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.alpha = alpha
+        self.failure_penalty = failure_penalty
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.max_strikes = max_strikes
+        self.sticky = sticky
+        self.clock = clock
+        self._health: Dict[str, _ProxyHealth] = {}
+        self._sticky: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._health)
+
+    def __contains__(self, proxy: str) -> bool:
+        return proxy in self._health
+
+    def add(self, proxies: Iterable[str]) -> int:
+        """Start tracking ``proxies``; those already known keep their history."""
+        before = len(self._health)
+        for proxy in proxies:
+            self._health.setdefault(proxy, _ProxyHealth())
+        return len(self._health) - before
+
+    def remove(self, proxy: str) -> None:
+        self._health.pop(proxy, None)
+        self._unstick(proxy)
+
+    def available(self) -> List[str]:
+        now = self.clock()
+        return [p for p, h in self._health.items() if h.cooldown_until <= now]
+
+    def next_available(self) -> Optional[float]:
+        """Seconds until the first cooling proxy is back; None if none is cooling."""
+        now = self.clock()
+        waits = [
+            h.cooldown_until - now
+            for h in self._health.values()
+            if h.cooldown_until > now
+        ]
+        return min(waits) if waits else None
+
+    def cost(self, proxy: str) -> float:
+        health = self._health[proxy]
+        rate = health.success_rate
+        return (health.latency or 0.0) + (1 - rate) / rate * self.failure_penalty
+
+    def choose(self, domain: Optional[str] = None) -> Optional[str]:
+        now = self.clock()
+        if self.sticky and domain is not None:
+            proxy = self._sticky.get(domain)
+            health = self._health.get(proxy) if proxy else None
+            if health is not None and health.cooldown_until <= now:
+                return proxy
+        candidates = [p for p, h in self._health.items() if h.cooldown_until <= now]
+        if not candidates:
+            return None
+        proxy = min(random.sample(candidates, min(2, len(candidates))), key=self.cost)
+        if self.sticky and domain is not None:
+            self._sticky[domain] = proxy
+        return proxy
+
+    def success(self, proxy: str, latency: Optional[float] = None) -> None:
+        health = self._health.get(proxy)
+        if health is None:
+            return
+        health.successes += 1
+        health.strikes = 0
+        if latency is not None:
+            health.latency = (
+                latency
+                if health.latency is None
+                else self.alpha * latency + (1 - self.alpha) * health.latency
+            )
+
+    def failure(self, proxy: str) -> bool:
+        """
+        Cool ``proxy`` down after a transient failure. True when that was its
+        last strike and it has been dropped.
+        """
+        health = self._health.get(proxy)
+        if health is None:
+            return False
+        health.failures += 1
+        health.strikes += 1
+        self._unstick(proxy)
+        if health.strikes >= self.max_strikes:
+            self.remove(proxy)
+            return True
+        delay = min(self.cooldown * 2 ** (health.strikes - 1), self.max_cooldown)
+        health.cooldown_until = self.clock() + delay
+        return False
+
+    def _unstick(self, proxy: str) -> None:
+        for domain in [d for d, p in self._sticky.items() if p == proxy]:
+            del self._sticky[domain]
+
+    def snapshot(self, top: int = 10) -> List[Dict[str, Any]]:
+        """The ``top`` cheapest proxies, for status dumps."""
+        now = self.clock()
+        ranked = sorted(self._health, key=self.cost)[:top]
+        return [
+            {
+                "proxy": p,
+                "cost": round(self.cost(p), 3),
+                "successes": self._health[p].successes,
+                "failures": self._health[p].failures,
+                "latency": self._health[p].latency,
+                "cooling_for": round(max(self._health[p].cooldown_until - now, 0), 1),
+            }
+            for p in ranked
+        ]
 
 
 class JhaoProxyMiddleware:
@@ -27,53 +221,156 @@ class JhaoProxyMiddleware:
         "limit": 50,
     }
     REFRESH_INTERVAL: int = 120  # seconds between cache refreshes
+    # Refill in the background once fewer proxies than this are cached...
+    LOW_WATER: int = 10
+    # ...but at most this often, so a small or failing pool isn't hammered
+    MIN_REFILL_INTERVAL: float = 5.0
+    # Responses that mean the site has flagged the proxy: it cools down, and
+    # is banned once it keeps getting them
     BAN_CODES: set[int] = {429}
 
-    def __init__(self, proxy_client: Optional["_RequestsProxyClient"] = None) -> None:
-        self._proxy_client: _RequestsProxyClient = proxy_client or _RequestsProxyClient(
-            self.API_URL
+    def __init__(
+        self,
+        proxy_client: Optional[ProxyClient] = None,
+        stats: Optional[StatsCollector] = None,
+        scoreboard: Optional[ProxyScoreboard] = None,
+        reactor: Any = None,
+    ) -> None:
+        if reactor is None:
+            from twisted.internet import reactor
+
+        self._reactor: Any = reactor
+        self._proxy_client: ProxyClient = proxy_client or _TwistedProxyClient(
+            self.API_URL, self.POOL_PARAMS
         )
+        self.stats = stats
+        self.scoreboard = scoreboard if scoreboard is not None else ProxyScoreboard()
         self._last_refresh: float = 0.0
-        self._proxies: List[str] = []
+        self._last_attempt = float("-inf")
+        # Banned since the last refill; the API may not have dropped them yet
+        self._banned: set[str] = set()
+        # Requests waiting on the refill under way, if any
+        self._refill_waiters: Optional[List[Deferred[None]]] = None
+        # Set while requests wait on an empty pool, so that is logged once
+        self._exhausted = False
 
     @classmethod
     def from_crawler(cls, crawler: Crawler) -> "JhaoProxyMiddleware":
-        proxy_api_url: str = crawler.settings.get("JHAO_PROXY_API_URL", cls.API_URL)
-        mw = cls(_RequestsProxyClient(proxy_api_url))
+        settings = crawler.settings
+        proxy_api_url: str = settings.get("JHAO_PROXY_API_URL", cls.API_URL)
+        params = {
+            **cls.POOL_PARAMS,
+            "type": settings.get("JHAO_PROXY_TYPE", cls.POOL_PARAMS["type"]),
+            "score": settings.getint("JHAO_PROXY_MIN_SCORE", cls.POOL_PARAMS["score"]),
+        }
+        scoreboard = ProxyScoreboard(
+            cooldown=settings.getfloat("JHAO_PROXY_COOLDOWN", 30.0),
+            max_strikes=settings.getint("JHAO_PROXY_MAX_STRIKES", 4),
+            sticky=settings.getbool("JHAO_PROXY_STICKY"),
+        )
+        mw = cls(_TwistedProxyClient(proxy_api_url, params), crawler.stats, scoreboard)
+        mw.REFRESH_INTERVAL = settings.getint(
+            "JHAO_PROXY_REFRESH_INTERVAL", cls.REFRESH_INTERVAL
+        )
+        mw.LOW_WATER = settings.getint("JHAO_PROXY_LOW_WATER", cls.LOW_WATER)
         crawler.signals.connect(mw.spider_opened, signals.spider_opened)
+        crawler.signals.connect(mw.spider_closed, signals.spider_closed)
         return mw
 
     def spider_opened(self, spider: Spider) -> None:
         pass  # Hook for future use
 
-    def process_request(self, request: Request, spider: Spider) -> None:
-        if "proxy" not in request.meta:
-            proxy = self._get_proxy(spider)
-            if proxy:
-                request.meta["proxy"] = proxy
+    async def spider_closed(self, spider: Spider) -> None:
+        close = getattr(self._proxy_client, "close", None)
+        if close:
+            await maybe_deferred_to_future(close())
+
+    @property
+    def pool_size(self) -> int:
+        """Proxies known and not cooling down."""
+        return len(self.scoreboard.available())
+
+    def pool_state(self) -> Dict[str, Any]:
+        return {
+            "known": len(self.scoreboard),
+            "available": self.pool_size,
+            "api": getattr(self._proxy_client, "api", None),
+            "seconds_since_refresh": round(
+                self._reactor.seconds() - self._last_refresh, 1
+            ),
+            "refresh_interval": self.REFRESH_INTERVAL,
+            "low_water": self.LOW_WATER,
+            "banned_since_refill": len(self._banned),
+            "refilling": self._refill_waiters is not None,
+            "best": self.scoreboard.snapshot(),
+        }
+
+    def process_request(
+        self, request: Request, spider: Spider
+    ) -> Optional[Coroutine[Any, Any, None]]:
+        if "proxy" in request.meta:
+            return None
+        if not self.pool_size:
+            wait = self._wait_for_proxies(spider)
+            if not (wait.called and self.pool_size):
+                # Only this request waits for the pool; the reactor carries on
+                return self._assign_after(wait, request, spider)
+        self._assign_proxy(request, spider)
+        return None
+
+    async def _assign_after(
+        self, wait: Deferred[None], request: Request, spider: Spider
+    ) -> None:
+        await maybe_deferred_to_future(wait)
+        while not self.pool_size:
+            await maybe_deferred_to_future(self._wait_for_proxies(spider))
+        if self._exhausted:
+            self._exhausted = False
+            spider.logger.info("Proxies available again")
+        self._assign_proxy(request, spider)
+
+    def _wait_for_proxies(self, spider: Spider) -> Deferred[None]:
+        """
+        Fires when the pool may have proxies again: once the refill under way
+        is done, or a new one if ``MIN_REFILL_INTERVAL`` allows it, else when
+        the next one is due or a proxy's cooldown ends, whichever is first.
+        However many requests wait, the API is asked at most once per interval.
+        """
+        if self._refill_waiters is not None:
+            return self._refresh_cache(spider)
+        wait = self._last_attempt + self.MIN_REFILL_INTERVAL - self._reactor.seconds()
+        if wait <= 0:
+            return self._refresh_cache(spider, force=True)
+        cooling = self.scoreboard.next_available()
+        if cooling is not None:
+            wait = min(wait, cooling)
+        if not self._exhausted:
+            self._exhausted = True
+            spider.logger.warning("Proxy pool is empty; requests wait for it to refill")
+        self._inc_stat("proxy/exhausted_waits")
+        return deferLater(self._reactor, wait, lambda: None)
+
+    def _assign_proxy(self, request: Request, spider: Spider) -> None:
+        proxy = self._get_proxy(spider, urlparse(request.url).hostname)
+        if proxy:
+            request.meta["proxy"] = proxy
+            trace(request, Phase.PROXY)
 
     def process_response(
         self, request: Request, response: Response, spider: Spider
     ) -> Union[Request, Response]:
+        proxy = request.meta.get("proxy")
         if response.status in self.BAN_CODES:
-            bad = request.meta.get("proxy")
-            if bad:
-                try:
-                    requests.get(
-                        f"{self.API_URL}/ban",
-                        params={"proxy": bad.replace("http://", "")},
-                        timeout=2,
-                    )
-                except Exception:
-                    pass
-                self._ban_proxy(bad)
-                spider.logger.debug(f"Banned proxy {bad} due to HTTP {response.status}")
+            if proxy:
+                self._proxy_failed(proxy, f"HTTP {response.status}", spider)
 
             new_req: Request = request.copy()
             new_req.dont_filter = True
             new_req.meta.pop("proxy", None)
             return new_req
 
+        if proxy:
+            self.scoreboard.success(proxy, request.meta.get("download_latency"))
         return response
 
     def process_exception(
@@ -81,66 +378,191 @@ class JhaoProxyMiddleware:
     ) -> Optional[Request]:
         bad = request.meta.get("proxy")
         if bad:
-            try:
-                requests.get(
-                    f"{self.API_URL}/ban",
-                    params={"proxy": bad.replace("http://", "")},
-                    timeout=2,
-                )
-            except Exception:
-                pass
-            self._ban_proxy(bad)
-            spider.logger.debug(f"Dropped proxy {bad} due to exception {exception}")
+            self._proxy_failed(bad, f"exception {exception}", spider)
 
         new_req: Request = request.copy()
         new_req.dont_filter = True
         new_req.meta.pop("proxy", None)
         return new_req
 
-    def _refresh_cache(self, spider: Spider, force: bool = False) -> None:
-        now = time.time()
-        if force or now - self._last_refresh > self.REFRESH_INTERVAL:
-            try:
-                self._proxies = self._proxy_client.fetch_batch(
-                    limit=self.POOL_PARAMS["limit"]
-                )
-                random.shuffle(self._proxies)
-                self._last_refresh = now
-                spider.logger.info(f"Fetched {len(self._proxies)} proxies from pool")
-            except Exception as e:
-                spider.logger.warning(f"ProxyRotator429: cache refresh failed: {e}")
+    def _proxy_failed(self, proxy: str, reason: str, spider: Spider) -> None:
+        # Timeouts, refused connections and 429s come and go: sit the proxy
+        # out for a while, and only ban it once it keeps failing
+        if self.scoreboard.failure(proxy):
+            self._ban_proxy(proxy)
+            spider.logger.debug(f"Dropped proxy {proxy} after {reason}")
+        else:
+            self._inc_stat("proxy/cooldowns")
+            spider.logger.debug(f"Cooling proxy {proxy} after {reason}")
+
+    def _refresh_cache(self, spider: Spider, force: bool = False) -> Deferred[None]:
+        """Refill the cache; fires once it is done, successful or not."""
+        waiter: Deferred[None] = Deferred()
+        if self._refill_waiters is not None:
+            self._refill_waiters.append(waiter)
+            return waiter
+        now = self._reactor.seconds()
+        if not (force or now - self._last_refresh > self.REFRESH_INTERVAL):
+            return succeed(None)
+        self._refill_waiters = [waiter]
+        self._last_attempt = now
+        started = time.perf_counter()
+
+        def refilled(proxies: List[str]) -> None:
+            added = self.scoreboard.add(p for p in proxies if p not in self._banned)
+            self._banned.clear()
+            self._last_refresh = now
+            self._inc_stat("proxy/refill_count")
+            self._set_stat("proxy/pool_size", self.pool_size)
+            spider.logger.info(
+                f"Fetched {len(proxies)} proxies from pool, {added} of them new"
+            )
+
+        def failed(failure: Failure) -> None:
+            self._inc_stat("proxy/refill_failed")
+            spider.logger.warning(
+                f"ProxyRotator429: cache refresh failed: {failure.value}"
+            )
+
+        def release(_: None) -> None:
+            latency = round((time.perf_counter() - started) * 1000, 1)
+            self._set_stat("proxy/refill_latency_ms", latency)
+            if self.stats is not None:
+                self.stats.max_value("proxy/refill_latency_max_ms", latency)
+            waiters, self._refill_waiters = self._refill_waiters or [], None
+            for w in waiters:
+                w.callback(None)
+
+        d = maybeDeferred(
+            self._proxy_client.fetch_batch, limit=self.POOL_PARAMS["limit"]
+        )
+        d.addCallbacks(refilled, failed)
+        d.addBoth(release)
+        return waiter
 
     def _ban_proxy(self, proxy_url: str) -> None:
         ip_port: str = proxy_url.replace("http://", "").replace("https://", "")
+        self._banned.add(proxy_url)
+        self.scoreboard.remove(proxy_url)
+        self._inc_stat("proxy/bans")
         self._proxy_client.ban(ip_port)
 
-    def _get_proxy(self, spider: Spider) -> Optional[str]:
-        if not self._proxies:
+    def _get_proxy(self, spider: Spider, domain: Optional[str] = None) -> Optional[str]:
+        proxy = self.scoreboard.choose(domain)
+        self._set_stat("proxy/pool_size", self.pool_size)
+        self._maybe_refill(spider)
+        return proxy
+
+    def _maybe_refill(self, spider: Spider) -> None:
+        """Top the cache up in the background before it runs dry."""
+        if self._refill_waiters is not None:
+            return
+        now = self._reactor.seconds()
+        stale = now - self._last_refresh > self.REFRESH_INTERVAL
+        low = self.pool_size < self.LOW_WATER
+        if (stale or low) and now - self._last_attempt > self.MIN_REFILL_INTERVAL:
             self._refresh_cache(spider, force=True)
-        return self._proxies.pop() if self._proxies else None
 
+    def _inc_stat(self, key: str) -> None:
+        if self.stats is not None:
+            self.stats.inc_value(key)
 
-class _RequestsProxyClient:
-    """Default implementation that talks to jhao proxy_pool via requests."""
+    def _set_stat(self, key: str, value: float) -> None:
+        if self.stats is not None:
+            self.stats.set_value(key, value)
+
+
+class _TwistedProxyClient:
+    """
+    Talks to jhao proxy_pool on the running reactor, over a small pool of
+    keep-alive connections. Bans return at once: they are queued, coalesced
+    for ``BAN_DELAY`` seconds and sent in the background, since the API has
+    no bulk endpoint.
+    """
+
+    MAX_CONNECTIONS: int = 4
+    BAN_DELAY: float = 0.5
+    TIMEOUT: float = 5.0
+
+    def __init__(
+        self, api_base: str, params: Dict[str, Any], reactor: Any = None
+    ) -> None:
+        if reactor is None:
+            from twisted.internet import reactor
 
-    def __init__(self, api_base: str) -> None:
         self.api: str = api_base.rstrip("/")
+        self.params = params
+        self._reactor: Any = reactor
+        self._pool = HTTPConnectionPool(reactor, persistent=True)
+        self._pool.maxPersistentPerHost = self.MAX_CONNECTIONS
+        self._agent = Agent(reactor, connectTimeout=self.TIMEOUT, pool=self._pool)
+        self._limit = DeferredSemaphore(self.MAX_CONNECTIONS)
+        self._bans: Dict[str, None] = {}
+        self._ban_call: Optional[DelayedCall] = None
+        self.bans_sent = 0
+        self.bans_failed = 0
 
-    def fetch_batch(self, limit: int = 50) -> List[str]:
-        params: Dict[str, Any] = {
-            "type": "https",
-            "score": 5,
-            "anonymity": "high_anonymous",
-            "limit": limit,
-        }
-        r = requests.get(f"{self.api}/all", params=params, timeout=5)
-        r.raise_for_status()
-        return [f"http://{p}" if "://" not in p else p for p in r.json()]
+    def fetch_batch(self, limit: int = 50) -> Deferred[List[str]]:
+        d: Deferred[Any] = self._get("/all", {**self.params, "limit": limit})
+        d.addCallback(lambda body: [_proxy_url(p) for p in json.loads(body)])
+        return d
 
     def ban(self, ip_port: str) -> None:
-        requests.get(f"{self.api}/ban", params={"proxy": ip_port}, timeout=3)
+        self._bans[ip_port] = None
+        if self._ban_call is None:
+            self._ban_call = self._reactor.callLater(self.BAN_DELAY, self._send_bans)
+
+    def _send_bans(self) -> Deferred[Any]:
+        self._ban_call = None
+        bans, self._bans = list(self._bans), {}
+        sent = [
+            self._get("/ban", {"proxy": ip_port}).addCallbacks(
+                self._ban_sent, self._ban_failed, errbackArgs=(ip_port,)
+            )
+            for ip_port in bans
+        ]
+        return DeferredList(sent)
+
+    def _ban_sent(self, _: bytes) -> None:
+        self.bans_sent += 1
+
+    def _ban_failed(self, failure: Failure, ip_port: str) -> None:
+        self.bans_failed += 1
+        logger.debug(f"Failed to ban proxy {ip_port}: {failure.value}")
+
+    def _get(self, path: str, params: Dict[str, Any]) -> Deferred[bytes]:
+        url = f"{self.api}{path}?{urlencode(params)}".encode()
+
+        def request() -> Deferred[bytes]:
+            d: Deferred[Any] = self._agent.request(b"GET", url)
+            d.addCallback(self._read)
+            d.addTimeout(self.TIMEOUT, self._reactor)
+            return d
+
+        return self._limit.run(request)
+
+    @staticmethod
+    def _read(response: Any) -> Deferred[bytes]:
+        if response.code >= 400:
+            raise ValueError(f"proxy API returned HTTP {response.code}")
+        return readBody(response)
+
+    def close(self) -> Deferred[Any]:
+        """Send queued bans, then drop the pooled connections."""
+        if self._ban_call is not None and self._ban_call.active():
+            self._ban_call.cancel()
+        d = self._send_bans() if self._bans else succeed(None)
+        d.addBoth(lambda _: self._pool.closeCachedConnections())
+        return d
+
+
+def _proxy_url(entry: Union[str, Dict[str, Any]]) -> str:
+    # /all lists "ip:port" strings, or records with a "proxy" field
+    proxy = entry["proxy"] if isinstance(entry, dict) else entry
+    return f"http://{proxy}" if "://" not in proxy else proxy
 
 
+logger: logging.Logger = logging.getLogger(__name__)
 logstat_logger: logging.Logger = logging.getLogger("scrapy.extensions.logstats")
 
 IMAGE_EXTENSIONS: set[str] = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".svg"}
@@ -3,9 +3,19 @@
 # from scrapy.http import Response
 from .html import HtmlItem
 from .image import ImageItem
+from .record import RecordItem
 from scrapy.http import Response
 from ._base import BaseItem
 
+__all__ = [
+    "BaseItem",
+    "HtmlItem",
+    "ImageItem",
+    "RecordItem",
+    "CONTENT_TYPE_MAP",
+    "from_response",
+]
+
 CONTENT_TYPE_MAP: dict[str, type[BaseItem]] = {
     "text/html": HtmlItem,
     "image/jpeg": ImageItem,
@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+import json
+from pydantic import Field
+from scrapy.http import Response
+from ._base import BaseItem
+from toy_catalogue.utils.url import generate_id
+from typing import Any
+
+
+class RecordItem(BaseItem):
+    """An item read out of structured data rather than fetched on its own."""
+
+    source_page_url: str = Field(
+        ..., description="URL of the response the record was read from"
+    )
+    downloaded_at: str = Field(..., description="ISO timestamp of download time")
+
+    @classmethod
+    def from_record(
+        cls, response: Response, state: str, url: str, data: dict[str, Any]
+    ) -> "RecordItem":
+        return cls(
+            id=generate_id(url),
+            state=state,
+            url=url,
+            content=json.dumps(data, ensure_ascii=False).encode("utf-8"),
+            metadata={
+                "url": url,
+                "status": response.status,
+                "response_meta": response.meta,
+            },
+            source_page_url=response.url,
+            downloaded_at=datetime.now(timezone.utc).isoformat(),
+        )
@@ -6,6 +6,7 @@
 
 # useful for handling different item types with a single interface
 from __future__ import annotations
+from time import perf_counter
 from scrapy.crawler import Crawler
 from typing import Any, TYPE_CHECKING, cast, TypeAlias
 from toy_catalogue.spiders.generic_spider import GenericSpider
@@ -62,6 +63,10 @@ class PostProcessingPipeline:
         processors = registries.get(type(item))
         if processors is None:
             return item
+        start = perf_counter()
         for processor in processors:
             item = processor.process(item, spider.session_context)
+        spider.session_context.metrics.timing(
+            "stage_ms", start, stage="pipeline", node=item.state
+        )
         return item
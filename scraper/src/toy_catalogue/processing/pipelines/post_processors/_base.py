@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from time import perf_counter
 from typing import Any, Optional
 from toy_catalogue.session.session_manager import SessionContext
 from toy_catalogue.processing.items import BaseItem
@@ -37,14 +38,21 @@ class BasePostProcessor(ABC):
         return None
 
     def process(self, item: BaseItem, context: SessionContext) -> BaseItem:
+        processor = type(self).__name__
+        start = perf_counter()
         try:
             processed_item = self._process(item, context)
-            context.record_success(
-                source=f"processing.pipelines.post_processors.base.{self.meta_key}",
-                msg=f"Successfully processed {item.state} for {item.url}",
+            context.metrics.counter(
+                "processed", processor=processor, node=item.state
+            ).inc()
+            context.metrics.timing(
+                "process_ms", start, processor=processor, node=item.state
             )
             return processed_item
         except Exception as e:
+            context.metrics.counter(
+                "process_errors", processor=processor, node=item.state
+            ).inc()
             context.record_error(
                 source=f"processing.pipelines.post_processors.base.{self.meta_key}",
                 msg=f"Failed to process {item.state} for {item.url}",
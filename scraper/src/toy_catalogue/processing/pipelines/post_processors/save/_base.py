@@ -38,13 +38,14 @@ class SavePostProcessor(BasePostProcessor):
 
         # Save metadata
         meta_path = folder_path / "metadata.json"
-        meta_path.write_text(
-            json.dumps(
-                {"filename": self.get_content_filename(item), **item.metadata},
-                indent=2,
-                ensure_ascii=False,
-            ),
-            encoding="utf-8",
+        metadata = json.dumps(
+            {"filename": self.get_content_filename(item), **item.metadata},
+            indent=2,
+            ensure_ascii=False,
+        ).encode("utf-8")
+        meta_path.write_bytes(metadata)
+        context.metrics.counter("bytes_written", processor=type(self).__name__).inc(
+            len(item.content) + len(metadata)
         )
 
     def extract_meta_from_response(self, response: Response) -> Any | None:
@@ -0,0 +1,8 @@
+from ._base import SavePostProcessor
+
+from toy_catalogue.processing.items import BaseItem
+
+
+class RecordSaveProcessor(SavePostProcessor):
+    def get_content_filename(self, item: BaseItem) -> str:
+        return "record.json"
@@ -1,5 +1,16 @@
 from scrapy.crawler import CrawlerProcess
+from scrapy.settings import Settings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from fnmatch import fnmatch
+from importlib import resources
+import glob
+import json
+import multiprocessing
+import os
+import socket
+import time
 import typer
+from typing import Any, NamedTuple, Optional
 from pathlib import Path
 from toy_catalogue.config.config_manager import ConfigManager
 from toy_catalogue.config.schema.external.config import (
@@ -8,38 +19,281 @@ from toy_catalogue.config.schema.external.config import (
     UrlConfig,
     ConfigSpec,
 )
-from toy_catalogue.session.session_manager import SessionManager
+from toy_catalogue.engine.frontier import use_shared_frontier
+from toy_catalogue.session.checkpoint import checkpoint_path, discard_scheduler_state
+from toy_catalogue.session.item_index import ItemIndex
+from toy_catalogue.session.session_manager import SessionContext, SessionManager
 from toy_catalogue.spiders.generic_spider import GenericSpider
 from toy_catalogue.config.settings import build_settings, load_config_from_package
 
 app = typer.Typer()
 
 
-@app.command()
+def crawl_session(
+    settings: Settings | dict[str, Any], session: SessionContext
+) -> dict[str, Any]:
+    process = CrawlerProcess(Settings(settings))
+    crawler = process.create_crawler(GenericSpider)
+    process.crawl(crawler, context=session)
+    process.start()  # Blocks until all spiders finish
+    assert crawler.stats is not None
+    return crawler.stats.get_stats()
+
+
+def load_settings() -> Settings:
+    core = load_config_from_package("core_settings.toml")
+    custom = load_config_from_package("custom_settings.toml")
+    return build_settings(core, custom)
+
+
+class BatchJob(NamedTuple):
+    session: SessionContext
+    expected_items: Optional[int]
+
+
+class BatchResult(NamedTuple):
+    site: str
+    session_id: str
+    items: int
+    seconds: float
+    status: str
+
+
+def resolve_site_configs(targets: list[str]) -> list[Path]:
+    """Site names and paths/globs of JSON configs, in order, without repeats."""
+    packaged = list(resources.files("toy_catalogue.config.rules.sites").iterdir())
+    paths: dict[Path, None] = {}
+    for target in targets:
+        if target.endswith(".json") or os.sep in target:
+            matches = glob.glob(target)
+        else:
+            matches = [
+                str(entry)
+                for entry in packaged
+                if fnmatch(entry.name, f"{target}.json") and entry.is_file()
+            ]
+        if not matches:
+            raise typer.BadParameter(f"No site config matches {target!r}")
+        paths.update((Path(match).resolve(), None) for match in sorted(matches))
+    return list(paths)
+
+
+def longest_first(jobs: list[BatchJob]) -> list[BatchJob]:
+    # Sites never crawled before have unknown size and go first
+    return sorted(
+        jobs,
+        key=lambda job: (job.expected_items is not None, -(job.expected_items or 0)),
+    )
+
+
+def run_batch_job(settings: dict[str, Any], session: SessionContext) -> BatchResult:
+    start = time.monotonic()
+    stats = crawl_session(dict(settings, JOBDIR=str(session.job_dir)), session)
+    return BatchResult(
+        session.meta.site,
+        session.session_id,
+        stats.get("item_scraped_count", 0),
+        time.monotonic() - start,
+        stats.get("finish_reason", "unknown"),
+    )
+
+
+def merge_worker_summaries(session: SessionContext) -> dict[str, Any]:
+    """
+    Sum up the summaries the workers of a shared crawl wrote into the
+    session's own ``summary.json``, and record the session's item count.
+    """
+    workers = {
+        path.parent.name: json.loads(path.read_text(encoding="utf-8"))
+        for path in sorted((session.session_dir / "workers").glob("*/summary.json"))
+    }
+    summary = {
+        "session_id": session.session_id,
+        "site": session.meta.site,
+        "items": sum(w.get("items", 0) for w in workers.values()),
+        "responses": sum(w.get("responses", 0) for w in workers.values()),
+        "workers": workers,
+    }
+    session.summary_path.write_text(
+        json.dumps(summary, indent=2, default=str), encoding="utf-8"
+    )
+    SessionManager.record_item_count(session.session_id, summary["items"])
+    # Finished only if every worker was
+    reasons = {w.get("finish_reason", "unknown") for w in workers.values()}
+    reason = "finished" if reasons == {"finished"} else "/".join(sorted(reasons))
+    SessionManager.record_finish_reason(session.session_id, reason)
+    return summary
+
+
+def merge_worker_indexes(session: SessionContext) -> int:
+    """
+    Copy the item indexes the workers of a shared crawl kept apart into the
+    session's own, where later incremental crawls look; returns its size.
+    """
+    index = ItemIndex(session.item_index_path, session_id=session.session_id)
+    try:
+        for path in sorted((session.session_dir / "workers").glob("*/items.sqlite")):
+            index.inherit(path)
+        return len(index)
+    finally:
+        index.close()
+
+
+def format_summary(results: list[BatchResult]) -> str:
+    headers = ("site", "session", "items", "time", "status")
+    rows = [
+        (r.site, r.session_id, str(r.items), f"{r.seconds:.0f}s", r.status)
+        for r in results
+    ]
+    widths = [max(len(row[i]) for row in [headers, *rows]) for i in range(5)]
+    lines = ["  ".join(cell.ljust(w) for cell, w in zip(row, widths)) for row in rows]
+    rule = "  ".join("-" * w for w in widths)
+    header = "  ".join(h.ljust(w) for h, w in zip(headers, widths))
+    return "\n".join([header, rule, *lines])
+
+
+@app.command("crawl")
 def main(
     site: str,
     config_file: Path = typer.Option(None, "--file", help="Path to local JSON config"),
     config_url: str = typer.Option(None, "--url", help="URL to load config from"),
+    mode: str = typer.Option("fresh", "--mode", help="Crawl strategy to use"),
+    parent: str = typer.Option(
+        None, "--parent", help="Parent session id (incremental defaults to latest)"
+    ),
+    frontier: str = typer.Option(
+        None, "--frontier", help="Redis URL of a frontier shared between workers"
+    ),
+    workers: int = typer.Option(
+        1, "--workers", help="Worker processes crawling the shared frontier"
+    ),
+    join: str = typer.Option(
+        None, "--join", help="Add workers to a running session's shared frontier"
+    ),
+    profile: bool = typer.Option(
+        False, "--profile", help="Sample CPU stacks into the session directory"
+    ),
+    resume: str = typer.Option(
+        None, "--resume", help="Resume an interrupted session from its checkpoint"
+    ),
 ):
-    spec: ConfigSpec
-    if config_file:
-        spec = FileConfig(type="file", path=str(config_file))
-    elif config_url:
-        spec = UrlConfig.model_validate({"type": "url", "url": config_url})
-    else:
-        spec = PackageConfig(type="package", resource=f"sites/{site}.json")
-    core = load_config_from_package("core_settings.toml")
-    custom = load_config_from_package("custom_settings.toml")
-    settings = build_settings(core, custom)
+    if (workers > 1 or join) and not frontier:
+        raise typer.BadParameter("--workers and --join need a --frontier")
+    if resume and frontier:
+        raise typer.BadParameter("A shared frontier outlives its workers; use --join")
+    settings = load_settings()
+    if profile:
+        settings.set("PROFILE_ENABLED", True)
     print("Settings created", settings)
-    config = ConfigManager.load_config(spec)
 
-    print("config created", config)
-    session = SessionManager.create_session(config, mode="fresh")
+    if join:
+        session = SessionManager.open_session(join)
+    elif resume:
+        session = SessionManager.open_session(resume)
+        if not checkpoint_path(session.job_dir).exists():
+            raise typer.BadParameter(f"Session {resume} has no checkpoint")
+        discard_scheduler_state(session.job_dir)
+        settings.set("CHECKPOINT_RESUME", True)
+    else:
+        spec: ConfigSpec
+        if config_file:
+            spec = FileConfig(type="file", path=str(config_file))
+        elif config_url:
+            spec = UrlConfig.model_validate({"type": "url", "url": config_url})
+        else:
+            spec = PackageConfig(type="package", resource=f"sites/{site}.json")
+        config = ConfigManager.load_config(spec)
+
+        print("config created", config)
+        if parent is None and mode == "incremental":
+            latest = SessionManager.latest_session(config.site, spec.name)
+            parent = latest.session_id if latest else None
+        session = SessionManager.create_session(
+            config, mode=mode, parent_session_id=parent, config_name=spec.name
+        )
     print("Session created", session)
 
-    process = CrawlerProcess(settings)
-    process.crawl(GenericSpider, context=session)
+    if frontier:
+        # The queue lives in Redis and outlives any one worker
+        use_shared_frontier(settings, frontier, session.session_id)
+    else:
+        # Requests carry no closures, so the scheduler can keep the frontier on disk
+        settings.set("JOBDIR", str(session.job_dir))
+
+    contexts = [session]
+    if frontier:
+        # Workers share the session directory but not their output files
+        prefix = f"{socket.gethostname()}-{os.getpid()}"
+        contexts = [session.for_worker(f"{prefix}-{n}") for n in range(workers)]
+    spawn = multiprocessing.get_context("spawn")
+    helpers = [
+        spawn.Process(target=crawl_session, args=(settings.copy_to_dict(), context))
+        for context in contexts[1:]
+    ]
+    for helper in helpers:
+        helper.start()
+    crawl_session(settings, contexts[0])
+    for helper in helpers:
+        helper.join()
+    if frontier:
+        # Includes workers that joined from elsewhere and have finished
+        summary = merge_worker_summaries(session)
+        merge_worker_indexes(session)
+        print(f"{len(summary['workers'])} workers scraped {summary['items']} items")
+    print("Crawler finished")
+
+
+@app.command("batch")
+def batch(
+    targets: list[str] = typer.Argument(
+        ..., help="Site names or paths/globs of site JSON configs"
+    ),
+    jobs: int = typer.Option(
+        os.cpu_count() or 1, "--jobs", "-j", help="Sites crawled at the same time"
+    ),
+    mode: str = typer.Option("fresh", "--mode", help="Crawl strategy to use"),
+    profile: bool = typer.Option(
+        False, "--profile", help="Sample CPU stacks into each session directory"
+    ),
+):
+    base = load_settings()
+    if profile:
+        base.set("PROFILE_ENABLED", True)
+    settings = base.copy_to_dict()
+    batch_jobs: list[BatchJob] = []
+    for path in resolve_site_configs(targets):
+        spec = FileConfig(type="file", path=str(path))
+        config = ConfigManager.load_config(spec)
+        parent = None
+        if mode == "incremental":
+            latest = SessionManager.latest_session(config.site, spec.name)
+            parent = latest.session_id if latest else None
+        session = SessionManager.create_session(
+            config, mode=mode, parent_session_id=parent, config_name=spec.name
+        )
+        expected = SessionManager.previous_item_count(config.site, spec.name)
+        batch_jobs.append(BatchJob(session, expected))
+
+    results: list[BatchResult] = []
+    # A Twisted reactor cannot be restarted, so every crawl gets a fresh process
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=1,
+    ) as pool:
+        futures = {
+            pool.submit(run_batch_job, settings, job.session): job
+            for job in longest_first(batch_jobs)
+        }
+        for future in as_completed(futures):
+            session = futures[future].session
+            try:
+                result = future.result()
+            except Exception as e:
+                result = BatchResult(
+                    session.meta.site, session.session_id, 0, 0.0, f"error: {e}"
+                )
+            results.append(result)
+            print(f"{result.site} done: {result.items} items ({result.status})")
 
-    process.start()
-    print("Crawler finished")  # Blocks until all spiders finish
+    print(format_summary(sorted(results, key=lambda r: r.site)))
@@ -0,0 +1,114 @@
+from __future__ import annotations
+import os
+import pickle
+import shutil
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, NamedTuple, Optional
+
+from .metrics import MetricsRegistry
+
+CHECKPOINT_NAME = "checkpoint.pickle"
+PENDING_NAME = "pending.sqlite"
+# Crawler stats carried over to a resumed crawl, so its totals cover both runs
+RESUMED_STATS = ("item_scraped_count", "response_received_count")
+
+
+class Checkpoint(NamedTuple):
+    created_at: datetime
+    # Request.to_dict() of the requests downloaded but not yet parsed; those
+    # still waiting to be downloaded are in PendingRequests
+    requests: list[dict[str, Any]]
+    strategy: dict[str, Any]
+    spider: dict[str, str]
+    stats: dict[str, Any]
+    metrics: MetricsRegistry
+
+
+def checkpoint_path(job_dir: Path) -> Path:
+    return job_dir / CHECKPOINT_NAME
+
+
+def pending_path(job_dir: Path) -> Path:
+    return job_dir / PENDING_NAME
+
+
+class PendingRequests:
+    """
+    Requests scheduled but not yet downloaded, kept in SQLite under their
+    request fingerprint so the frontier never has to fit in memory.
+
+    Changes become durable only at ``commit``, which the checkpoint calls, so
+    after a crash the set is the one of the last checkpoint.
+    """
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pending "
+            "(fp BLOB PRIMARY KEY, request BLOB NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def add(self, fp: bytes, request: dict[str, Any]) -> None:
+        data = pickle.dumps(request, protocol=pickle.HIGHEST_PROTOCOL)
+        self._conn.execute("INSERT OR REPLACE INTO pending VALUES (?, ?)", (fp, data))
+
+    def remove(self, fp: bytes) -> None:
+        self._conn.execute("DELETE FROM pending WHERE fp = ?", (fp,))
+
+    def __len__(self) -> int:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM pending").fetchone()
+        return int(count)
+
+    def committed(self) -> Iterator[dict[str, Any]]:
+        """The requests as of the last commit, safe to ``add`` to meanwhile."""
+        reader = sqlite3.connect(self.path)
+        try:
+            for (data,) in reader.execute("SELECT request FROM pending"):
+                yield pickle.loads(data)
+        finally:
+            reader.close()
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def write_checkpoint(path: Path, checkpoint: Checkpoint) -> int:
+    """Replace ``path`` with ``checkpoint`` atomically; returns its size."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp, path)
+    return size
+
+
+def load_checkpoint(path: Path) -> Optional[Checkpoint]:
+    if not path.exists():
+        return None
+    with open(path, "rb") as f:
+        checkpoint = pickle.load(f)
+    if not isinstance(checkpoint, Checkpoint):
+        raise ValueError(f"{path} is not a crawl checkpoint")
+    return checkpoint
+
+
+def discard_scheduler_state(job_dir: Path) -> None:
+    """
+    Remove Scrapy's own queue and dupefilter state from ``job_dir`` before a
+    resume. They are only consistent after a clean shutdown, and the
+    checkpoint's pending set already holds the requests.
+    """
+    shutil.rmtree(job_dir / "requests.queue", ignore_errors=True)
+    (job_dir / "requests.seen").unlink(missing_ok=True)
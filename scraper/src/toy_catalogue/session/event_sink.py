@@ -0,0 +1,244 @@
+from __future__ import annotations
+import atexit
+import gzip
+import io
+import json
+import logging
+import re
+import threading
+import weakref
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Any, Iterator, Literal, Optional
+
+from pydantic import BaseModel, Field
+from scrapy.settings import BaseSettings
+
+logger = logging.getLogger(__name__)
+
+Compression = Literal["none", "gzip", "zstd"]
+SUFFIXES: dict[str, str] = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+# Sinks whose writer is still running; closed at exit so late events land
+_OPEN_SINKS: weakref.WeakSet[EventSink] = weakref.WeakSet()
+
+
+class EventSinkConfig(BaseModel):
+    # Events held in memory at most; the oldest are dropped beyond this
+    capacity: int = Field(default=10_000, gt=0)
+    # The writer wakes up once this many events are buffered...
+    flush_size: int = Field(default=500, gt=0)
+    # ...or this many seconds have passed
+    flush_interval: float = Field(default=1.0, gt=0)
+    compression: Compression = "none"
+    # The current file is rotated to a numbered segment beyond this size
+    max_bytes: int = Field(default=64 * 1024 * 1024, gt=0)
+
+    @classmethod
+    def from_settings(cls, settings: BaseSettings) -> EventSinkConfig:
+        keys = {
+            "capacity": "EVENTS_CAPACITY",
+            "flush_size": "EVENTS_FLUSH_SIZE",
+            "flush_interval": "EVENTS_FLUSH_INTERVAL",
+            "compression": "EVENTS_COMPRESSION",
+            "max_bytes": "EVENTS_MAX_BYTES",
+        }
+        return cls.model_validate(
+            {field: settings[key] for field, key in keys.items() if key in settings}
+        )
+
+
+def _zstd() -> Any:
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "zstd event compression needs the 'zstandard' package "
+            "(pip install toy_catalogue[zstd])"
+        ) from e
+    return zstandard
+
+
+def encode_batch(events: list[dict[str, Any]], compression: Compression) -> bytes:
+    data = "".join(json.dumps(e, default=str) + "\n" for e in events).encode()
+    # Each batch is a complete gzip member / zstd frame, so a file cut short
+    # by a crash still decodes up to its last whole batch
+    if compression == "gzip":
+        return gzip.compress(data)
+    if compression == "zstd":
+        return bytes(_zstd().ZstdCompressor().compress(data))
+    return data
+
+
+class EventSink:
+    """
+    Buffered, append-only writer of session events.
+
+    ``put`` only appends to a bounded ring; a background thread writes the
+    ring out whenever ``flush_size`` events are waiting or ``flush_interval``
+    seconds have passed. Memory stays bounded by ``capacity`` however long
+    the crawl runs, and at most one interval of events is lost on a crash.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        config: Optional[EventSinkConfig] = None,
+        name: str = "events.jsonl",
+    ) -> None:
+        self.directory = directory
+        self.config = config or EventSinkConfig()
+        self.name = name
+        if self.config.compression == "zstd":
+            _zstd()
+        self.dropped = 0
+        self.written = 0
+        self._ring: deque[dict[str, Any]] = deque(maxlen=self.config.capacity)
+        self._cond = threading.Condition()
+        self._flush_requested = False
+        self._writing = False
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name="event-sink", daemon=True
+        )
+        self._thread.start()
+        _OPEN_SINKS.add(self)
+
+    @property
+    def path(self) -> Path:
+        return self.directory / (self.name + SUFFIXES[self.config.compression])
+
+    def put(self, event: dict[str, Any]) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Event sink is closed")
+            if len(self._ring) == self._ring.maxlen:
+                self.dropped += 1
+            self._ring.append(event)
+            if len(self._ring) >= self.config.flush_size:
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything put so far is on disk."""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: not self._ring and not self._writing, timeout
+            )
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        _OPEN_SINKS.discard(self)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closed
+                    or self._flush_requested
+                    or len(self._ring) >= self.config.flush_size,
+                    self.config.flush_interval,
+                )
+                batch = list(self._ring)
+                self._ring.clear()
+                self._flush_requested = False
+                self._writing = bool(batch)
+                closing = self._closed
+            try:
+                if batch:
+                    self._write(batch)
+            except Exception:
+                logger.exception(f"Failed to write {len(batch)} events")
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+            if closing:
+                return
+
+    def _write(self, batch: list[dict[str, Any]]) -> None:
+        if self.dropped:
+            batch.insert(0, self._dropped_event())
+        path = self.path
+        with open(path, "ab") as f:
+            f.write(encode_batch(batch, self.config.compression))
+        self.written += len(batch)
+        if path.stat().st_size >= self.config.max_bytes:
+            number = len(self.segments())
+            path.rename(self.directory / segment_name(self.name, path, number))
+
+    def _dropped_event(self) -> dict[str, Any]:
+        with self._cond:
+            dropped, self.dropped = self.dropped, 0
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "type": "events_dropped",
+            "source": "event_sink",
+            "details": {"count": dropped},
+        }
+
+    def segments(self) -> list[Path]:
+        return event_segments(self.directory, self.name)
+
+
+@atexit.register
+def _close_open_sinks() -> None:
+    for sink in list(_OPEN_SINKS):
+        sink.close()
+
+
+def segment_name(name: str, path: Path, number: int) -> str:
+    stem, _, ext = name.partition(".")
+    return f"{stem}.{number:04d}.{ext}{path.name[len(name):]}"
+
+
+def event_segments(directory: Path, name: str = "events.jsonl") -> list[Path]:
+    """Rotated segments in the order they were written, then the current file."""
+    stem, _, ext = name.partition(".")
+    pattern = re.compile(rf"{re.escape(stem)}\.(\d+)\.{re.escape(ext)}(\.gz|\.zst)?$")
+    numbered = sorted(
+        (int(match.group(1)), path)
+        for path in directory.iterdir()
+        if (match := pattern.match(path.name))
+    )
+    current = [
+        directory / (name + suffix)
+        for suffix in SUFFIXES.values()
+        if (directory / (name + suffix)).exists()
+    ]
+    return [path for _, path in numbered] + current
+
+
+def _open_text(path: Path) -> IO[str]:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.suffix == ".zst":
+        reader = (
+            _zstd()
+            .ZstdDecompressor()
+            .stream_reader(open(path, "rb"), read_across_frames=True, closefd=True)
+        )
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def read_events(
+    directory: Path, name: str = "events.jsonl"
+) -> Iterator[dict[str, Any]]:
+    for path in event_segments(directory, name):
+        truncated: tuple[type[Exception], ...] = (EOFError,)
+        if path.suffix == ".zst":
+            truncated += (_zstd().ZstdError,)
+        with _open_text(path) as f:
+            try:
+                for line in f:
+                    # A crash can leave the last line or batch cut short
+                    if line.endswith("\n"):
+                        yield json.loads(line)
+            except truncated:
+                logger.warning(f"{path} ends in a partial batch")
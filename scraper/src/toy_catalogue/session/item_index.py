@@ -0,0 +1,95 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import NamedTuple, Optional
+import sqlite3
+import time
+
+from toy_catalogue.utils.url import SIGNIFICANT_QUERY_PARAMS, url_fingerprint
+
+
+class IndexEntry(NamedTuple):
+    url: str
+    state: str
+    fetched_at: float
+    session_id: str
+
+
+class ItemIndex:
+    """
+    Per-session SQLite index of every URL turned into an item.
+
+    Rows are keyed by URL fingerprint and record the node, fetch time and the
+    session whose directory holds the saved content, so a later session can
+    tell what it may skip.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        session_id: str = "",
+        commit_every: int = 1000,
+        query_params: frozenset[str] = SIGNIFICANT_QUERY_PARAMS,
+    ) -> None:
+        self.path = path
+        self.session_id = session_id
+        self.query_params = query_params
+        self.commit_every = commit_every
+        self._pending = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "fp INTEGER PRIMARY KEY, url TEXT NOT NULL, state TEXT NOT NULL, "
+            "fetched_at REAL NOT NULL, session_id TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def record(self, url: str, state: str, fetched_at: Optional[float] = None) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?)",
+            (
+                url_fingerprint(url, self.query_params),
+                url,
+                state,
+                time.time() if fetched_at is None else fetched_at,
+                self.session_id,
+            ),
+        )
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+
+    def get(self, url: str) -> Optional[IndexEntry]:
+        row = self._conn.execute(
+            "SELECT url, state, fetched_at, session_id FROM items WHERE fp = ?",
+            (url_fingerprint(url, self.query_params),),
+        ).fetchone()
+        return IndexEntry(*row) if row else None
+
+    def inherit(self, parent: Path) -> int:
+        """Copy the rows of a parent session's or a worker's index not already here."""
+        self.flush()
+        self._conn.execute("ATTACH DATABASE ? AS parent", (str(parent),))
+        try:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO items SELECT * FROM parent.items"
+            )
+            self._conn.commit()
+        finally:
+            self._conn.execute("DETACH DATABASE parent")
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        self.flush()
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM items").fetchone()
+        return count
+
+    def flush(self) -> None:
+        if self._pending:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
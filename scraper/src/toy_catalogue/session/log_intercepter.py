@@ -1,8 +1,16 @@
+from __future__ import annotations
 import logging
+import queue
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Any
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Mapping, Optional
 from .session_manager import SessionContext
 
+DEFAULT_FORMAT = "[%(asctime)sZ] %(levelname)s: %(message)s"
+DEFAULT_DATEFMT = "%Y-%m-%dT%H:%M:%S"
+
 
 class SessionLoggingHandler(logging.Handler):
     def __init__(self, session_context: SessionContext) -> None:
@@ -29,6 +37,9 @@ class SessionLoggingHandler(logging.Handler):
                 "process": record.processName,
                 "timestamp": timestamp,
             }
+            suppressed = getattr(record, "suppressed", 0)
+            if suppressed:
+                event["suppressed"] = suppressed
 
             # Use levelname as event_type, e.g. "INFO", "ERROR"
             event_type = record.levelname
@@ -41,3 +52,168 @@ class SessionLoggingHandler(logging.Handler):
             )
         except Exception:
             self.handleError(record)
+
+
+class LoggerLevelFilter(logging.Filter):
+    """Minimum level per logger name; the longest matching prefix wins."""
+
+    def __init__(self, levels: Mapping[str, int | str], default: int | str) -> None:
+        super().__init__()
+        self.default = (
+            logging.getLevelName(default) if isinstance(default, str) else default
+        )
+        self.levels = {
+            name: logging.getLevelName(level) if isinstance(level, str) else level
+            for name, level in levels.items()
+        }
+        self._cache: dict[str, int] = {}
+
+    def level_for(self, name: str) -> int:
+        level = self._cache.get(name)
+        if level is None:
+            level = self.default
+            parts = name.split(".")
+            for i in range(len(parts), 0, -1):
+                prefix = ".".join(parts[:i])
+                if prefix in self.levels:
+                    level = self.levels[prefix]
+                    break
+            self._cache[name] = level
+        return level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= self.level_for(record.name)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per message template (``record.msg``, before formatting), so
+    a message repeated for every request is kept at ``rate`` per second after
+    an initial ``burst``. The next record let through carries the number that
+    were suppressed in between as ``record.suppressed``. Warnings and above
+    are never limited.
+    """
+
+    def __init__(self, rate: float, burst: int = 10) -> None:
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[tuple[str, Any], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            # [tokens, last refill, suppressed since last pass]
+            bucket = self._buckets.setdefault(key, [float(self.burst), now, 0])
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = int(bucket[2]), 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class _DeferredQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener lives in this process, so the record is handed over as
+        # is and formatted on the listener thread
+        return record
+
+
+class _SessionRouter(logging.Handler):
+    """Sends records to the session of the spider that logged them, else to all."""
+
+    def __init__(self, formatter: logging.Formatter) -> None:
+        super().__init__()
+        self.formatter = formatter
+        self.handlers: dict[str, SessionLoggingHandler] = {}
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        context = getattr(getattr(record, "spider", None), "session_context", None)
+        handler = self.handlers.get(getattr(context, "session_id", ""))
+        targets = [handler] if handler else list(self.handlers.values())
+        for target in targets:
+            target.handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.handle(record)
+
+
+class SessionLogInterceptor:
+    """
+    Copies ``logger_names`` records into session events.
+
+    One instance per process: the queue handler is attached once, whatever
+    number of sessions ``register``, and comes off again when the last one
+    ``unregister``\\s. Records are filtered on the logging thread and
+    formatted into events on a listener thread.
+    """
+
+    _instance: Optional[SessionLogInterceptor] = None
+    _lock = threading.Lock()
+
+    def __init__(
+        self,
+        logger_names: tuple[str, ...] = ("scrapy",),
+        levels: Mapping[str, int | str] = {},
+        default_level: int | str = logging.DEBUG,
+        rate: Optional[float] = None,
+        burst: int = 10,
+    ) -> None:
+        self.logger_names = logger_names
+        self.queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        self.queue_handler = _DeferredQueueHandler(self.queue)
+        self.queue_handler.addFilter(LoggerLevelFilter(levels, default_level))
+        if rate is not None:
+            self.queue_handler.addFilter(RateLimitFilter(rate, burst))
+        self.router = _SessionRouter(
+            logging.Formatter(DEFAULT_FORMAT, datefmt=DEFAULT_DATEFMT)
+        )
+        self.listener = QueueListener(self.queue, self.router)
+
+    @classmethod
+    def register(cls, context: SessionContext, **config: Any) -> SessionLogInterceptor:
+        """Start copying logs into ``context``; ``config`` applies on first use."""
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls(**config)
+                cls._instance._start()
+            interceptor = cls._instance
+            handler = SessionLoggingHandler(context)
+            handler.setFormatter(interceptor.router.formatter)
+            interceptor.router.handlers[context.session_id] = handler
+            return interceptor
+
+    @classmethod
+    def unregister(cls, context: SessionContext) -> None:
+        """Stop copying logs into ``context``; pending records are written first."""
+        with cls._lock:
+            interceptor = cls._instance
+            if interceptor is None:
+                return
+            last = set(interceptor.router.handlers) <= {context.session_id}
+            if last:
+                cls._instance = None
+                interceptor._detach()
+            interceptor.listener.stop()  # drains the queue
+            interceptor.router.handlers.pop(context.session_id, None)
+            if not last:
+                interceptor.listener.start()
+
+    def _start(self) -> None:
+        self.listener.start()
+        for name in self.logger_names:
+            logging.getLogger(name).addHandler(self.queue_handler)
+
+    def _detach(self) -> None:
+        for name in self.logger_names:
+            logging.getLogger(name).removeHandler(self.queue_handler)
@@ -0,0 +1,193 @@
+from __future__ import annotations
+import json
+import os
+from bisect import bisect_left
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Optional, Sequence
+
+Labels = tuple[tuple[str, str], ...]
+
+# Upper bounds, in the unit observed; the last bucket is unbounded
+DEFAULT_BUCKETS: tuple[float, ...] = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+# Milliseconds, from sub-millisecond parsing up to slow downloads
+LATENCY_BUCKETS_MS: tuple[float, ...] = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500,
+    1000, 2500, 5000, 10000, 30000, 60000,
+)  # fmt: skip
+QUANTILES: tuple[float, ...] = (0.5, 0.95, 0.99)
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+    def snapshot(self) -> int:
+        return self.value
+
+
+class Gauge:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value: float = 0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def snapshot(self) -> float:
+        return self.value
+
+
+class Histogram:
+    """Counts of observations per fixed bucket, plus their count and sum."""
+
+    __slots__ = ("bounds", "counts", "count", "sum", "max")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estimate, interpolating linearly inside the bucket it falls in."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                if i == len(self.bounds):
+                    return self.max
+                low = self.bounds[i - 1] if i else 0.0
+                high = min(self.bounds[i], self.max)
+                return low + (high - low) * (rank - seen) / n
+            seen += n
+        return self.max
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else 0.0,
+            **{f"p{round(q * 100)}": self.quantile(q) for q in QUANTILES},
+            "max": self.max,
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "buckets": [*self.bounds, "+Inf"],
+            "counts": list(self.counts),
+            "count": self.count,
+            "sum": self.sum,
+        }
+
+
+Metric = Counter | Gauge | Histogram
+
+
+class MetricsRegistry:
+    """
+    Named counters, gauges and histograms, each split by labels such as
+    ``node``, ``extractor`` or ``processor``.
+
+    Metrics are created on first use and kept in a dict keyed by name and
+    labels, so an update is a lookup and an add. Not thread-safe: update it
+    from the reactor thread.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[tuple[str, Labels], Metric] = {}
+
+    def counter(self, name: str, **labels: str) -> Counter:
+        return self._get(name, labels, Counter)
+
+    def gauge(self, name: str, **labels: str) -> Gauge:
+        return self._get(name, labels, Gauge)
+
+    def histogram(
+        self, name: str, buckets: Sequence[float] = DEFAULT_BUCKETS, **labels: str
+    ) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            metric = self._metrics[key] = Histogram(buckets)
+        assert isinstance(metric, Histogram), f"{name} is not a histogram"
+        return metric
+
+    def timing(self, name: str, start: float, **labels: str) -> None:
+        """Observe the milliseconds since ``start`` (a ``perf_counter()``)."""
+        elapsed = (perf_counter() - start) * 1000
+        self.histogram(name, LATENCY_BUCKETS_MS, **labels).observe(elapsed)
+
+    def _get(self, name: str, labels: dict[str, str], kind: type[Any]) -> Any:
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            metric = self._metrics[key] = kind()
+        assert isinstance(metric, kind), f"{name} is not a {kind.__name__.lower()}"
+        return metric
+
+    def __len__(self) -> int:
+        return len(self._metrics)
+
+    def update(self, other: MetricsRegistry) -> None:
+        """Take over ``other``'s metrics, e.g. those of a checkpoint."""
+        self._metrics.update(other._metrics)
+
+    def items(self) -> list[tuple[str, Labels, Metric]]:
+        return [(name, labels, m) for (name, labels), m in self._metrics.items()]
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-ready view: ``{kind: {name: [{"labels", "value"}, ...]}}``."""
+        out: dict[str, dict[str, list[dict[str, Any]]]] = {}
+        for name, labels, metric in sorted(
+            self.items(), key=lambda entry: (entry[0], entry[1])
+        ):
+            kind = type(metric).__name__.lower()
+            out.setdefault(kind, {}).setdefault(name, []).append(
+                {"labels": dict(labels), "value": metric.snapshot()}
+            )
+        return out
+
+    def summary(self) -> dict[str, Any]:
+        """Counters and gauges as values, histograms as count/mean/percentiles."""
+        out: dict[str, list[dict[str, Any]]] = {}
+        for name, labels, metric in sorted(
+            self.items(), key=lambda entry: (entry[0], entry[1])
+        ):
+            value = (
+                metric.summary() if isinstance(metric, Histogram) else metric.snapshot()
+            )
+            out.setdefault(name, []).append({**dict(labels), "value": value})
+        return out
+
+    def write_snapshot(
+        self, path: Path, extra: Optional[dict[str, Any]] = None
+    ) -> None:
+        """Replace ``path`` with the current snapshot, atomically."""
+        data = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            **(extra or {}),
+            "metrics": self.snapshot(),
+        }
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data, indent=2, default=str), encoding="utf-8")
+        os.replace(tmp, path)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+import json
+import signal
+import sys
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Any, Optional
+
+Stack = tuple[CodeType, ...]
+
+
+class SamplingProfiler:
+    """
+    Statistical CPU profiler for the whole process.
+
+    ``SIGPROF`` fires every ``interval`` seconds of CPU time and the handler
+    counts the main thread's stack (where the reactor runs). Nothing is hooked
+    between samples, so the default 100 Hz costs well under 1% of a crawl.
+    Needs ``SIGPROF``, so Unix only, and must be started from the main thread.
+    """
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 128) -> None:
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: dict[Stack, int] = {}
+        self.samples = 0
+        self._previous: Any = None
+
+    @staticmethod
+    def available() -> bool:
+        return hasattr(signal, "SIGPROF") and hasattr(signal, "setitimer")
+
+    def start(self) -> None:
+        if not self.available():
+            raise RuntimeError("The sampling profiler needs SIGPROF (Unix only)")
+        self._previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous or signal.SIG_DFL)
+
+    def _sample(self, signum: int, frame: Optional[FrameType]) -> None:
+        codes: list[CodeType] = []
+        while frame is not None and len(codes) < self.max_depth:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        stack = tuple(reversed(codes))
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        """Collapsed stacks, root first: the input of flamegraph.pl and friends."""
+        counts: dict[str, int] = {}
+        for stack, count in self.stacks.items():
+            line = ";".join(frame_name(code) for code in stack)
+            counts[line] = counts.get(line, 0) + count
+        return "".join(f"{line} {count}\n" for line, count in sorted(counts.items()))
+
+    def speedscope(self, name: str = "crawl") -> dict[str, Any]:
+        """The stacks as a speedscope "sampled" profile, weighted in seconds."""
+        frames: dict[CodeType, int] = {}
+        samples: list[list[int]] = []
+        weights: list[float] = []
+        for stack, count in self.stacks.items():
+            samples.append([frames.setdefault(code, len(frames)) for code in stack])
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {
+                "frames": [
+                    {
+                        "name": getattr(code, "co_qualname", code.co_name),
+                        "file": short_path(code.co_filename),
+                        "line": code.co_firstlineno,
+                    }
+                    for code in frames
+                ]
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+            "name": name,
+            "exporter": "toy_catalogue",
+        }
+
+    def write(self, directory: Path, name: str = "profile") -> list[Path]:
+        """Write ``<name>.folded`` and ``<name>.speedscope.json`` to ``directory``."""
+        folded = directory / f"{name}.folded"
+        folded.write_text(self.folded(), encoding="utf-8")
+        speedscope = directory / f"{name}.speedscope.json"
+        speedscope.write_text(json.dumps(self.speedscope(name)), encoding="utf-8")
+        return [folded, speedscope]
+
+
+def short_path(filename: str) -> str:
+    # Relative to the longest sys.path entry containing it, like a module path
+    prefixes = [p for p in sys.path if p and filename.startswith(p.rstrip("/") + "/")]
+    if not prefixes:
+        return filename
+    return filename[len(max(prefixes, key=len).rstrip("/")) + 1 :]
+
+
+def frame_name(code: CodeType) -> str:
+    name = getattr(code, "co_qualname", code.co_name)
+    # ";" separates frames in the folded format
+    return f"{name} ({short_path(code.co_filename)}:{code.co_firstlineno})".replace(
+        ";", ":"
+    )
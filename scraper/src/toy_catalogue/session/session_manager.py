@@ -5,8 +5,12 @@ from pydantic import BaseModel, PrivateAttr
 
 from toy_catalogue.config.schema.external.schema import SiteConfig
 from toy_catalogue.config.parameters import SESSION_BASE_DIR
+from .event_sink import EventSink, EventSinkConfig
+from .metrics import MetricsRegistry
 from datetime import datetime, timezone
-import json
+import threading
+
+_SINK_LOCK = threading.Lock()
 
 
 class SessionMeta(BaseModel):
@@ -16,19 +20,39 @@ class SessionMeta(BaseModel):
     timestamp: datetime
     config: SiteConfig
     tags: list[str] = []
+    # Stem of the config file or resource, e.g. vulcanhobby_sitemap; several
+    # configs can crawl one site
+    config_name: Optional[str] = None
+    # Scrapy's close reason, set when the crawl ends; "finished" if it ran out
+    finish_reason: Optional[str] = None
     item_count: Optional[int] = None
+    # Per download slot concurrency the adaptive controller settled on
+    concurrency_limits: Optional[dict[str, int]] = None
     parent_session_id: Optional[str] = None
 
+    def dump_json(self, indent: Optional[int] = None) -> str:
+        # Extractor params are typed by their base class; serialise the actual
+        # subclass, under the aliases validation expects, so the meta loads back
+        return self.model_dump_json(indent=indent, by_alias=True, serialize_as_any=True)
+
 
 class SessionContext(BaseModel):
     session_id: str
     session_dir: Path
     meta: SessionMeta
+    # Set in each of several processes crawling the session together
+    worker: Optional[str] = None
 
-    _events: list[dict[str, Any]] = PrivateAttr()
+    _sink: Optional[EventSink] = PrivateAttr(default=None)
+    _sink_config: EventSinkConfig = PrivateAttr(default_factory=EventSinkConfig)
+    _metrics: MetricsRegistry = PrivateAttr(default_factory=MetricsRegistry)
 
-    def model_post_init(self, __context: Any) -> None:
-        self._events = []
+    def __getstate__(self) -> dict[Any, Any]:
+        # The sink owns a writer thread; a copy in another process opens its own
+        state = super().__getstate__()
+        private = state.get("__pydantic_private__") or {}
+        state["__pydantic_private__"] = {**private, "_sink": None}
+        return state
 
     def record_success(self, source: str, msg: str, extra: dict[str, Any] = {}) -> None:
         self.record_event("success", source, {"message": msg, **extra})
@@ -46,21 +70,67 @@ class SessionContext(BaseModel):
     def record_event(
         self, event_type: str, source: str, details: dict[str, Any]
     ) -> None:
-        self._events.append(
-            {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "type": event_type,
-                "source": source,
-                "details": details,
-            }
+        event = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "type": event_type,
+            "source": source,
+            "details": details,
+        }
+        while True:
+            try:
+                self.event_sink.put(event)
+                return
+            except RuntimeError:
+                # Closed by flush_events since we took it; the next reopens
+                continue
+
+    def for_worker(self, worker: str) -> SessionContext:
+        """Context for one worker process, writing under ``workers/<worker>``."""
+        context = SessionContext(
+            session_id=self.session_id,
+            session_dir=self.session_dir,
+            meta=self.meta,
+            worker=worker,
         )
+        context.output_dir.mkdir(parents=True, exist_ok=True)
+        return context
+
+    @property
+    def output_dir(self) -> Path:
+        """Where this process writes its events, metrics and reports."""
+        if self.worker is None:
+            return self.session_dir
+        return self.session_dir / "workers" / self.worker
+
+    @property
+    def metrics(self) -> MetricsRegistry:
+        return self._metrics
+
+    @property
+    def metrics_path(self) -> Path:
+        return self.output_dir / "metrics.json"
+
+    @property
+    def summary_path(self) -> Path:
+        return self.output_dir / "summary.json"
+
+    @property
+    def event_sink(self) -> EventSink:
+        with _SINK_LOCK:
+            if self._sink is None:
+                self._sink = EventSink(self.output_dir, self._sink_config)
+            return self._sink
+
+    def configure_events(self, config: EventSinkConfig) -> None:
+        self.flush_events()
+        self._sink_config = config
 
     def flush_events(self) -> None:
-        event_path = self.session_dir / "events.jsonl"
-        with open(event_path, "a", encoding="utf-8") as f:
-            for event in self._events:
-                f.write(json.dumps(event) + "\n")
-        self._events.clear()
+        """Write out buffered events and stop the writer until the next event."""
+        with _SINK_LOCK:
+            sink, self._sink = self._sink, None
+        if sink is not None:
+            sink.close()
 
     @property
     def product_path(self) -> Path:
@@ -68,12 +138,16 @@ class SessionContext(BaseModel):
 
     @property
     def log_path(self) -> Path:
-        return self.session_dir / "log.txt"
+        return self.output_dir / "log.txt"
 
     @property
     def job_dir(self) -> Path:
         return self.session_dir / "jobdir"
 
+    @property
+    def item_index_path(self) -> Path:
+        return self.output_dir / "items.sqlite"
+
 
 class SessionManager:
     INDEX_FILE = SESSION_BASE_DIR / "index.jsonl"
@@ -85,6 +159,7 @@ class SessionManager:
         mode: str,
         tags: list[str] = [],
         parent_session_id: Optional[str] = None,
+        config_name: Optional[str] = None,
     ) -> SessionContext:
         now = datetime.now(timezone.utc)
         now_str = now.strftime("%Y-%m-%dT%H-%M-%S")
@@ -100,14 +175,15 @@ class SessionManager:
             timestamp=now,
             config=config,
             tags=tags,
+            config_name=config_name,
             parent_session_id=parent_session_id,
         )
 
         with open(session_dir / "meta.json", "w", encoding="utf-8") as f:
-            f.write(meta.model_dump_json(indent=2))
+            f.write(meta.dump_json(indent=2))
 
         with open(cls.INDEX_FILE, "a", encoding="utf-8") as index:
-            index.write(meta.model_dump_json() + "\n")
+            index.write(meta.dump_json() + "\n")
 
         return SessionContext(session_id=session_id, session_dir=session_dir, meta=meta)
 
@@ -121,6 +197,15 @@ class SessionManager:
         with open(meta_path, encoding="utf-8") as f:
             return SessionMeta.model_validate_json(f.read())
 
+    @classmethod
+    def open_session(cls, session_id: str) -> SessionContext:
+        """Context for an existing session, e.g. to add workers to its crawl."""
+        return SessionContext(
+            session_id=session_id,
+            session_dir=cls.get_session_dir(session_id),
+            meta=cls.load_session_meta(session_id),
+        )
+
     @classmethod
     def update_session_meta(cls, session_id: str, patch: dict[str, Any]) -> None:
         meta_path = cls.get_session_dir(session_id) / "meta.json"
@@ -130,7 +215,7 @@ class SessionManager:
         updated_meta = meta.model_copy(update=patch)
 
         with open(meta_path, "w", encoding="utf-8") as f:
-            f.write(updated_meta.model_dump_json(indent=2))
+            f.write(updated_meta.dump_json(indent=2))
 
         # Optionally also update the index file (if you’re querying it regularly)
 
@@ -138,6 +223,67 @@ class SessionManager:
     def record_item_count(cls, session_id: str, count: int) -> None:
         cls.update_session_meta(session_id, {"item_count": count})
 
+    @classmethod
+    def record_finish_reason(cls, session_id: str, reason: str) -> None:
+        cls.update_session_meta(session_id, {"finish_reason": reason})
+
+    @classmethod
+    def latest_session(
+        cls, site: str, config_name: Optional[str] = None
+    ) -> Optional[SessionMeta]:
+        """
+        The latest session of ``site`` that finished, from the config
+        ``config_name`` if given; crashed, stopped and running ones are
+        skipped.
+        """
+        filters: dict[str, Any] = {"site": site}
+        if config_name is not None:
+            filters["config_name"] = config_name
+        for meta in sorted(
+            cls.list_sessions(filters), key=lambda m: m.timestamp, reverse=True
+        ):
+            try:
+                current = cls.load_session_meta(meta.session_id)
+            except FileNotFoundError:
+                continue
+            if current.finish_reason == "finished":
+                return current
+        return None
+
+    @classmethod
+    def record_concurrency_limits(cls, session_id: str, limits: dict[str, int]) -> None:
+        cls.update_session_meta(session_id, {"concurrency_limits": limits})
+
+    @classmethod
+    def previous_item_count(
+        cls, site: str, config_name: Optional[str] = None
+    ) -> Optional[int]:
+        """Items scraped by the latest finished session of ``site``."""
+        latest = cls.latest_session(site, config_name)
+        return latest.item_count if latest else None
+
+    @classmethod
+    def previous_concurrency_limits(cls, site: str) -> Optional[dict[str, int]]:
+        """Concurrency per download slot learned by the latest session of ``site``."""
+        limits: Optional[dict[str, int]] = cls._latest_recorded(
+            site, "concurrency_limits"
+        )
+        return limits
+
+    @classmethod
+    def _latest_recorded(cls, site: str, field: str) -> Any:
+        # The index only holds metadata as it was at creation time
+        for meta in sorted(
+            cls.list_sessions({"site": site}), key=lambda m: m.timestamp, reverse=True
+        ):
+            try:
+                value = getattr(cls.load_session_meta(meta.session_id), field)
+            except FileNotFoundError:
+                continue
+            if value is not None:
+                return value
+        return None
+
     @classmethod
     def list_sessions(
         cls, filters: Optional[dict[str, Any]] = None
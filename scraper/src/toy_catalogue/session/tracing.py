@@ -0,0 +1,171 @@
+from __future__ import annotations
+import json
+import struct
+import time
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from scrapy.http import Request
+
+
+class Phase(IntEnum):
+    SCHEDULED = 0
+    PROXY = 1
+    DOWNLOAD_START = 2
+    DOWNLOADED = 3
+    PARSE_START = 4
+    PARSED = 5
+    SAVED = 6
+    # Key holds the reactor lag in nanoseconds instead of a fingerprint
+    REACTOR_STALL = 7
+
+
+# Name of the span that ends at each phase, from the phase before it
+SPAN_NAMES: dict[Phase, str] = {
+    Phase.DOWNLOAD_START: "queued",
+    Phase.DOWNLOADED: "download",
+    Phase.PARSE_START: "awaiting parse",
+    Phase.PARSED: "parse",
+    Phase.SAVED: "pipeline",
+}
+INSTANT_PHASES = {Phase.SCHEDULED: "scheduled", Phase.PROXY: "proxy assigned"}
+
+# (key, phase, monotonic ns): 17 bytes a mark
+MARK = struct.Struct("<qBq")
+# Request meta holding the key of the request's timeline
+TRACE_KEY = "trace_key"
+
+
+def trace_key(fingerprint: bytes) -> int:
+    return int.from_bytes(fingerprint[:8], "little", signed=True)
+
+
+class Tracer:
+    """
+    Per-request timeline recorder.
+
+    Each mark is packed into a single ``bytearray`` under a key taken from
+    the request fingerprint and carried in ``request.meta``, so tracing costs
+    17 bytes per mark instead of a dict per span. Marks past ``max_bytes``
+    are counted and dropped.
+    """
+
+    # The tracer of the running crawl; hooks outside the extension mark through it
+    current: Optional[Tracer] = None
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_urls: int = 100_000):
+        self.buffer = bytearray()
+        self.max_bytes = max_bytes
+        self.max_urls = max_urls
+        self.urls: dict[int, str] = {}
+        self.dropped = 0
+        self.origin_ns = time.monotonic_ns()
+
+    def schedule(self, request: Request, fingerprint: bytes) -> None:
+        """Start ``request``'s timeline with its scheduled mark."""
+        previous: Optional[int] = request.meta.get(TRACE_KEY)
+        if previous is None:
+            key = trace_key(fingerprint)
+        else:
+            # A retry or re-send copied its key from the first attempt; each
+            # attempt gets a timeline of its own (the next key, in 64 bits)
+            key = (previous + 1 + 2**63) % 2**64 - 2**63
+        request.meta[TRACE_KEY] = key
+        if len(self.urls) < self.max_urls:
+            self.urls.setdefault(key, request.url)
+        self._append(key, Phase.SCHEDULED, time.monotonic_ns())
+
+    def mark(self, request: Request, phase: Phase) -> None:
+        """Add ``phase`` to the timeline of a request seen by ``schedule``."""
+        key: Optional[int] = request.meta.get(TRACE_KEY)
+        if key is not None:
+            self._append(key, phase, time.monotonic_ns())
+
+    def stall(self, lag_ns: int) -> None:
+        self._append(lag_ns, Phase.REACTOR_STALL, time.monotonic_ns() - lag_ns)
+
+    def _append(self, key: int, phase: Phase, ns: int) -> None:
+        if len(self.buffer) + MARK.size > self.max_bytes:
+            self.dropped += 1
+            return
+        self.buffer += MARK.pack(key, phase, ns)
+
+    def __len__(self) -> int:
+        return len(self.buffer) // MARK.size
+
+    def marks(self) -> Iterator[tuple[int, Phase, int]]:
+        for key, phase, ns in MARK.iter_unpack(self.buffer):
+            yield key, Phase(phase), ns
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """
+        Chrome trace-event / Perfetto JSON. Requests are packed onto as few
+        lanes as possible, so overlapping lanes show real concurrency, and
+        reactor stalls get a lane of their own.
+        """
+        timelines: dict[int, list[tuple[int, Phase]]] = {}
+        stalls: list[tuple[int, int]] = []
+        for key, phase, ns in self.marks():
+            if phase == Phase.REACTOR_STALL:
+                stalls.append((ns, key))
+            else:
+                timelines.setdefault(key, []).append((ns, phase))
+
+        def us(ns: int) -> float:
+            return (ns - self.origin_ns) / 1000
+
+        events: list[dict[str, Any]] = [
+            {"ph": "M", "pid": 1, "name": "process_name", "args": {"name": "crawl"}},
+            {
+                "ph": "M",
+                "pid": 1,
+                "tid": 0,
+                "name": "thread_name",
+                "args": {"name": "reactor"},
+            },
+        ]
+        for start, lag in stalls:
+            events.append(
+                {"ph": "X", "pid": 1, "tid": 0, "name": "reactor stall",
+                 "ts": us(start), "dur": lag / 1000}
+            )  # fmt: skip
+
+        lanes_free_at: list[int] = []
+        for key, marks in sorted(timelines.items(), key=lambda kv: min(kv[1])):
+            marks.sort()
+            first, last = marks[0][0], marks[-1][0]
+            lane = next((i for i, t in enumerate(lanes_free_at) if t <= first), None)
+            if lane is None:
+                lane = len(lanes_free_at)
+                lanes_free_at.append(last)
+            lanes_free_at[lane] = last
+            tid = lane + 1
+            args = {"url": self.urls.get(key, f"{key & 0xFFFFFFFFFFFFFFFF:016x}")}
+            for (prev_ns, _), (ns, phase) in zip(marks, marks[1:]):
+                if phase in SPAN_NAMES:
+                    events.append(
+                        {"ph": "X", "pid": 1, "tid": tid, "name": SPAN_NAMES[phase],
+                         "ts": us(prev_ns), "dur": (ns - prev_ns) / 1000, "args": args}
+                    )  # fmt: skip
+            for ns, phase in marks:
+                if phase in INSTANT_PHASES:
+                    events.append(
+                        {"ph": "i", "s": "t", "pid": 1, "tid": tid,
+                         "name": INSTANT_PHASES[phase], "ts": us(ns), "args": args}
+                    )  # fmt: skip
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"marks": len(self), "dropped": self.dropped},
+        }
+
+    def export(self, path: Path) -> None:
+        path.write_text(json.dumps(self.chrome_trace()), encoding="utf-8")
+
+
+def mark(request: Optional[Request], phase: Phase) -> None:
+    """Record ``phase`` for ``request`` if a crawl is being traced."""
+    tracer = Tracer.current
+    if tracer is not None and request is not None:
+        tracer.mark(request, phase)
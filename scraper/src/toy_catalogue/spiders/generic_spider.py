@@ -1,17 +1,19 @@
 from __future__ import annotations
 from scrapy.spiders import Spider
-from scrapy.http import Request
+from scrapy.http import Request, Response
 from urllib.parse import urlparse
 from typing import AsyncGenerator, Any, TYPE_CHECKING
 from scrapy import signals, Item
+from scrapy.exceptions import DontCloseSpider
 from scrapy.crawler import Crawler
-import logging
 
-from toy_catalogue.utils.url import canonicalise_url
 from toy_catalogue.engine.crawl import build_strategy
 from toy_catalogue.engine.graph import build_traversal_graph
 from toy_catalogue.config.schema.external.schema import StrategyConfig
-from toy_catalogue.session.log_intercepter import SessionLoggingHandler
+from toy_catalogue.session.event_sink import EventSinkConfig
+from toy_catalogue.session.log_intercepter import SessionLogInterceptor
+from toy_catalogue.session.session_manager import SessionManager
+from toy_catalogue.session.tracing import Phase, mark as trace
 
 if TYPE_CHECKING:
     from toy_catalogue.session.session_manager import SessionContext
@@ -23,8 +25,8 @@ class GenericSpider(Spider):
     name = "generic"
 
     session_context: SessionContext
-    seen_urls: set[str] = set()
-    check_point_data: dict[str, str] = {}
+    check_point_data: dict[str, str]
+    resumed: bool
     strategy: BaseCrawlStrategy
     parse_methods: list[str]
     items_scraped: dict[type[Item], int]
@@ -38,19 +40,12 @@ class GenericSpider(Spider):
 
         # Sessioning
         self.session_context = context
-        handler = SessionLoggingHandler(self.session_context)
-        # intercept scrapy logs
-        formatter = logging.Formatter(
-            "[%(asctime)sZ] %(levelname)s: %(message)s", datefmt="%Y-%m-%dT%H:%M:%S"
-        )
-        handler.setFormatter(formatter)
-
-        logger = logging.getLogger("scrapy")
-        logger.addHandler(handler)
+        self.check_point_data = {}
+        self.resumed = False
 
         # Traversal
         mode_config = StrategyConfig.model_validate(
-            {"name": context.meta.mode, "params": {}}
+            {"name": context.meta.mode, "params": context.meta.config.strategy}
         )
         traversal_graph = build_traversal_graph(context.meta.config.traversal)
         self.strategy = build_strategy(mode_config, traversal_graph, context)
@@ -66,35 +61,69 @@ class GenericSpider(Spider):
         spider = super().from_crawler(crawler, *args, **kwargs)
         spider.logger.info("from_crawler called")
         crawler.signals.connect(spider.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(spider.spider_idle, signal=signals.spider_idle)
+        crawler.signals.connect(spider.engine_stopped, signal=signals.engine_stopped)
+        spider.strategy.bind_crawler(crawler)
+        spider.session_context.configure_events(
+            EventSinkConfig.from_settings(crawler.settings)
+        )
+        # intercept scrapy logs
+        settings = crawler.settings
+        SessionLogInterceptor.register(
+            spider.session_context,
+            levels=settings.getdict("LOG_SESSION_LEVELS"),
+            default_level=settings.get("LOG_SESSION_LEVEL", "DEBUG"),
+            rate=settings.getfloat("LOG_SESSION_RATE") or None,
+            burst=settings.getint("LOG_SESSION_BURST", 10),
+        )
         return spider
 
     def add_meta_processors(self, processers: list[BasePostProcessor]) -> None:
         self.strategy.add_meta_processors(processers)
 
     async def start(self) -> AsyncGenerator[Request, None]:
+        if self.resumed:
+            # The checkpoint's pending requests replace the start URLs
+            return
         for url, method in zip(self.start_urls, self.parse_methods):
-            yield Request(
-                url,
-                callback=self.strategy.make_callback(),
-                meta={"callback": method},
-            )
+            yield self.strategy.make_request(url, method)
+
+    def parse(self, response: Response, **kwargs: Any) -> list[Any]:
+        # Single dispatch point for every request; the node to run is taken
+        # from response.meta["callback"] by the strategy.
+        trace(response.request, Phase.PARSE_START)
+        outputs = self.strategy.handle_response(response)
+        trace(response.request, Phase.PARSED)
+        return outputs
+
+    def spider_idle(self, spider: Spider) -> None:
+        # Strategies may hold requests back (e.g. a capped frontier); hand
+        # them to the engine instead of letting the crawl finish early.
+        requests = self.strategy.on_idle()
+        for request in requests:
+            self.crawler.engine.crawl(request)
+        if requests:
+            raise DontCloseSpider
 
     def on_item_saved(self, item: Item) -> None:
         ...
 
-    def _should_follow(self, urls: list[str]) -> list[str]:
-        result: list[str] = []
-        for link in urls:
-            url = canonicalise_url(link)
-            if url not in self.seen_urls:
-                self.seen_urls.add(url)
-                result.append(url)
-        return result
+    def engine_stopped(self) -> None:
+        # Extensions still record events from their own spider_closed
+        # handlers, so the sink is only closed once the engine has stopped
+        SessionLogInterceptor.unregister(self.session_context)
+        self.session_context.flush_events()
 
-    def spider_closed(self, spider: Spider) -> None:
+    def spider_closed(self, spider: Spider, reason: str) -> None:
         # This will be called when the spider is closed
-        # self.state["checkpoint"] = self.checkpoint_data
-        self.session_context.flush_events()
+        self.strategy.close()
+        # A shared crawl's workers each count part; their parent sums them
+        if self.crawler.stats is not None and self.session_context.worker is None:
+            SessionManager.record_item_count(
+                self.session_context.session_id,
+                self.crawler.stats.get_value("item_scraped_count", 0),
+            )
+            SessionManager.record_finish_reason(self.session_context.session_id, reason)
         self.logger.info("Spider closed: %s", spider.name)
         # duration = datetime.now(timezone.utc) - self.start_time
         # hours, remainder = divmod(int(duration.total_seconds()), 3600)
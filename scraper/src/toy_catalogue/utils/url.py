@@ -1,11 +1,32 @@
-from urllib.parse import urlparse, urlunparse
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 import hashlib
 from pathlib import Path
 
+# Query parameters that select different content rather than a view of it;
+# a crawl adds those its extractors page through (see significant_query_params)
+SIGNIFICANT_QUERY_PARAMS: frozenset[str] = frozenset({"page"})
 
-def canonicalise_url(url: str) -> str:
+
+def canonicalise_url(
+    url: str, significant: frozenset[str] = SIGNIFICANT_QUERY_PARAMS
+) -> str:
     parsed = urlparse(url)
-    return urlunparse(parsed._replace(query=""))
+    kept = sorted(
+        (k, v)
+        for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k in significant
+    )
+    return urlunparse(parsed._replace(query=urlencode(kept)))
+
+
+def url_fingerprint(
+    url: str, significant: frozenset[str] = SIGNIFICANT_QUERY_PARAMS
+) -> int:
+    """Signed 64-bit fingerprint of the canonical form of ``url``."""
+    digest = hashlib.blake2b(
+        canonicalise_url(url, significant).encode("utf-8"), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "big", signed=True)
 
 
 def generate_id(url: str) -> str:
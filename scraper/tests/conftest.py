@@ -0,0 +1,29 @@
+import types
+from toy_catalogue.session.metrics import MetricsRegistry
+import pytest
+from pathlib import Path
+
+
+def make_session(session_dir: Path, session_id: str = "session", parent=None):
+    session_dir.mkdir(parents=True, exist_ok=True)
+    return types.SimpleNamespace(
+        session_id=session_id,
+        session_dir=session_dir,
+        output_dir=session_dir,
+        item_index_path=session_dir / "items.sqlite",
+        meta=types.SimpleNamespace(parent_session_id=parent),
+        record_success=lambda **kw: None,
+        record_error=lambda **kw: None,
+        record_event=lambda **kw: None,
+        metrics=MetricsRegistry(),
+    )
+
+
+@pytest.fixture(name="make_session")
+def make_session_fixture():
+    return make_session
+
+
+@pytest.fixture
+def session(tmp_path: Path):
+    return make_session(tmp_path / "session")
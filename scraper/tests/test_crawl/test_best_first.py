@@ -0,0 +1,126 @@
+from datetime import datetime, timezone
+
+from scrapy.http import HtmlResponse, Request
+from toy_catalogue.config.schema.external.schema import GraphSchema
+from toy_catalogue.engine.crawl import StrategyConfig, build_strategy
+from toy_catalogue.engine.graph import build_traversal_graph
+from toy_catalogue.session.checkpoint import (
+    Checkpoint,
+    checkpoint_path,
+    load_checkpoint,
+    write_checkpoint,
+)
+
+GRAPH = {
+    "collection": [
+        {
+            "extractors": [
+                {"class": "link_extractor", "params": {"restrict_css": ["a.next"]}}
+            ],
+            "callbacks": ["collection"],
+        },
+        {
+            "extractors": [
+                {"class": "link_extractor", "params": {"allow": ["/products/"]}}
+            ],
+            "callbacks": ["product"],
+        },
+    ],
+    "product": [],
+}
+
+HTML = b"""
+<html><body>
+  <a class="next" href="/collections/all?page=2">Next</a>
+  <a href="/products/a">A</a><a href="/products/b">B</a><a href="/products/c">C</a>
+</body></html>
+"""
+
+
+def make_strategy(session, **params):
+    graph = build_traversal_graph(GraphSchema.model_validate(GRAPH))
+    config = StrategyConfig(
+        name="best_first",
+        params={"priorities": {"product": 2, "collection": 1}, **params},
+    )
+    return build_strategy(config, graph, session)
+
+
+def collection_response() -> HtmlResponse:
+    request = Request(
+        "http://example.com/collections/all", meta={"callback": "collection"}
+    )
+    return HtmlResponse(url=request.url, body=HTML, request=request)
+
+
+def test_requests_are_prioritised_by_node(session) -> None:
+    strategy = make_strategy(session)
+    requests = [
+        o
+        for o in strategy.handle_response(collection_response())
+        if isinstance(o, Request)
+    ]
+    priorities = {r.meta["callback"]: r.priority for r in requests}
+    assert priorities == {"collection": 1000, "product": 2000}
+
+
+def test_full_frontier_holds_back_lower_ranked_nodes(session, monkeypatch) -> None:
+    strategy = make_strategy(session, frontier_limit=2)
+    monkeypatch.setattr(strategy, "frontier_size", lambda: 0)
+    outputs = strategy.handle_response(collection_response())
+    requests = [o for o in outputs if isinstance(o, Request)]
+
+    # Products are top-ranked and always go out; the next collection page waits
+    assert [r.meta["callback"] for r in requests] == ["product"] * 3
+    assert [r.url for r in strategy.on_idle()] == [
+        "http://example.com/collections/all?page=2"
+    ]
+    assert strategy.on_idle() == []
+
+
+def test_checkpoint_restores_seen_set_and_held_back_requests(
+    session, make_session, tmp_path, monkeypatch
+) -> None:
+    strategy = make_strategy(session, frontier_limit=2)
+    monkeypatch.setattr(strategy, "frontier_size", lambda: 0)
+    strategy.handle_response(collection_response())
+    path = checkpoint_path(tmp_path / "jobdir")
+    checkpoint = Checkpoint(
+        created_at=datetime.now(timezone.utc),
+        requests=[],
+        strategy=strategy.checkpoint_state(),
+        spider={},
+        stats={"item_scraped_count": 3},
+        metrics=session.metrics,
+    )
+    write_checkpoint(path, checkpoint)
+    assert not path.with_suffix(".pickle.tmp").exists()
+
+    loaded = load_checkpoint(path)
+    assert loaded is not None and loaded.stats == {"item_scraped_count": 3}
+    resumed = make_strategy(make_session(tmp_path / "resumed"), frontier_limit=2)
+    resumed.restore_state(loaded.strategy)
+    assert "http://example.com/products/a" in resumed.seen
+    released = resumed.on_idle()
+    assert [(r.url, r.meta["callback"], r.priority) for r in released] == [
+        ("http://example.com/collections/all?page=2", "collection", 1000)
+    ]
+
+
+def test_held_back_requests_spill_to_the_scheduler_past_the_cap(
+    session, monkeypatch
+) -> None:
+    strategy = make_strategy(session, frontier_limit=2, deferred_limit=2)
+    monkeypatch.setattr(strategy, "frontier_size", lambda: 2)
+    for n in range(3):
+        request = Request(
+            f"http://example.com/collections/all?page={n}",
+            meta={"callback": "collection"},
+            priority=1000 + n,
+        )
+        strategy._deferred.append((-request.priority, n, request))
+    spilled = strategy._spill()
+
+    # The best is kept back; the rest are scheduled below every rank
+    assert [r.url[-1] for r in strategy.on_idle()] == ["2"]
+    assert [(r.url[-1], r.priority) for r in spilled] == [("1", -1999), ("0", -2000)]
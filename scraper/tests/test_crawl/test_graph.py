@@ -0,0 +1,50 @@
+from scrapy.http import TextResponse
+from toy_catalogue.config.schema.external.schema import GraphSchema
+from toy_catalogue.engine.graph import build_traversal_graph
+
+HTML = b"""
+<html><body>
+  <a class="next" href="/collections/all?page=2">Next</a>
+  <a href="/products/a">A</a>
+  <div class="media"><img src="/a.jpg"/><img src="/b.jpg"/></div>
+</body></html>
+"""
+
+GRAPH = {
+    "collection": [
+        {
+            "extractors": [
+                {"class": "link_extractor", "params": {"restrict_css": ["a.next"]}}
+            ],
+            "callbacks": ["collection", "archive"],
+        },
+        {
+            "extractors": [
+                {
+                    "class": "css_getall",
+                    "params": {"selectors": ["div.media img"], "attrs": ["src"]},
+                }
+            ],
+            "callbacks": ["image"],
+        },
+    ],
+    "image": [],
+}
+
+
+def test_identical_extractors_are_shared_between_edges() -> None:
+    graph = build_traversal_graph(GraphSchema.model_validate(GRAPH))
+    plan = graph["collection"]
+    assert len(plan.extractors) == 2
+    assert plan.next_nodes() == ["collection", "archive", "image"]
+    assert not graph["image"]
+
+
+def test_plan_runs_every_edge_against_one_response() -> None:
+    graph = build_traversal_graph(GraphSchema.model_validate(GRAPH))
+    response = TextResponse(url="http://example.com/collections/all", body=HTML)
+    assert graph["collection"].run(response) == [
+        ("collection", ["http://example.com/collections/all?page=2"]),
+        ("archive", ["http://example.com/collections/all?page=2"]),
+        ("image", ["http://example.com/a.jpg", "http://example.com/b.jpg"]),
+    ]
@@ -0,0 +1,76 @@
+import time
+import pytest
+from scrapy.http import HtmlResponse, Request
+from toy_catalogue.config.schema.external.schema import GraphSchema
+from toy_catalogue.engine.crawl import StrategyConfig, build_strategy
+from toy_catalogue.engine.graph import build_traversal_graph
+from toy_catalogue.session import session_manager
+from toy_catalogue.session.item_index import ItemIndex
+
+GRAPH = {
+    "collection": [
+        {
+            "extractors": [
+                {"class": "link_extractor", "params": {"allow": ["/products/"]}}
+            ],
+            "callbacks": ["product"],
+        }
+    ],
+    "product": [],
+}
+
+HTML = b'<a href="/products/old">Old</a><a href="/products/stale">Stale</a>'
+HTML += b'<a href="/products/new">New</a>'
+
+
+@pytest.fixture
+def parent(tmp_path, monkeypatch, make_session):
+    monkeypatch.setattr(session_manager, "SESSION_BASE_DIR", tmp_path)
+    parent = make_session(tmp_path / "parent", session_id="parent")
+    index = ItemIndex(parent.item_index_path, session_id="parent")
+    index.record("http://example.com/products/old", "product")
+    index.record("http://example.com/products/stale", "product", time.time() - 7200)
+    index.close()
+    return parent
+
+
+def crawl_collection(session, **params):
+    graph = build_traversal_graph(GraphSchema.model_validate(GRAPH))
+    config = StrategyConfig(
+        name="incremental", params={"ttl": {"product": 3600}, **params}
+    )
+    strategy = build_strategy(config, graph, session)
+    request = Request("http://example.com/all", meta={"callback": "collection"})
+    response = HtmlResponse(url=request.url, body=HTML, request=request)
+    outputs = strategy.handle_response(response)
+    return strategy, [o for o in outputs if isinstance(o, Request)]
+
+
+def test_fresh_urls_are_skipped(parent, tmp_path, make_session) -> None:
+    session = make_session(tmp_path / "child", "child", parent="parent")
+    strategy, requests = crawl_collection(session)
+    assert [r.url for r in requests] == [
+        "http://example.com/products/stale",
+        "http://example.com/products/new",
+    ]
+    assert strategy.skipped == 1
+
+    # The skipped item stays indexed so the next run can chain from this one
+    assert strategy.index.get("http://example.com/products/old").session_id == "parent"
+    strategy.close()
+
+
+def test_fresh_urls_can_be_deprioritized(parent, tmp_path, make_session) -> None:
+    session = make_session(tmp_path / "child", "child", parent="parent")
+    strategy, requests = crawl_collection(session, fresh="deprioritize")
+    priorities = {r.url.rsplit("/", 1)[1]: r.priority for r in requests}
+    assert priorities == {"old": -1000, "stale": 0, "new": 0}
+    strategy.close()
+
+
+def test_missing_parent_crawls_everything(tmp_path, monkeypatch, make_session) -> None:
+    monkeypatch.setattr(session_manager, "SESSION_BASE_DIR", tmp_path)
+    session = make_session(tmp_path / "child", "child", parent="gone")
+    strategy, requests = crawl_collection(session)
+    assert len(requests) == 3
+    strategy.close()
@@ -0,0 +1,36 @@
+import pickle
+import types
+from typing import Any
+from scrapy import Spider
+from scrapy.http import Response
+from scrapy.utils.request import request_from_dict
+from toy_catalogue.engine.crawl.base import BaseCrawlStrategy
+
+
+class DummySpider(Spider):
+    name = "dummy"
+
+    def parse(self, response: Response, **kwargs: Any) -> Any:
+        return []
+
+
+def test_strategy_requests_survive_disk_queue_round_trip() -> None:
+    strategy = BaseCrawlStrategy({}, session=types.SimpleNamespace())  # type: ignore[arg-type]
+    spider = DummySpider()
+    request = strategy.make_request("http://example.com/products/a", "product")
+
+    data = pickle.loads(pickle.dumps(request.to_dict(spider=spider), protocol=4))
+    restored = request_from_dict(data, spider=spider)
+
+    assert restored.url == request.url
+    assert restored.meta["callback"] == "product"
+    assert restored.callback is None  # dispatched through spider.parse
+
+
+def test_make_request_keeps_extra_meta() -> None:
+    strategy = BaseCrawlStrategy({}, session=types.SimpleNamespace())  # type: ignore[arg-type]
+    request = strategy.make_request(
+        "http://example.com/a", "image", meta={"save": {"parent": "p"}}, priority=5
+    )
+    assert request.meta == {"save": {"parent": "p"}, "callback": "image"}
+    assert request.priority == 5
@@ -0,0 +1,102 @@
+import pytest
+from toy_catalogue.engine.crawl.seen import (
+    SeenSetSchema,
+    build_seen_set,
+    url_fingerprint,
+)
+
+
+def build(session, name, **params):
+    return build_seen_set(
+        SeenSetSchema.model_validate({"class": name, "params": params}), session
+    )
+
+
+@pytest.mark.parametrize("name", ["memory", "bloom", "sqlite"])
+def test_add_reports_new_urls_only(session, name) -> None:
+    seen = build(session, name)
+    assert seen.add("http://example.com/products/a")
+    assert not seen.add("http://example.com/products/a")
+    assert seen.add("http://example.com/products/b")
+    assert "http://example.com/products/a" in seen
+    assert "http://example.com/products/c" not in seen
+    assert len(seen) == 2
+    seen.close()
+
+
+@pytest.mark.parametrize("name", ["memory", "bloom", "sqlite"])
+def test_urls_are_canonicalised(session, name) -> None:
+    seen = build(session, name)
+    assert seen.add("http://example.com/products/a?variant=1")
+    assert not seen.add("http://example.com/products/a?variant=2")
+    seen.close()
+
+
+def test_fingerprint_fits_signed_64_bits() -> None:
+    fp = url_fingerprint("http://example.com/products/a")
+    assert -(2**63) <= fp < 2**63
+
+
+def test_sqlite_state_survives_reopen(session) -> None:
+    seen = build(session, "sqlite", commit_every=1000)
+    for i in range(50):
+        seen.add(f"http://example.com/products/{i}")
+    seen.close()
+
+    reopened = build(session, "sqlite")
+    assert len(reopened) == 50
+    assert not reopened.add("http://example.com/products/7")
+    reopened.close()
+
+
+def test_persistent_bloom_survives_reopen(session) -> None:
+    seen = build(session, "bloom", capacity=1000, filename="seen.bloom")
+    for i in range(100):
+        seen.add(f"http://example.com/products/{i}")
+    seen.close()
+
+    reopened = build(session, "bloom", capacity=1000, filename="seen.bloom")
+    assert len(reopened) == 100
+    assert all(f"http://example.com/products/{i}" in reopened for i in range(100))
+    reopened.close()
+
+
+def test_persistent_bloom_rejects_different_parameters(session) -> None:
+    build(session, "bloom", capacity=1000, filename="seen.bloom").close()
+    with pytest.raises(ValueError):
+        build(session, "bloom", capacity=5000, filename="seen.bloom")
+
+
+def test_bloom_false_positive_rate_is_bounded(session) -> None:
+    seen = build(session, "bloom", capacity=2000, error_rate=0.01)
+    for i in range(2000):
+        seen.add(f"http://example.com/products/{i}")
+    false_positives = sum(f"http://example.com/other/{i}" in seen for i in range(2000))
+    assert false_positives / 2000 < 0.03
+
+
+def test_unknown_backend_raises(session) -> None:
+    with pytest.raises(ValueError):
+        build(session, "cuckoo")
+
+
+@pytest.mark.parametrize(
+    "name, params",
+    [
+        ("memory", {}),
+        ("bloom", {}),
+        ("bloom", {"filename": "seen.bloom"}),
+        ("sqlite", {}),
+    ],
+)
+def test_restore_drops_urls_added_after_checkpoint(session, name, params) -> None:
+    seen = build(session, name, **params)
+    seen.add("http://example.com/products/a")
+    state = seen.checkpoint()
+    seen.add("http://example.com/products/b")
+
+    seen.restore(state)
+    assert "http://example.com/products/a" in seen
+    assert "http://example.com/products/b" not in seen
+    assert len(seen) == 1
+    seen.close()
@@ -0,0 +1,88 @@
+import pytest
+from scrapy import Spider
+from scrapy.http import Request
+from scrapy.utils.request import RequestFingerprinter
+from toy_catalogue.engine.frontier import SharedFrontierScheduler
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeRedis()
+
+
+def worker(server, name: str, **kwargs) -> SharedFrontierScheduler:
+    scheduler = SharedFrontierScheduler(
+        server, "test:frontier", RequestFingerprinter(), worker_id=name, **kwargs
+    )
+    scheduler.open(Spider(name="generic"))
+    return scheduler
+
+
+def test_workers_share_queue_and_fingerprints(server) -> None:
+    a, b = worker(server, "a"), worker(server, "b")
+    assert a.enqueue_request(Request("http://example.com/p", meta={"callback": "p"}))
+    assert not b.enqueue_request(Request("http://example.com/p"))
+    assert len(a) == len(b) == 1
+
+    request = b.next_request()
+    assert request is not None
+    assert request.url == "http://example.com/p"
+    assert request.meta == {"callback": "p"}
+    assert a.next_request() is None
+
+
+def test_higher_priority_first_then_fifo(server) -> None:
+    a = worker(server, "a")
+    for path, priority in [("low", 0), ("high-1", 5), ("high-2", 5)]:
+        a.enqueue_request(Request(f"http://example.com/{path}", priority=priority))
+    order = [a.next_request().url.rsplit("/", 1)[1] for _ in range(3)]  # type: ignore[union-attr]
+    assert order == ["high-1", "high-2", "low"]
+
+
+def test_dont_filter_requests_bypass_fingerprints(server) -> None:
+    a = worker(server, "a")
+    assert a.enqueue_request(Request("http://example.com/"))
+    assert a.enqueue_request(Request("http://example.com/", dont_filter=True))
+
+
+def test_crawl_waits_for_busy_workers(server) -> None:
+    a, b = worker(server, "a", idle_grace=0), worker(server, "b", idle_grace=0)
+    a.enqueue_request(Request("http://example.com/"))
+    assert a.next_request() is not None
+
+    # a may still enqueue links found on the page it took
+    assert b.has_pending_requests()
+    assert not a.has_pending_requests()  # a's engine went idle
+    assert not b.has_pending_requests()
+
+
+def test_dead_workers_time_out(server) -> None:
+    a = worker(server, "a", idle_grace=0)
+    b = worker(server, "b", idle_grace=0, worker_timeout=-1)
+    a.enqueue_request(Request("http://example.com/"))
+    a.next_request()
+    assert not b.has_pending_requests()
+
+
+def test_long_busy_workers_keep_their_entry_fresh(server, monkeypatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr("time.time", lambda: now[0])
+    a = worker(server, "a", worker_timeout=100)
+    for n in range(30):
+        a.enqueue_request(Request(f"http://example.com/{n}"))
+    for _ in range(30):  # busy the whole time, taking a request every 5s
+        now[0] += 5
+        assert a.next_request() is not None
+        assert a.busy_workers() == ["a"]
+    # Written on the first pop, then once per tenth of the timeout
+    assert float(server.hget("test:frontier:busy", "a")) == 1140.0
+
+
+def test_close_releases_worker(server) -> None:
+    a, b = worker(server, "a", idle_grace=0), worker(server, "b", idle_grace=0)
+    a.enqueue_request(Request("http://example.com/"))
+    a.next_request()
+    a.close("finished")
+    assert b.busy_workers() == []
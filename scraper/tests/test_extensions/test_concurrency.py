@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+from scrapy import Request
+from scrapy.core.downloader import Slot
+from scrapy.utils.test import get_crawler
+
+from toy_catalogue.extensions.concurrency import (
+    AdaptiveConcurrencyExtension,
+    AimdController,
+)
+
+
+def fill(controller, key, n, status=200, latency=0.2, now=0.0):
+    for _ in range(n):
+        controller.observe(key, status, latency, now)
+
+
+def test_ramps_up_while_busy_and_healthy():
+    controller = AimdController(start=2, maximum=4)
+    for second in range(0, 30, 5):
+        fill(controller, "shop.com", 10)
+        controller.tick("shop.com", busy=True, now=second)
+    assert controller.limit("shop.com") == 4  # capped at maximum
+
+    fill(controller, "idle.com", 10)
+    assert controller.tick("idle.com", busy=False, now=0) == 0  # limit never binding
+    assert controller.tick("quiet.com", busy=True, now=0) == 0  # no responses
+
+
+def test_backs_off_on_429_once_per_interval():
+    controller = AimdController(start=8, interval=5)
+    assert controller.observe("shop.com", 429, 0.2, now=10)
+    assert controller.limit("shop.com") == 4
+    # The rest of the in-flight burst doesn't cut again
+    assert not controller.observe("shop.com", 429, 0.2, now=11)
+    assert controller.limit("shop.com") == 4
+    assert controller.observe("shop.com", 503, 0.2, now=16)
+    assert controller.limit("shop.com") == 2
+
+
+def test_backs_off_when_latency_rises():
+    controller = AimdController(start=8, latency_tolerance=1.5)
+    fill(controller, "shop.com", 10, latency=0.2)
+    controller.tick("shop.com", busy=True, now=0)
+    fill(controller, "shop.com", 10, latency=0.5)
+    assert controller.tick("shop.com", busy=True, now=10) == -1
+    assert controller.limit("shop.com") == 4  # 9 after the first window, halved
+
+
+def test_starts_from_learned_limits_within_bounds():
+    controller = AimdController(start=1, maximum=16, learned={"a.com": 6, "b.com": 99})
+    assert controller.limits() == {}
+    assert controller.limit("a.com") == 6
+    assert controller.limit("b.com") == 16
+    assert controller.limit("c.com") == 1
+
+
+def test_limit_sets_the_pace_over_autothrottle():
+    crawler = get_crawler(
+        settings_dict={
+            "ADAPTIVE_CONCURRENCY_ENABLED": True,
+            "AUTOTHROTTLE_ENABLED": True,
+            "CONCURRENT_REQUESTS_PER_DOMAIN": 2,
+        }
+    )
+    slot = Slot(concurrency=8, delay=5.0, jitter=0)
+    slot.queue.extend([object()] * 10)  # waiting out the delay, not the limit
+    crawler.engine = SimpleNamespace(  # type: ignore[assignment]
+        downloader=SimpleNamespace(slots={"shop.com": slot}, total_concurrency=16)
+    )
+    ext = AdaptiveConcurrencyExtension.from_crawler(crawler)
+    request = Request("https://shop.com/", meta={"download_slot": "shop.com"})
+    ext.request_reached_downloader(request, spider=None)  # type: ignore[arg-type]
+    assert request.meta["autothrottle_dont_adjust_delay"] is True
+    assert (slot.delay, slot.concurrency) == (0.0, 2)
+
+    fill(ext.controller, "shop.com", 10)
+    ext.tick()
+    assert slot.concurrency == 2  # queued but never at its limit
+    slot.transferring.update({object(), object()})
+    fill(ext.controller, "shop.com", 10)
+    ext.tick()
+    assert slot.concurrency == 3
@@ -0,0 +1,37 @@
+import types
+
+from toy_catalogue.extensions.watchdog import StallDetector, WatchdogExtension
+
+
+def test_detector_fires_once_per_stall_and_rearms():
+    detector = StallDetector(timeout=60, min_progress=5)
+    assert not detector.update(0, now=0)
+    assert not detector.update(3, now=30)  # below min_progress, window keeps running
+    assert detector.update(4, now=61)
+    assert not detector.update(4, now=120)  # already reported
+    assert not detector.update(10, now=130)  # progress re-arms
+    assert not detector.update(10, now=180)
+    assert detector.update(10, now=191)
+
+
+def test_stall_writes_report_and_event(session):
+    events = []
+    session.record_event = lambda *args: events.append(args)
+    stats = types.SimpleNamespace(get_stats=lambda: {"response_received_count": 7})
+    crawler = types.SimpleNamespace(engine=None, stats=stats)
+    ext = WatchdogExtension(crawler, StallDetector(60), interval=1, stop=False)
+    ext.spider = types.SimpleNamespace(session_context=session)
+
+    ext.on_stall()
+
+    report = (session.session_dir / "stall-1.txt").read_text()
+    assert "Progress (response_received_count + item_scraped_count): 7" in report
+    assert "Thread MainThread" in report
+    assert "test_stall_writes_report_and_event" in report
+    assert events == [
+        (
+            "stall_detected",
+            "watchdog",
+            {"seconds": events[0][2]["seconds"], "report": "stall-1.txt"},
+        )
+    ]
@@ -148,3 +148,53 @@ def test_duplicates_are_preserved():
         "http://example.com/duplicate.jpg",
         "http://example.com/duplicate.jpg",
     ]
+
+
+def test_batched_and_unbatched_getall_match(
+    response_with_mixed_elements: TextResponse,
+) -> None:
+    params = {
+        "selectors": ["img", "div.product", "script"],
+        "attrs": ["src", "data-src"],
+    }
+    batched = CssGetAllExtractor(CssParams.model_validate(params))
+    unbatched = CssGetAllExtractor(
+        CssParams.model_validate({**params, "batched": False})
+    )
+    assert sorted(batched.extract(response_with_mixed_elements)) == sorted(
+        unbatched.extract(response_with_mixed_elements)
+    )
+
+
+def test_batched_getall_reads_attrs_per_element(
+    response_with_mixed_elements: TextResponse,
+) -> None:
+    config = CssParams.model_validate(
+        {"selectors": ["img"], "attrs": ["src", "data-src"]}
+    )
+    result = CssGetAllExtractor(config).extract(response_with_mixed_elements)
+    assert result == [
+        "http://example.com/img1.jpg",
+        "http://example.com/fallback1.jpg",
+        "http://example.com/img2.jpg",
+    ]
+
+
+def test_batched_get_takes_first_match_per_attr(
+    response_with_mixed_elements: TextResponse,
+) -> None:
+    config = CssParams.model_validate(
+        {"selectors": ["img"], "attrs": ["src", "data-src"]}
+    )
+    result = CssGetExtractor(config).extract(response_with_mixed_elements)
+    assert result == ["http://example.com/img1.jpg", "http://example.com/fallback1.jpg"]
+
+
+def test_urls_are_joined_with_document_base() -> None:
+    html = b'<html><head><base href="http://cdn.example.com/media/"/></head>'
+    html += b'<body><img src="a.jpg"/></body></html>'
+    response = TextResponse(url="http://example.com/products/x", body=html)
+    config = CssParams.model_validate({"selectors": ["img"], "attrs": ["src"]})
+    assert CssGetAllExtractor(config).extract(response) == [
+        "http://cdn.example.com/media/a.jpg"
+    ]
@@ -0,0 +1,106 @@
+from scrapy.http import HtmlResponse, Request
+from toy_catalogue.config.schema.external.schema import GraphSchema
+from toy_catalogue.engine.crawl import BaseCrawlStrategy
+from toy_catalogue.engine.extractors.pagination import (
+    PaginationExtractor,
+    PaginationParams,
+)
+from toy_catalogue.engine.graph import build_traversal_graph
+
+BASE = "https://shop.example.com/collections/all"
+
+FIRST_PAGE = b"""
+<html><body>
+  <a href="/products/a">A</a>
+  <nav>
+    <a class="pagination__item" href="/collections/all?page=2">2</a>
+    <a class="pagination__item" href="/collections/all?page=3">3</a>
+    <span class="pagination__item">&hellip;</span>
+    <a class="pagination__item" href="/collections/all?page=6">6</a>
+  </nav>
+</body></html>
+"""
+FULL_PAGE = b'<html><body><a href="/products/a">A</a></body></html>'
+EMPTY_PAGE = b"<html><body><p>No products found</p></body></html>"
+
+
+def extract(params: dict, url: str, body: bytes) -> list[str]:
+    extractor = PaginationExtractor(PaginationParams.model_validate(params))
+    return extractor.extract(HtmlResponse(url=url, body=body))
+
+
+def pages(urls: list[str]) -> list[int]:
+    return [int(url.rsplit("page=", 1)[1]) for url in urls]
+
+
+def test_first_page_fans_out_to_last_page() -> None:
+    urls = extract({"last_page_css": ["a.pagination__item"]}, BASE, FIRST_PAGE)
+    assert pages(urls) == [2, 3, 4, 5, 6]
+    assert urls[0] == f"{BASE}?page=2"
+
+
+def test_later_pages_do_not_fan_out_again() -> None:
+    params = {"last_page_css": ["a.pagination__item"]}
+    assert extract(params, f"{BASE}?page=3", FIRST_PAGE) == []
+
+
+def test_probing_doubles_from_non_empty_pages() -> None:
+    params = {"item_css": ["a[href*='/products/']"]}
+    assert pages(extract(params, BASE, FULL_PAGE)) == [2]
+    assert pages(extract(params, f"{BASE}?page=4", FULL_PAGE)) == [5, 6, 7, 8]
+    assert extract(params, f"{BASE}?page=6", FULL_PAGE) == []
+    assert extract(params, f"{BASE}?page=8", EMPTY_PAGE) == []
+
+
+def test_probe_covers_listing_and_stops_past_the_end() -> None:
+    params = {"item_css": ["a[href*='/products/']"]}
+    last = 11
+    frontier, fetched = [BASE], []
+    while frontier:
+        url = frontier.pop()
+        fetched.append(url)
+        page = int(url.rsplit("page=", 1)[1]) if "page=" in url else 1
+        frontier += extract(params, url, FULL_PAGE if page <= last else EMPTY_PAGE)
+    assert sorted(pages(fetched[1:])) == list(range(2, 17))
+
+
+def test_known_last_page_caps_probing() -> None:
+    # Both shipped configs set both params: the widget's count must win
+    params = {
+        "last_page_css": ["a.pagination__item"],
+        "item_css": ["a[href*='/products/']"],
+    }
+    assert pages(extract(params, f"{BASE}?page=4", FIRST_PAGE)) == [5, 6]
+    frontier, fetched = [BASE], {BASE}
+    while frontier:
+        for url in extract(params, frontier.pop(), FIRST_PAGE):
+            if url not in fetched:
+                fetched.add(url)
+                frontier.append(url)
+    assert sorted(pages(list(fetched - {BASE}))) == [2, 3, 4, 5, 6]
+
+
+def test_max_pages_caps_fan_out() -> None:
+    params = {"last_page_css": ["a.pagination__item"], "max_pages": 4}
+    assert pages(extract(params, BASE, FIRST_PAGE)) == [2, 3, 4]
+
+
+def test_strategy_tells_pages_of_a_custom_param_apart(session) -> None:
+    extractor = {
+        "class": "pagination",
+        "params": {"param": "p", "last_page_css": ["a.pagination__item"]},
+    }
+    graph = build_traversal_graph(
+        GraphSchema.model_validate(
+            {"collection": [{"extractors": [extractor], "callbacks": ["collection"]}]}
+        )
+    )
+    strategy = BaseCrawlStrategy(graph, session)
+    request = Request(BASE, meta={"callback": "collection"})
+    body = FIRST_PAGE.replace(b"?page=", b"?p=")
+    outputs = strategy.process_node(HtmlResponse(BASE, body=body, request=request))
+    strategy.close()
+    # Canonicalisation would strip an unknown param, leaving one fingerprint
+    assert [o.url for o in outputs if isinstance(o, Request)] == [
+        f"{BASE}?p={n}" for n in range(2, 7)
+    ]
@@ -0,0 +1,143 @@
+import json
+import threading
+import urllib.request
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+from scrapy.http import Request, TextResponse
+from toy_catalogue.config.schema.external.schema import GraphSchema
+from toy_catalogue.engine.crawl.base import BaseCrawlStrategy
+from toy_catalogue.engine.extractors import Record
+from toy_catalogue.engine.extractors.shopify import (
+    ShopifyParams,
+    ShopifyProductsExtractor,
+)
+from toy_catalogue.engine.graph import build_traversal_graph
+from toy_catalogue.processing.items import RecordItem
+
+LIMIT = 2
+CATALOGUE = [
+    {
+        "handle": f"kit-{n}",
+        "title": f"Kit {n}",
+        "images": [{"src": f"//cdn.example.com/kit-{n}-{i}.jpg"} for i in range(2)],
+    }
+    for n in range(3)
+]
+
+
+class StandInShop(BaseHTTPRequestHandler):
+    """Serves ``/products.json`` pages the way a Shopify store does."""
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path != "/products.json":
+            self.send_error(404)
+            return
+        query = parse_qs(url.query)
+        limit = int(query.get("limit", ["30"])[0])
+        page = int(query.get("page", ["1"])[0])
+        body = json.dumps(
+            {"products": CATALOGUE[(page - 1) * limit : page * limit]}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+@pytest.fixture(scope="module")
+def shop() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInShop)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    thread.join()
+
+
+def fetch(url: str, node: str = "catalogue") -> TextResponse:
+    with urllib.request.urlopen(url) as resp:
+        return TextResponse(
+            url=url,
+            body=resp.read(),
+            headers={"Content-Type": resp.headers["Content-Type"]},
+            request=Request(url, meta={"callback": node}),
+        )
+
+
+def extract(emit: str, response: TextResponse) -> list:
+    params = ShopifyParams(emit=emit, limit=LIMIT)  # type: ignore[arg-type]
+    return ShopifyProductsExtractor(params).extract(response)
+
+
+def test_pages_follow_until_a_short_page(shop: str) -> None:
+    url = f"{shop}/products.json?limit={LIMIT}&page=1"
+    pages = []
+    while url:
+        pages.append(url)
+        next_pages = extract("pages", fetch(url))
+        url = next_pages[0] if next_pages else ""
+    assert [p.rsplit("page=", 1)[1] for p in pages] == ["1", "2"]
+
+
+def test_products_and_images_come_straight_from_json(shop: str) -> None:
+    response = fetch(f"{shop}/products.json?limit={LIMIT}&page=1")
+
+    records = extract("products", response)
+    assert records == [
+        Record(f"{shop}/products/kit-0", CATALOGUE[0]),
+        Record(f"{shop}/products/kit-1", CATALOGUE[1]),
+    ]
+    images = extract("images", response)
+    assert images[:2] == [
+        "http://cdn.example.com/kit-0-0.jpg",
+        "http://cdn.example.com/kit-0-1.jpg",
+    ]
+    assert len(images) == 4
+
+
+def test_strategy_turns_records_into_items(shop: str, session) -> None:
+    graph = build_traversal_graph(
+        GraphSchema.model_validate(
+            {
+                "catalogue": [
+                    {
+                        "extractors": [
+                            {
+                                "class": "shopify_products",
+                                "params": {"emit": "pages", "limit": LIMIT},
+                            }
+                        ],
+                        "callbacks": ["catalogue"],
+                    },
+                    {
+                        "extractors": [
+                            {"class": "shopify_products", "params": {"limit": LIMIT}}
+                        ],
+                        "callbacks": ["product"],
+                    },
+                ],
+                "product": [],
+            }
+        )
+    )
+    strategy = BaseCrawlStrategy(graph, session)
+    response = fetch(f"{shop}/products.json?limit={LIMIT}&page=1")
+
+    outputs = strategy.process_node(response)
+    again = strategy.process_node(response)
+    strategy.close()
+
+    records = [o for o in outputs if isinstance(o, RecordItem)]
+    assert [r.state for r in records] == ["product", "product"]
+    assert json.loads(records[0].content) == CATALOGUE[0]
+    assert [o.url for o in outputs if isinstance(o, Request)] == [
+        f"{shop}/products.json?limit={LIMIT}&page=2"
+    ]
+    assert not [o for o in again if isinstance(o, (RecordItem, Request))]
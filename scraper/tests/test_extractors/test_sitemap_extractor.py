@@ -0,0 +1,80 @@
+import gzip
+import pytest
+from scrapy.http import Response, XmlResponse
+from toy_catalogue.engine.extractors.sitemap import SitemapExtractor, SitemapParams
+
+INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://shop.example.com/sitemap_products_1.xml?from=1&amp;to=9</loc></sitemap>
+  <sitemap><loc>https://shop.example.com/sitemap_pages_1.xml</loc></sitemap>
+</sitemapindex>
+"""
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://shop.example.com/</loc></url>
+  <url>
+    <loc>https://shop.example.com/products/old-kit</loc>
+    <lastmod>2023-01-05T10:00:00-05:00</lastmod>
+  </url>
+  <url>
+    <loc>https://shop.example.com/products/new-kit</loc>
+    <lastmod>2025-06-01T10:00:00Z</lastmod>
+  </url>
+  <url><loc>https://shop.example.com/products/undated-kit</loc></url>
+</urlset>
+"""
+
+
+def extract(params: dict, body: bytes, url: str = "https://shop.example.com/s.xml"):
+    extractor = SitemapExtractor(SitemapParams.model_validate(params))
+    return extractor.extract(XmlResponse(url=url, body=body))
+
+
+def test_index_yields_matching_child_sitemaps() -> None:
+    urls = extract({"entries": "sitemap", "allow": ["sitemap_products_"]}, INDEX)
+    assert urls == ["https://shop.example.com/sitemap_products_1.xml?from=1&to=9"]
+
+
+def test_urlset_yields_allowed_locations() -> None:
+    urls = extract({"allow": ["/products/"]}, URLSET)
+    assert urls == [
+        "https://shop.example.com/products/old-kit",
+        "https://shop.example.com/products/new-kit",
+        "https://shop.example.com/products/undated-kit",
+    ]
+
+
+def test_entries_of_the_other_kind_are_ignored() -> None:
+    assert extract({"entries": "sitemap"}, URLSET) == []
+    assert extract({}, INDEX) == []
+
+
+def test_lastmod_filter_keeps_recent_and_undated() -> None:
+    urls = extract({"allow": ["/products/"], "modified_since": "2024-01-01"}, URLSET)
+    assert urls == [
+        "https://shop.example.com/products/new-kit",
+        "https://shop.example.com/products/undated-kit",
+    ]
+
+
+def test_gzipped_sitemap_is_streamed() -> None:
+    response = Response(
+        url="https://shop.example.com/s.xml.gz", body=gzip.compress(URLSET)
+    )
+    extractor = SitemapExtractor(SitemapParams.model_validate({"deny": ["/products/"]}))
+    assert extractor.extract(response) == ["https://shop.example.com/"]
+
+
+@pytest.mark.parametrize("body", [b"", b"<html><body>not a sitemap</body></html>"])
+def test_malformed_sitemaps_yield_nothing(body: bytes) -> None:
+    assert extract({}, body) == []
+
+
+def test_truncated_sitemap_keeps_entries_read_before_the_cut() -> None:
+    cut = URLSET.index(b"<url>", URLSET.index(b"old-kit"))
+    urls = extract({}, URLSET[:cut])
+    assert urls == [
+        "https://shop.example.com/",
+        "https://shop.example.com/products/old-kit",
+    ]
@@ -1,7 +1,11 @@
+import inspect
 import types
 import pytest
 import requests
+from twisted.internet.defer import Deferred, succeed
+from twisted.internet.task import Clock
 from toy_catalogue.middlewares import JhaoProxyMiddleware  # adjust import path
+from toy_catalogue.middlewares import ProxyScoreboard, _TwistedProxyClient
 import random
 
 
@@ -99,10 +103,11 @@ def test_first_request_uses_cached_proxy(mw):
     assert r.meta["proxy"].startswith("http://")
 
 
-def test_rotates_on_429_and_bans(mw):
-    """A 429 response should trigger a retry *and* ban the old proxy."""
+def test_429_cools_proxy_down_then_bans(mw):
+    """A 429 should trigger a retry and sit the proxy out; repeated ones ban it."""
     middleware, client = mw
     spider = DummySpider()
+    middleware.scoreboard.max_strikes = 2
 
     # ➊ First request assigns a proxy
     req1 = DummyRequest()
@@ -115,6 +120,10 @@ def test_rotates_on_429_and_bans(mw):
     # ➌ Assertions
     assert isinstance(retry_req, DummyRequest)  # a new request is returned
     assert "proxy" not in retry_req.meta  # it has no proxy yet
+    assert client.banned == []  # only sits out a cooldown
+    assert first_proxy not in middleware.scoreboard.available()
+
+    middleware.process_response(req1, DummyResponse(status=429), spider)
     assert first_proxy.replace("http://", "") in client.banned
 
 
@@ -133,3 +142,181 @@ def test_refresh_interval_forces_second_fetch(mw):
     # ➌ Any new request should now use the refreshed cache
     middleware.process_request(DummyRequest(), spider)
     assert client.fetch_calls == 2
+
+
+def test_cold_pool_defers_request_instead_of_blocking():
+    """While a refill is pending, requests wait on it without blocking."""
+    pending = Deferred()
+
+    class SlowClient(MockProxyClient):
+        def fetch_batch(self, limit=50):
+            self.fetch_calls += 1
+            return pending
+
+    client = SlowClient()
+    middleware = JhaoProxyMiddleware(proxy_client=client)
+    spider = DummySpider()
+
+    waits = [middleware.process_request(DummyRequest(), spider) for _ in range(2)]
+    assert all(inspect.iscoroutine(w) for w in waits)
+    assert client.fetch_calls == 1  # one refill shared by both requests
+    for w in waits:
+        w.close()
+
+    pending.callback(["http://1.1.1.1:8000", "http://2.2.2.2:9000"])
+    r = DummyRequest()
+    assert middleware.process_request(r, spider) is None
+    assert r.meta["proxy"] in {"http://1.1.1.1:8000", "http://2.2.2.2:9000"}
+
+
+def test_low_water_refills_in_background():
+    """Below the low-water mark the pool is topped up without making anyone wait."""
+    pending = Deferred()
+
+    class SlowClient(MockProxyClient):
+        def fetch_batch(self, limit=50):
+            if self.fetch_calls:
+                self.fetch_calls += 1
+                return pending
+            return super().fetch_batch(limit)
+
+    client = SlowClient()
+    middleware = JhaoProxyMiddleware(proxy_client=client)
+    middleware.LOW_WATER = 4  # one more than the mock pool holds
+    spider = DummySpider()
+    middleware._refresh_cache(spider, force=True)
+
+    middleware._last_attempt -= middleware.MIN_REFILL_INTERVAL + 1
+    r = DummyRequest()
+    assert middleware.process_request(r, spider) is None  # served from the pool
+    assert "proxy" in r.meta
+    assert client.fetch_calls == 2  # and the refill started behind it
+
+    # The proxy banned while the refill was in flight is left out of the batch
+    middleware._ban_proxy(r.meta["proxy"])
+    pending.callback([r.meta["proxy"], "http://4.4.4.4:8000"])
+    assert r.meta["proxy"] not in middleware.scoreboard
+    assert "http://4.4.4.4:8000" in middleware.scoreboard
+
+
+def test_connection_errors_cool_down_before_banning(mw):
+    middleware, client = mw
+    spider = DummySpider()
+    middleware.scoreboard.max_strikes = 2
+    r = DummyRequest()
+    middleware.process_request(r, spider)
+    proxy = r.meta["proxy"]
+
+    middleware.process_exception(r, TimeoutError(), spider)
+    assert client.banned == []  # only sits out a cooldown
+    assert proxy in middleware.scoreboard
+    assert proxy not in middleware.scoreboard.available()
+
+    middleware.process_exception(r, TimeoutError(), spider)
+    assert client.banned == [proxy.replace("http://", "")]
+    assert proxy not in middleware.scoreboard
+
+
+def test_scoreboard_prefers_healthy_proxies_and_sticks_per_domain():
+    now = [0.0]
+    board = ProxyScoreboard(cooldown=10, sticky=True, clock=lambda: now[0])
+    board.add(["http://fast", "http://slow", "http://flaky"])
+    for _ in range(20):
+        board.success("http://fast", latency=0.1)
+        board.success("http://slow", latency=3.0)
+        board.success("http://flaky", latency=0.1)
+        board.failure("http://flaky")
+        now[0] += 100  # let the cooldown lapse
+    assert board.cost("http://fast") < board.cost("http://slow")
+    assert board.cost("http://slow") < board.cost("http://flaky")
+
+    random.seed(1)
+    picks = [board.choose() for _ in range(900)]
+    # Two distinct draws, cheaper one wins: shares of 2/3, 1/3 and none
+    assert 500 < picks.count("http://fast") < 700
+    assert "http://flaky" not in picks
+
+    proxy = board.choose("example.com")
+    assert all(board.choose("example.com") == proxy for _ in range(10))
+    board.failure(proxy)
+    assert proxy not in board.available()  # cooling down, so not handed out
+    assert board.choose("example.com") != proxy
+
+
+def test_scoreboard_spreads_one_domain_over_the_pool_by_default():
+    board = ProxyScoreboard()
+    board.add([f"http://proxy-{n}" for n in range(4)])
+    random.seed(1)
+    assert len({board.choose("example.com") for _ in range(100)}) == 4
+
+
+def test_twisted_client_coalesces_bans():
+    clock = Clock()
+    client = _TwistedProxyClient("http://pool", {}, reactor=clock)
+    sent = []
+    client._get = lambda path, params: sent.append(params["proxy"]) or succeed(b"")
+
+    for ip_port in ("1.1.1.1:8000", "2.2.2.2:9000", "1.1.1.1:8000"):
+        client.ban(ip_port)
+    assert sent == []  # ban() returns at once
+
+    clock.advance(client.BAN_DELAY)
+    assert sent == ["1.1.1.1:8000", "2.2.2.2:9000"]
+    assert client.bans_sent == 2
+
+
+def test_empty_pool_waits_on_rate_limited_refills():
+    """An API with no proxies is asked once per interval, not once per request."""
+    clock = Clock()
+
+    class EmptyClient(MockProxyClient):
+        def fetch_batch(self, limit=50):
+            self.fetch_calls += 1
+            return [f"http://{p}" for p in self.pool] if self.fetch_calls > 2 else []
+
+    client = EmptyClient()
+    middleware = JhaoProxyMiddleware(proxy_client=client, reactor=clock)
+    spider = DummySpider()
+    requests_ = [DummyRequest() for _ in range(100)]
+    waits = [middleware.process_request(r, spider) for r in requests_]
+    assert all(inspect.iscoroutine(w) for w in waits)
+    assert client.fetch_calls == 1
+    assert not any("proxy" in r.meta for r in requests_)  # none sent direct
+
+    done = []
+    for w in waits:
+        Deferred.fromCoroutine(w).addCallback(done.append)
+    clock.advance(middleware.MIN_REFILL_INTERVAL)
+    assert client.fetch_calls == 2  # still empty; everyone waits again
+    assert not done
+    clock.advance(middleware.MIN_REFILL_INTERVAL)
+    assert client.fetch_calls == 3
+    assert len(done) == 100
+    assert all("proxy" in r.meta for r in requests_)
+
+
+def test_exhausted_pool_waits_for_cooldowns_not_direct():
+    """With every proxy cooling down, requests wait for the first to come back."""
+    clock = Clock()
+    client = MockProxyClient()
+    board = ProxyScoreboard(cooldown=2, clock=clock.seconds)
+    middleware = JhaoProxyMiddleware(
+        proxy_client=client, scoreboard=board, reactor=clock
+    )
+    spider = DummySpider()
+    middleware.process_request(DummyRequest(), spider)
+    for proxy in board.available():
+        flagged = DummyRequest()
+        flagged.meta["proxy"] = proxy
+        middleware.process_response(flagged, DummyResponse(status=429), spider)
+    assert board.next_available() == 2
+
+    r = DummyRequest()
+    done = []
+    Deferred.fromCoroutine(middleware.process_request(r, spider)).addCallback(
+        done.append
+    )
+    assert "proxy" not in r.meta  # not sent direct
+    clock.advance(2)
+    assert done and r.meta["proxy"] in board
+    assert client.fetch_calls == 1  # the cooldown ended before a refill was due
@@ -0,0 +1,169 @@
+import json
+from pathlib import Path
+import pytest
+from toy_catalogue.config.schema.external.schema import SiteConfig
+from toy_catalogue.scripts.run_spiders import (
+    BatchJob,
+    BatchResult,
+    format_summary,
+    longest_first,
+    merge_worker_indexes,
+    merge_worker_summaries,
+    resolve_site_configs,
+)
+from toy_catalogue.session import session_manager
+from toy_catalogue.session.item_index import ItemIndex
+from toy_catalogue.session.session_manager import SessionManager
+from toy_catalogue.spiders.generic_spider import GenericSpider
+
+CONFIG = {
+    "site": "example",
+    "start_urls": {"collection": "https://example.com/collections/all"},
+    "traversal": {
+        "collection": [
+            {
+                "extractors": [
+                    {"class": "pagination", "params": {"item_css": ["a.product"]}}
+                ],
+                "callbacks": ["collection"],
+            }
+        ]
+    },
+    "processors": {},
+}
+
+
+@pytest.fixture
+def sessions(tmp_path: Path, monkeypatch) -> type[SessionManager]:
+    monkeypatch.setattr(session_manager, "SESSION_BASE_DIR", tmp_path)
+    monkeypatch.setattr(SessionManager, "INDEX_FILE", tmp_path / "index.jsonl")
+    return SessionManager
+
+
+def job(name: str, expected: int | None) -> BatchJob:
+    return BatchJob(session=name, expected_items=expected)  # type: ignore[arg-type]
+
+
+def test_longest_jobs_first_and_unknown_sizes_before_them() -> None:
+    jobs = [job("small", 10), job("new", None), job("big", 5000), job("mid", 300)]
+    assert [j.session for j in longest_first(jobs)] == ["new", "big", "mid", "small"]
+
+
+def test_resolve_site_names_and_globs(tmp_path: Path) -> None:
+    (tmp_path / "a.json").write_text("{}")
+    (tmp_path / "b.json").write_text("{}")
+    paths = resolve_site_configs(["vulcanhobby", str(tmp_path / "*.json")])
+    assert [p.name for p in paths] == ["vulcanhobby.json", "a.json", "b.json"]
+    with pytest.raises(Exception, match="nosuchsite"):
+        resolve_site_configs(["nosuchsite"])
+
+
+def test_previous_item_count_reads_latest_finished_session(sessions) -> None:
+    config = SiteConfig.model_validate(CONFIG)
+    assert sessions.previous_item_count("example") is None
+
+    first = sessions.create_session(config, "fresh", ["one"], config_name="shop")
+    sessions.record_item_count(first.session_id, 120)
+    sessions.record_finish_reason(first.session_id, "finished")
+    stopped = sessions.create_session(config, "fresh", ["two"], config_name="shop")
+    sessions.record_item_count(stopped.session_id, 15)  # partial
+    sessions.record_finish_reason(stopped.session_id, "shutdown")
+    sessions.create_session(config, "fresh", ["three"])  # never finished
+
+    assert sessions.previous_item_count("example") == 120
+    assert sessions.previous_item_count("example", "shop") == 120
+    assert sessions.previous_item_count("example", "sitemap") is None
+    # Session meta round-trips, extractor params included
+    assert sessions.latest_session("example").config == config  # type: ignore[union-attr]
+
+
+def test_latest_session_is_finished_and_from_the_same_config(sessions) -> None:
+    config = SiteConfig.model_validate(CONFIG)
+
+    def crawl(tag: str, name: str, reason: str | None) -> str:
+        session = sessions.create_session(config, "fresh", [tag], config_name=name)
+        if reason is not None:
+            sessions.record_finish_reason(session.session_id, reason)
+        return session.session_id
+
+    shopify = crawl("a", "example_shopify", "finished")
+    sitemap = crawl("b", "example_sitemap", "finished")
+    crawl("c", "example_shopify", "shutdown")  # interrupted
+    crawl("d", "example_shopify", None)  # crashed, or still running
+
+    latest = sessions.latest_session("example", "example_shopify")
+    assert latest is not None and latest.session_id == shopify
+    assert latest.finish_reason == "finished"
+    assert sessions.latest_session("example").session_id == sitemap  # type: ignore[union-attr]
+    assert sessions.latest_session("example", "example_other") is None
+
+
+def test_previous_concurrency_limits_skip_sessions_without_them(sessions) -> None:
+    config = SiteConfig.model_validate(CONFIG)
+    first = sessions.create_session(config, mode="fresh", tags=["one"])
+    sessions.record_concurrency_limits(first.session_id, {"example.com": 6})
+    sessions.create_session(config, mode="fresh", tags=["two"])  # controller off
+
+    assert sessions.previous_concurrency_limits("example") == {"example.com": 6}
+    assert sessions.previous_concurrency_limits("other") is None
+
+
+def test_summary_table_lines_up() -> None:
+    table = format_summary(
+        [
+            BatchResult("vulcanhobby", "s1", 1234, 61.2, "finished"),
+            BatchResult("gunnzo", "s2", 7, 3.0, "error: boom"),
+        ]
+    )
+    header, rule, *rows = table.splitlines()
+    assert header.split() == ["site", "session", "items", "time", "status"]
+    assert rows[0].split() == ["vulcanhobby", "s1", "1234", "61s", "finished"]
+    assert header.index("items") == rows[0].index("1234") == rows[1].index("7")
+
+
+def test_spider_state_is_per_instance(sessions) -> None:
+    config = SiteConfig.model_validate(CONFIG)
+    a = GenericSpider(context=sessions.create_session(config, "fresh", tags=["a"]))
+    b = GenericSpider(context=sessions.create_session(config, "fresh", tags=["b"]))
+    a.check_point_data["page"] = "3"
+    assert b.check_point_data == {}
+    assert a.strategy.seen is not b.strategy.seen
+    a.strategy.close()
+    b.strategy.close()
+
+
+def test_workers_write_apart_and_parent_merges(sessions) -> None:
+    config = SiteConfig.model_validate(CONFIG)
+    session = sessions.create_session(config, "fresh")
+    for name, items in [("a", 3), ("b", 4)]:
+        worker = session.for_worker(name)
+        worker.record_success(source="test", msg=name)
+        worker.flush_events()
+        worker.summary_path.write_text(json.dumps({"items": items, "responses": 9}))
+    assert (session.session_dir / "workers" / "a" / "events.jsonl").exists()
+    assert not (session.session_dir / "events.jsonl").exists()
+
+    summary = merge_worker_summaries(session)
+    assert (summary["items"], summary["responses"]) == (7, 18)
+    assert json.loads(session.summary_path.read_text())["workers"].keys() == {"a", "b"}
+    meta = sessions.load_session_meta(session.session_id)
+    assert (meta.item_count, meta.finish_reason) == (7, "unknown")
+
+
+def test_worker_indexes_merge_into_the_session(sessions) -> None:
+    config = SiteConfig.model_validate(CONFIG)
+    session = sessions.create_session(config, "fresh")
+    workers = [session.for_worker(name) for name in ("a", "b")]
+    # Open side by side, as in two processes: neither waits on the other's lock
+    indexes = [ItemIndex(w.item_index_path, session_id=w.session_id) for w in workers]
+    for name, index in zip("ab", indexes):
+        index.record(f"https://example.com/products/{name}", "product")
+    for index in indexes:
+        index.close()
+    assert not session.item_index_path.exists()
+
+    assert merge_worker_indexes(session) == 2
+    index = ItemIndex(session.item_index_path)
+    entry = index.get("https://example.com/products/b")
+    index.close()
+    assert entry is not None and entry.session_id == session.session_id
@@ -0,0 +1,44 @@
+from pathlib import Path
+
+import pytest
+from scrapy import Request
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.request import RequestFingerprinter
+from scrapy.utils.test import get_crawler
+
+from toy_catalogue.extensions.checkpoint import CheckpointExtension
+from toy_catalogue.session.checkpoint import PendingRequests, pending_path
+
+
+def test_pending_requests_survive_as_of_last_commit(tmp_path: Path) -> None:
+    fingerprint = RequestFingerprinter().fingerprint
+    requests = [
+        Request("https://shop.com/list?sort=price"),
+        Request("https://shop.com/list?sort=name"),  # same URL fingerprint
+        Request("https://shop.com/list?sort=name", method="POST"),
+    ]
+    pending = PendingRequests(pending_path(tmp_path / "jobdir"))
+    for request in requests:
+        pending.add(fingerprint(request), request.to_dict())
+    assert len(pending) == 3
+    pending.commit()
+    # Downloaded after the checkpoint, then the process dies
+    pending.remove(fingerprint(requests[0]))
+    pending.add(fingerprint(Request("https://shop.com/new")), {"url": "new"})
+    pending.close()
+
+    reopened = PendingRequests(pending_path(tmp_path / "jobdir"))
+    restored = list(reopened.committed())
+    assert sorted((r["url"], r["method"]) for r in restored) == sorted(
+        (r.url, r.method) for r in requests
+    )
+    reopened.close()
+
+
+def test_shared_frontier_workers_do_not_checkpoint() -> None:
+    settings = {"CHECKPOINT_INTERVAL": 300}
+    CheckpointExtension.from_crawler(get_crawler(settings_dict=settings))
+    # Every worker would share one jobdir/pending.sqlite and checkpoint.pickle
+    shared = {**settings, "FRONTIER_REDIS_URL": "redis://localhost:6379/0"}
+    with pytest.raises(NotConfigured):
+        CheckpointExtension.from_crawler(get_crawler(settings_dict=shared))
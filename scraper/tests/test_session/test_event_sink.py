@@ -0,0 +1,117 @@
+import gzip
+import pickle
+from datetime import datetime, timezone
+from pathlib import Path
+import pytest
+from toy_catalogue.config.schema.external.schema import SiteConfig
+from toy_catalogue.session.event_sink import (
+    _close_open_sinks,
+    EventSink,
+    EventSinkConfig,
+    event_segments,
+    read_events,
+)
+from toy_catalogue.session.session_manager import SessionContext, SessionMeta
+
+
+def event(n: int) -> dict:
+    return {"type": "INFO", "source": "test", "details": {"n": n}}
+
+
+def sink(tmp_path: Path, **config) -> EventSink:
+    return EventSink(tmp_path, EventSinkConfig(**config))
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip", "zstd"])
+def test_events_round_trip(tmp_path: Path, compression: str) -> None:
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    s = sink(tmp_path, compression=compression, flush_size=3)
+    for n in range(10):
+        s.put(event(n))
+    s.close()
+    assert [e["details"]["n"] for e in read_events(tmp_path)] == list(range(10))
+
+
+def test_writer_flushes_on_interval_without_close(tmp_path: Path) -> None:
+    s = sink(tmp_path, flush_size=1000, flush_interval=0.05)
+    s.put(event(0))
+    assert s.flush(timeout=5)
+    # Already on disk while the sink is still open, i.e. survives a crash
+    assert [e["details"]["n"] for e in read_events(tmp_path)] == [0]
+    s.close()
+
+
+def test_ring_is_bounded_and_reports_drops(tmp_path: Path) -> None:
+    s = sink(tmp_path, capacity=5, flush_size=1000, flush_interval=60)
+    for n in range(12):
+        s.put(event(n))
+    assert len(s._ring) == 5
+    s.close()
+    events = list(read_events(tmp_path))
+    assert events[0]["type"] == "events_dropped"
+    assert events[0]["details"] == {"count": 7}
+    assert [e["details"]["n"] for e in events[1:]] == [7, 8, 9, 10, 11]
+
+
+def test_rotation_keeps_order_across_segments(tmp_path: Path) -> None:
+    s = sink(tmp_path, compression="gzip", flush_size=1, max_bytes=1)
+    for n in range(4):
+        s.put(event(n))
+        s.flush()
+    s.close()
+    assert [p.name for p in event_segments(tmp_path)] == [
+        f"events.{n:04d}.jsonl.gz" for n in range(1, 5)
+    ]
+    assert [e["details"]["n"] for e in read_events(tmp_path)] == [0, 1, 2, 3]
+
+
+def test_truncated_batch_is_skipped(tmp_path: Path) -> None:
+    whole = gzip.compress(b'{"n": 1}\n')
+    (tmp_path / "events.jsonl.gz").write_bytes(
+        whole + gzip.compress(b'{"n": 2}\n')[:12]
+    )
+    assert list(read_events(tmp_path)) == [{"n": 1}]
+
+
+def test_session_context_streams_events(tmp_path: Path) -> None:
+    config = SiteConfig.model_validate(
+        {"site": "x", "start_urls": {}, "traversal": {}, "processors": {}}
+    )
+    meta = SessionMeta(
+        session_id="s",
+        site="x",
+        mode="fresh",
+        timestamp=datetime.now(timezone.utc),
+        config=config,
+    )
+    context = SessionContext(session_id="s", session_dir=tmp_path, meta=meta)
+    context.record_success(source="test", msg="one")
+    copy = pickle.loads(pickle.dumps(context))  # e.g. handed to a worker process
+    context.flush_events()
+    copy.record_success(source="test", msg="two")
+    copy.flush_events()
+    assert [e["details"]["message"] for e in read_events(tmp_path)] == ["one", "two"]
+
+
+def test_events_after_flush_reopen_the_sink(tmp_path: Path) -> None:
+    config = SiteConfig.model_validate(
+        {"site": "x", "start_urls": {}, "traversal": {}, "processors": {}}
+    )
+    meta = SessionMeta(
+        session_id="s",
+        site="x",
+        mode="fresh",
+        timestamp=datetime.now(timezone.utc),
+        config=config,
+    )
+    context = SessionContext(session_id="s", session_dir=tmp_path, meta=meta)
+    stale = context.event_sink
+    context.record_success(source="test", msg="one")
+    context.flush_events()
+    # e.g. an extension's spider_closed running after the spider's
+    context.record_success(source="test", msg="two")
+    with pytest.raises(RuntimeError):
+        stale.put(event(0))
+    _close_open_sinks()  # as at interpreter exit
+    assert [e["details"]["message"] for e in read_events(tmp_path)] == ["one", "two"]
@@ -0,0 +1,69 @@
+import logging
+import types
+from toy_catalogue.session import log_intercepter
+from toy_catalogue.session.log_intercepter import (
+    LoggerLevelFilter,
+    RateLimitFilter,
+    SessionLogInterceptor,
+)
+
+
+def record(name: str, level: int = logging.INFO, msg: str = "m") -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, msg, None, None)
+
+
+def context(session_id: str):
+    events: list[dict] = []
+    return types.SimpleNamespace(
+        session_id=session_id,
+        events=events,
+        record_event=lambda **kw: events.append(kw),
+    )
+
+
+def test_level_filter_uses_longest_prefix() -> None:
+    f = LoggerLevelFilter({"scrapy": "INFO", "scrapy.core.scraper": "WARNING"}, "DEBUG")
+    assert not f.filter(record("scrapy.core.scraper.x", logging.INFO))
+    assert f.filter(record("scrapy.core.engine", logging.INFO))
+    assert not f.filter(record("scrapy.core.engine", logging.DEBUG))
+    assert f.filter(record("other", logging.DEBUG))
+
+
+def test_rate_limit_counts_suppressed_repeats(monkeypatch) -> None:
+    now = [0.0]
+    monkeypatch.setattr(log_intercepter.time, "monotonic", lambda: now[0])
+    f = RateLimitFilter(rate=1.0, burst=2)
+    passed = [f.filter(record("scrapy", msg="Crawled %s")) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert f.filter(record("scrapy", msg="Other %s"))
+    assert f.filter(record("scrapy", logging.ERROR, msg="Crawled %s"))
+
+    now[0] = 1.0
+    later = record("scrapy", msg="Crawled %s")
+    assert f.filter(later)
+    assert later.suppressed == 3  # type: ignore[attr-defined]
+
+
+def test_registers_once_and_routes_by_spider() -> None:
+    a, b = context("a"), context("b")
+    logger = logging.getLogger("scrapy.test_intercepter")
+    logger.setLevel(logging.DEBUG)
+    interceptor = SessionLogInterceptor.register(a, levels={"scrapy": "INFO"})  # type: ignore[arg-type]
+    assert SessionLogInterceptor.register(b) is interceptor  # type: ignore[arg-type]
+    handlers = logging.getLogger("scrapy").handlers
+    assert handlers.count(interceptor.queue_handler) == 1
+
+    logger.info("only a", extra={"spider": types.SimpleNamespace(session_context=a)})
+    logger.info("both")
+    logger.debug("filtered out")
+    SessionLogInterceptor.unregister(b)  # type: ignore[arg-type]
+    SessionLogInterceptor.unregister(a)  # type: ignore[arg-type]
+
+    assert interceptor.queue_handler not in logging.getLogger("scrapy").handlers
+
+    def messages(ctx) -> list[str]:
+        return [e["details"]["message"].split(": ", 1)[1] for e in ctx.events]
+
+    assert messages(a) == ["only a", "both"]
+    assert messages(b) == ["both"]
+    assert a.events[0]["event_type"] == "INFO"
@@ -0,0 +1,178 @@
+import json
+import types
+from pathlib import Path
+from scrapy.http import HtmlResponse, Request
+from toy_catalogue.config.schema.external.schema import GraphSchema
+from toy_catalogue.engine.crawl.base import BaseCrawlStrategy
+from toy_catalogue.engine.graph import build_traversal_graph
+from toy_catalogue.extensions.prometheus import PrometheusExtension, render_prometheus
+from toy_catalogue.session.metrics import MetricsRegistry
+
+
+def test_metrics_are_keyed_by_name_and_labels() -> None:
+    metrics = MetricsRegistry()
+    metrics.counter("responses", node="product").inc()
+    metrics.counter("responses", node="product").inc(2)
+    metrics.counter("responses", node="image").inc()
+    metrics.gauge("frontier").set(7)
+
+    assert metrics.counter("responses", node="product").value == 3
+    assert len(metrics) == 3
+    assert metrics.snapshot()["counter"]["responses"] == [
+        {"labels": {"node": "image"}, "value": 1},
+        {"labels": {"node": "product"}, "value": 3},
+    ]
+
+
+def test_histogram_buckets_are_upper_bounds() -> None:
+    histogram = MetricsRegistry().histogram("links", buckets=(1, 10))
+    for value in (0, 1, 2, 10, 11):
+        histogram.observe(value)
+    assert histogram.snapshot() == {
+        "buckets": [1, 10, "+Inf"],
+        "counts": [2, 2, 1],
+        "count": 5,
+        "sum": 24.0,
+    }
+
+
+def test_snapshot_replaces_file(tmp_path: Path) -> None:
+    metrics = MetricsRegistry()
+    path = tmp_path / "metrics.json"
+    metrics.counter("a").inc()
+    metrics.write_snapshot(path)
+    metrics.counter("a").inc()
+    metrics.write_snapshot(path, {"scrapy_stats": {"x": 1}})
+
+    data = json.loads(path.read_text())
+    assert data["scrapy_stats"] == {"x": 1}
+    assert data["metrics"]["counter"]["a"][0]["value"] == 2
+    assert [p.name for p in tmp_path.iterdir()] == ["metrics.json"]
+
+
+def test_process_node_counts_instead_of_logging(session) -> None:
+    events: list[dict] = []
+    session.record_event = lambda **kw: events.append(kw)
+    graph = build_traversal_graph(
+        GraphSchema.model_validate(
+            {
+                "collection": [
+                    {
+                        "extractors": [
+                            {
+                                "class": "link_extractor",
+                                "params": {"allow": ["/products/"]},
+                            }
+                        ],
+                        "callbacks": ["product"],
+                    }
+                ]
+            }
+        )
+    )
+    strategy = BaseCrawlStrategy(graph, session)
+    url = "https://shop.example.com/collections/all"
+    body = b'<a href="/products/a">a</a><a href="/products/b">b</a>'
+    response = HtmlResponse(
+        url=url, body=body, request=Request(url, meta={"callback": "collection"})
+    )
+    strategy.process_node(response)
+    strategy.close()
+
+    metrics = session.metrics
+    assert metrics.counter("responses", node="collection").value == 1
+    assert metrics.counter("items_created", node="collection").value == 1
+    assert metrics.counter("links_extracted", node="collection").value == 2
+    extracted = metrics.counter(
+        "extracted", node="collection", extractor="link_extractor"
+    )
+    assert extracted.value == 2
+    assert metrics.histogram("stage_ms", stage="parse", node="collection").count == 1
+    assert events == []
+
+
+def test_histogram_percentiles_interpolate_within_buckets() -> None:
+    metrics = MetricsRegistry()
+    histogram = metrics.histogram("stage_ms", buckets=(10, 20, 40), stage="x")
+    for value in [5.0] * 50 + [15.0] * 45 + [30.0] * 4 + [90.0]:
+        histogram.observe(value)
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert summary["p50"] == 10.0
+    assert 10 < summary["p95"] <= 20
+    assert 20 < summary["p99"] <= 40
+    assert summary["max"] == 90.0
+    assert metrics.summary()["stage_ms"] == [{"stage": "x", "value": summary}]
+
+
+def test_timing_records_milliseconds() -> None:
+    metrics = MetricsRegistry()
+    metrics.timing("extract_ms", 0.0, extractor="css_get")
+    histogram = metrics.histogram("extract_ms", extractor="css_get")
+    assert histogram.count == 1
+    assert histogram.sum > 0
+
+
+def test_render_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.counter("responses", node="collection").inc(3)
+    registry.gauge("pages_per_second", node="collection").set(1.5)
+    histogram = registry.histogram("links_per_response", (1, 10), node="collection")
+    for value in (0, 5, 50):
+        histogram.observe(value)
+
+    text = render_prometheus(
+        registry,
+        {"frontier_depth": 7},
+        {"downloader/response_bytes": 2048, "finish_reason": "finished"},
+    )
+    lines = text.splitlines()
+    assert "# TYPE toy_catalogue_responses_total counter" in lines
+    assert 'toy_catalogue_responses_total{node="collection"} 3' in lines
+    assert 'toy_catalogue_pages_per_second{node="collection"} 1.5' in lines
+    buckets = [line for line in lines if "_bucket" in line]
+    assert [line.rsplit(" ", 1)[1] for line in buckets] == ["1", "2", "3"]
+    assert buckets[-1].startswith(
+        'toy_catalogue_links_per_response_bucket{le="+Inf",node="collection"}'
+    )
+    assert 'toy_catalogue_links_per_response_count{node="collection"} 3' in lines
+    assert "toy_catalogue_frontier_depth 7" in lines
+    assert 'toy_catalogue_scrapy_stat{stat="downloader/response_bytes"} 2048' in lines
+    assert "finished" not in text
+
+
+def test_rates_are_computed_per_scrape_outside_the_registry(session):
+    stats = {"downloader/exception_count": 0}
+    crawler = types.SimpleNamespace(
+        stats=types.SimpleNamespace(get_stats=lambda: stats)
+    )
+    ext = PrometheusExtension(
+        crawler, "127.0.0.1", [0], window=10  # type: ignore[arg-type]
+    )
+    ext.session = session
+    ext._samples.append((0.0, {}))
+    responses = session.metrics.counter("responses", node="product")
+
+    def scrape(now: float) -> dict:
+        scraped = MetricsRegistry()
+        ext.add_rates(scraped, now)
+        return {
+            (name, labels): metric.snapshot()
+            for name, labels, metric in scraped.items()
+            if name.endswith("_per_second")
+        }
+
+    responses.inc(20)
+    stats["downloader/exception_count"] = 5
+    assert scrape(5) == {
+        ("pages_per_second", (("node", "product"),)): 4.0,
+        ("errors_per_second", ()): 1.0,
+    }
+    responses.inc(30)
+    # Averaged over the window: back to the start, the newest sample >= 10s old
+    assert scrape(10)[("pages_per_second", (("node", "product"),))] == 5.0
+    responses.inc(10)
+    assert scrape(20)[("pages_per_second", (("node", "product"),))] == 1.0
+    assert not any(
+        name.endswith("_per_second") for name, _, _ in session.metrics.items()
+    )
@@ -0,0 +1,55 @@
+import json
+import signal
+import time
+
+import pytest
+
+from toy_catalogue.session.profiler import SamplingProfiler
+
+pytestmark = pytest.mark.skipif(
+    not SamplingProfiler.available(), reason="needs SIGPROF"
+)
+
+
+def spin(seconds):
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+def test_profiler_samples_busy_function(tmp_path):
+    profiler = SamplingProfiler(interval=0.005)
+    profiler.start()
+    try:
+        spin(0.3)
+    finally:
+        profiler.stop()
+    assert profiler.samples > 10
+
+    folded = profiler.folded()
+    assert "spin (" in folded
+    line = next(line for line in folded.splitlines() if "spin (" in line)
+    assert "test_profiler_samples_busy_function" in line.split(";")[-2]
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in folded.splitlines()) == (
+        profiler.samples
+    )
+
+    folded_path, speedscope_path = profiler.write(tmp_path)
+    assert folded_path.read_text() == folded
+    data = json.loads(speedscope_path.read_text())
+    frames = data["shared"]["frames"]
+    (sampled,) = data["profiles"]
+    assert sampled["type"] == "sampled"
+    assert len(sampled["samples"]) == len(sampled["weights"])
+    assert sampled["endValue"] == pytest.approx(profiler.samples * 0.005)
+    assert all(0 <= i < len(frames) for stack in sampled["samples"] for i in stack)
+    assert any(frame["name"] == "spin" for frame in frames)
+
+
+def test_stop_restores_previous_handler():
+    before = signal.getsignal(signal.SIGPROF)
+    profiler = SamplingProfiler()
+    profiler.start()
+    profiler.stop()
+    assert signal.getsignal(signal.SIGPROF) == before
+    assert signal.getitimer(signal.ITIMER_PROF) == (0.0, 0.0)
@@ -0,0 +1,92 @@
+import json
+
+from scrapy.http import Request
+from scrapy.utils.request import RequestFingerprinter
+
+from toy_catalogue.session.tracing import MARK, TRACE_KEY, Phase, Tracer, mark
+from toy_catalogue.utils.url import url_fingerprint
+
+fingerprint = RequestFingerprinter().fingerprint
+
+
+def scheduled(tracer: Tracer, url: str) -> Request:
+    request = Request(url)
+    tracer.schedule(request, fingerprint(request))
+    return request
+
+
+def test_marks_round_trip_through_buffer():
+    tracer = Tracer()
+    request = scheduled(tracer, "https://example.com/a")
+    tracer.mark(request, Phase.DOWNLOAD_START)
+    assert len(tracer) == 2
+    assert len(tracer.buffer) == 2 * MARK.size
+    phases = [phase for _, phase, _ in tracer.marks()]
+    assert phases == [Phase.SCHEDULED, Phase.DOWNLOAD_START]
+
+
+def test_timelines_are_per_request_and_attempt():
+    tracer = Tracer()
+    a = scheduled(tracer, "https://example.com/list?sort=price")
+    b = scheduled(tracer, "https://example.com/list?sort=name")
+    retry = a.copy()
+    tracer.schedule(retry, fingerprint(retry))
+    keys = [a.meta[TRACE_KEY], b.meta[TRACE_KEY], retry.meta[TRACE_KEY]]
+    assert len(set(keys)) == 3
+    tracer.mark(Request("https://example.com/never-scheduled"), Phase.SAVED)
+    assert {key for key, _, _ in tracer.marks()} == set(keys)
+
+
+def test_marks_past_max_bytes_are_dropped():
+    tracer = Tracer(max_bytes=3 * MARK.size)
+    request = scheduled(tracer, "https://example.com/")
+    for _ in range(4):
+        tracer.mark(request, Phase.PARSE_START)
+    assert len(tracer) == 3
+    assert tracer.dropped == 2
+    assert tracer.chrome_trace()["otherData"] == {"marks": 3, "dropped": 2}
+
+
+def test_module_mark_is_noop_without_current_tracer():
+    tracer = Tracer()
+    request = scheduled(tracer, "https://example.com/")
+    Tracer.current = None
+    mark(request, Phase.PARSE_START)
+    Tracer.current = tracer
+    try:
+        mark(request, Phase.PARSE_START)
+        mark(None, Phase.PARSE_START)
+    finally:
+        Tracer.current = None
+    assert len(tracer) == 2
+
+
+def test_chrome_trace_spans_and_lanes(tmp_path):
+    tracer = Tracer()
+    tracer.origin_ns = 0
+    a, b, c = (f"https://example.com/{n}" for n in "abc")
+
+    def put(url, phase, ms):
+        key = url_fingerprint(url)
+        tracer.urls.setdefault(key, url)
+        tracer._append(key, phase, ms * 1_000_000)
+
+    # a and b overlap, c starts after a finishes and reuses its lane
+    for url, start in ((a, 0), (b, 5), (c, 20)):
+        put(url, Phase.SCHEDULED, start)
+        put(url, Phase.DOWNLOAD_START, start + 1)
+        put(url, Phase.DOWNLOADED, start + 10)
+    tracer.stall(2_000_000)
+
+    trace = tracer.chrome_trace()
+    spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    lanes = {e["args"]["url"]: e["tid"] for e in spans if "args" in e}
+    assert lanes[a] == lanes[c] != lanes[b]
+    download = next(
+        e for e in spans if e["name"] == "download" and e["args"]["url"] == b
+    )
+    assert download["ts"] == 6000 and download["dur"] == 9000
+    assert any(e["name"] == "reactor stall" and e["tid"] == 0 for e in spans)
+
+    tracer.export(tmp_path / "trace.json")
+    assert json.loads((tmp_path / "trace.json").read_text()) == trace